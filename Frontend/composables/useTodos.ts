@@ -4,6 +4,8 @@ import { NewTodoInput, Todo, TodoStatus } from '../types';
 import { useAuth } from './useAuth';
 
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:5050';
+// The server caps pages at TODO_PAGE_MAX_SIZE (200 by default).
+const PAGE_SIZE = 200;
 
 const state = reactive<{ todos: Todo[] }>({
   todos: [],
@@ -36,16 +38,29 @@ const upsertTodo = (todo: Todo) => {
   }
 };
 
+// GET /api/todos is paged; follow X-Next-Cursor so the board ranks every todo.
+const fetchAllTodos = async (): Promise<any[]> => {
+  const rows: any[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${API_BASE}/api/todos?${params}`);
+    if (!res.ok) throw new Error(`Failed to fetch todos: ${res.status}`);
+    const data = await res.json();
+    if (Array.isArray(data)) rows.push(...data);
+    cursor = res.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return rows;
+};
+
 const fetchTodos = async (force = false) => {
   if (isLoading.value) return;
   if (hasLoaded.value && !force) return;
   isLoading.value = true;
   error.value = null;
   try {
-    const res = await fetch(`${API_BASE}/api/todos`);
-    if (!res.ok) throw new Error(`Failed to fetch todos: ${res.status}`);
-    const data = await res.json();
-    const mapped = Array.isArray(data) ? data.map(mapTodo) : [];
+    const mapped = (await fetchAllTodos()).map(mapTodo);
     state.todos = mapped.length > 0 ? mapped : [...INITIAL_TODOS];
     hasLoaded.value = true;
   } catch (err: any) {
@@ -4,22 +4,33 @@ from .config import Config
 from .extensions import db, migrate
 from .routes import register_routes
 from .commands import register_commands
+from .service.compression import init_compression
+from .service.db_pool import instrument_engines
+from .service.instrumentation import init_instrumentation
+from .service.token_retention import init_token_pruner
 
-def create_app():
+def create_app(config: dict | None = None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Explicit overrides (benchmarks, tests) win over the environment.
+    if config:
+        app.config.update(config)
 
     # Allow frontend (default localhost:3000) to call APIs. Adjust origins via env if needed.
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    CORS(app, resources={r"/api/*": {"origins": "*", "expose_headers": ["X-Next-Cursor"]}})
     # Avoid redirecting between /api/todos and /api/todos/ on preflight
     app.url_map.strict_slashes = False
     
     db.init_app(app)
     migrate.init_app(app, db)
+    instrument_engines(app)
+    init_instrumentation(app)
+    init_compression(app)
     
     from . import models
 
     register_routes(app)
     register_commands(app)
+    init_token_pruner(app)
 
     return app
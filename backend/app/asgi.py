@@ -0,0 +1,377 @@
+"""ASGI serving mode.
+
+Slow, I/O-bound endpoints (chat and streamed graph reads) are served by native
+coroutines, so a single process can hold thousands of them open without a
+thread each. Every other route, and every error path of the async routes, is
+handed to the regular Flask app (built by ``create_app`` and
+``register_routes``) running on a small thread pool.
+
+The async handlers bypass Flask's request hooks, so they apply the same
+cross-cutting behaviour themselves: Content-Encoding negotiation (as
+``service.compression``), ``/metrics`` samples under the Flask endpoint names
+and replica reads for graph streams (as ``replica_reads``).
+
+Run with ``uvicorn asgi:app`` from the backend directory.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from typing import AsyncIterator
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from flask import Flask, current_app
+from sqlalchemy import select
+from werkzeug.datastructures import Accept, MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+from . import create_app
+from .models import Graph
+from .routes.chat import _extract_text, _sse, _validate_chat_request
+from .service.async_db import dispose_async_engines, get_async_engine
+from .service.auth import resolve_access_user_async
+from .service.chat_admission import ChatOverloaded, get_chat_admission
+from .service.chat_cache import chat_cache_key, get_chat_cache
+from .service.compression import COMPRESSIBLE_TYPES, get_response_compressor
+from .service.db_routing import may_read_replica, writer_key
+from .service.graphs import GRAPH_STREAM_MODES, aget_owned_graph_row, aiter_graph_json, aiter_graph_ndjson
+from .service.instrumentation import async_request_sample
+from .service.llm import get_gemini_pool
+
+# Matches what flask-cors adds to /api/* responses in create_app.
+_CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-expose-headers", b"X-Next-Cursor"),
+]
+
+
+class _Request:
+    def __init__(self, scope, receive) -> None:
+        self.scope = scope
+        self._receive = receive
+        self._body: bytes | None = None
+        self.headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        self.args = {key: values[0] for key, values in parse_qs(scope["query_string"].decode("latin-1")).items()}
+
+    async def body(self) -> bytes:
+        if self._body is None:
+            chunks = []
+            while True:
+                message = await self._receive()
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            self._body = b"".join(chunks)
+        return self._body
+
+    async def json(self):
+        try:
+            return json.loads(await self.body() or b"null")
+        except ValueError:
+            return None
+
+    def replay(self):
+        """A ``receive`` for the Flask fallback that re-delivers the consumed body."""
+        if self._body is None:
+            return self._receive
+        pending = [{"type": "http.request", "body": self._body, "more_body": False}]
+
+        async def receive():
+            return pending.pop() if pending else await self._receive()
+
+        return receive
+
+    @property
+    def bearer_token(self) -> str | None:
+        auth_header = self.headers.get("authorization", "")
+        if not auth_header.startswith("Bearer "):
+            return None
+        return auth_header.split(" ", 1)[1].strip()
+
+    @property
+    def client_host(self) -> str | None:
+        client = self.scope.get("client")
+        return client[0] if client else None
+
+
+class _SentResponse:
+    """Wraps ``send``, noting the status and body bytes for the metrics."""
+
+    def __init__(self, send) -> None:
+        self._send = send
+        self.status = 0
+        self.body_bytes = 0
+
+    async def __call__(self, message) -> None:
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            self.body_bytes += len(message.get("body", b""))
+        await self._send(message)
+
+
+def _headers(content_type: str, extra: dict[str, str] | None = None) -> list[tuple[bytes, bytes]]:
+    headers = [(b"content-type", content_type.encode())] + _CORS_HEADERS
+    for key, value in (extra or {}).items():
+        headers.append((key.lower().encode(), value.encode("latin-1")))
+    return headers
+
+
+def _negotiate(request: _Request, mimetype: str) -> tuple[str | None, dict[str, str]]:
+    """The Content-Encoding ``_compress_response`` would pick, and the headers it always adds."""
+    if not current_app.config["COMPRESS_ENABLED"] or mimetype not in COMPRESSIBLE_TYPES:
+        return None, {}
+    accept = parse_accept_header(request.headers.get("accept-encoding"), Accept)
+    return get_response_compressor().negotiate(accept), {"Vary": "Accept-Encoding"}
+
+
+async def _send_json(
+    request: _Request, send, status: int, payload: dict, extra: dict[str, str] | None = None
+) -> None:
+    body = (json.dumps(payload) + "\n").encode()
+    extra = dict(extra or {})
+    encoding, vary = _negotiate(request, "application/json")
+    extra.update(vary)
+    if encoding is not None:
+        compressed = get_response_compressor().encode_body(body, encoding)
+        if compressed is not None:
+            body = compressed
+            extra["Content-Encoding"] = encoding
+    headers = _headers("application/json", {"Content-Length": str(len(body)), **extra})
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_stream(send, receive, status: int, headers, chunks: AsyncIterator[str | bytes]) -> None:
+    """Send ``chunks`` as they are produced; stop producing if the client goes away."""
+
+    async def pump() -> None:
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        async for chunk in chunks:
+            body = chunk if isinstance(chunk, bytes) else chunk.encode()
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def watch_disconnect() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    pump_task = asyncio.ensure_future(pump())
+    watch_task = asyncio.ensure_future(watch_disconnect())
+    try:
+        await asyncio.wait([pump_task, watch_task], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watch_task.cancel()
+        if not pump_task.done():
+            # Cancelling runs the generator's cleanup (slot release, cursor close).
+            pump_task.cancel()
+        await asyncio.gather(pump_task, watch_task, return_exceptions=True)
+        await chunks.aclose()
+    if not pump_task.cancelled() and pump_task.exception() is not None:
+        raise pump_task.exception()
+
+
+class AsyncRoutes:
+    """Routes with native async handlers in front of the Flask WSGI app.
+
+    A handler returns ``False`` (before sending anything) to let Flask answer
+    the request instead; that is how validation errors, auth failures, 404s and
+    304s keep exactly the Flask responses.
+    """
+
+    def __init__(self, flask_app: Flask) -> None:
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config["ASGI_WSGI_THREADS"])
+        # Method, path, handler and the Flask endpoint it stands in for (metrics label).
+        self.routes = [
+            ("POST", re.compile(r"^/api/chat/?$"), self.chat, "chat.chat"),
+            ("POST", re.compile(r"^/api/chat/stream/?$"), self.chat_stream, "chat.chat_stream"),
+            ("GET", re.compile(r"^/api/graphs/(?P<graph_id>[^/]+)/?$"), self.graph, "graphs.get_graph"),
+        ]
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http":
+            for method, pattern, handler, endpoint in self.routes:
+                match = pattern.match(scope["path"])
+                if scope["method"] == method and match:
+                    request = _Request(scope, receive)
+                    sent = _SentResponse(send)
+                    with self.flask_app.app_context(), async_request_sample(self.flask_app) as sample:
+                        handled = await handler(request, sent, **match.groupdict())
+                    if not handled:
+                        # Flask measures the request itself.
+                        await self.wsgi(scope, request.replay(), send)
+                    elif sample is not None:
+                        metrics = self.flask_app.extensions["request_metrics"]
+                        metrics.record(endpoint, method, sent.status, sample, sent.body_bytes)
+                    return
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await dispose_async_engines(self.flask_app)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _client_key(self, request: _Request) -> str:
+        user, _ = await resolve_access_user_async(request.bearer_token)
+        return f"user:{user.id}" if user else f"ip:{request.client_host}"
+
+    async def _parse_chat(self, request: _Request):
+        data = await request.json()
+        if not isinstance(data, dict):
+            data = {}
+        prompt, model, error = _validate_chat_request(data)
+        if error:
+            return None
+        try:
+            pool = get_gemini_pool()
+        except RuntimeError:
+            return None
+        return prompt, model, pool
+
+    async def chat(self, request: _Request, send) -> bool:
+        parsed = await self._parse_chat(request)
+        if parsed is None:
+            return False
+        prompt, model, pool = parsed
+        client_key = await self._client_key(request)
+
+        async def generate() -> str:
+            ticket = await get_chat_admission().acquire_async(model, client_key)
+            try:
+                response = await pool.async_client().aio.models.generate_content(model=model, contents=prompt)
+            finally:
+                ticket.release()
+            return _extract_text(response)
+
+        cache = get_chat_cache()
+        try:
+            if cache is None:
+                text, outcome = await generate(), "bypass"
+            else:
+                text, outcome = await cache.get_or_compute_async(chat_cache_key(prompt, model), generate)
+        except ChatOverloaded as exc:
+            await _send_json(request, send, 429, {"error": str(exc)}, {"Retry-After": str(exc.retry_after)})
+            return True
+        except Exception as exc:
+            await _send_json(request, send, 500, {"error": f"Gemini request failed: {exc}"})
+            return True
+
+        if not text:
+            await _send_json(request, send, 500, {"error": "Gemini returned empty response"})
+        else:
+            await _send_json(request, send, 200, {"text": text}, {"X-Cache": outcome.upper()})
+        return True
+
+    async def chat_stream(self, request: _Request, send) -> bool:
+        parsed = await self._parse_chat(request)
+        if parsed is None:
+            return False
+        prompt, model, pool = parsed
+        cache = get_chat_cache()
+        key = chat_cache_key(prompt, model)
+        cached = await asyncio.to_thread(cache.get, key) if cache is not None else None
+
+        async def replay_cached() -> AsyncIterator[str]:
+            yield _sse({"text": cached})
+            yield _sse({}, event="done")
+
+        async def generate() -> AsyncIterator[str]:
+            pieces = []
+            try:
+                stream = await pool.async_client().aio.models.generate_content_stream(model=model, contents=prompt)
+                async for chunk in stream:
+                    text = _extract_text(chunk, strip=False)
+                    if text:
+                        pieces.append(text)
+                        yield _sse({"text": text})
+            except Exception as exc:
+                yield _sse({"error": f"Gemini request failed: {exc}"}, event="error")
+                return
+            finally:
+                ticket.release()
+            if cache is not None:
+                await asyncio.to_thread(cache.set, key, "".join(pieces).strip())
+            yield _sse({}, event="done")
+
+        extra = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        if cached is not None:
+            headers = _headers("text/event-stream; charset=utf-8", {**extra, "X-Cache": "HIT"})
+            await _send_stream(send, request._receive, 200, headers, replay_cached())
+            return True
+
+        try:
+            ticket = await get_chat_admission().acquire_async(model, await self._client_key(request))
+        except ChatOverloaded as exc:
+            await _send_json(request, send, 429, {"error": str(exc)}, {"Retry-After": str(exc.retry_after)})
+            return True
+        headers = _headers(
+            "text/event-stream; charset=utf-8", {**extra, "X-Cache": "MISS" if cache is not None else "BYPASS"}
+        )
+        try:
+            await _send_stream(send, request._receive, 200, headers, generate())
+        finally:
+            # Covers a disconnect before the generator ever ran.
+            ticket.release()
+        return True
+
+    async def graph(self, request: _Request, send, graph_id: str) -> bool:
+        # Only the streamed representations are served here; the cached
+        # snapshot path is already cheap and stays on Flask.
+        stream = request.args.get("stream", "").strip().lower()
+        if stream and stream not in GRAPH_STREAM_MODES:
+            return False  # Flask answers 400.
+        accept = parse_accept_header(request.headers.get("accept"), MIMEAccept)
+        if stream == "ndjson" or accept.best == "application/x-ndjson":
+            variant, mimetype, pieces = ".ndjson", "application/x-ndjson", aiter_graph_ndjson
+        elif stream:
+            variant, mimetype, pieces = ".stream", "application/json", aiter_graph_json
+        else:
+            return False
+        if request.args.get("format", "json").strip().lower() != "json":
+            return False  # Flask rejects streaming a compact format.
+
+        user, error = await resolve_access_user_async(request.bearer_token)
+        if error:
+            return False
+        chunk_size = self.flask_app.config["GRAPH_STREAM_CHUNK_SIZE"]
+        # As replica_reads: the replica, unless this client has just written.
+        replica = may_read_replica(writer_key(request.headers.get("authorization"), request.client_host))
+        async with get_async_engine("replica" if replica else None).connect() as conn:
+            revision = (
+                await conn.execute(
+                    select(Graph.revision).where(Graph.id == graph_id, Graph.owner_user_id == user.id)
+                )
+            ).scalar()
+            if revision is None:
+                return False
+            etag = f"{graph_id}.{revision}{variant}"
+            # Weak comparison, like the Flask view: compressed streams carry weak ETags.
+            if parse_etags(request.headers.get("if-none-match")).contains_weak(etag):
+                return False
+            graph = await aget_owned_graph_row(conn, user.id, graph_id)
+            if graph is None:
+                return False
+            encoding, extra = _negotiate(request, mimetype)
+            chunks = pieces(conn, graph, chunk_size)
+            if encoding is not None:
+                chunks = get_response_compressor().compress_stream_async(chunks, encoding)
+                extra["Content-Encoding"] = encoding
+            etag = quote_etag(f"{graph_id}.{graph.revision}{variant}", weak=encoding is not None)
+            headers = _headers(mimetype, {"ETag": etag, "Cache-Control": "private, no-cache", **extra})
+            await _send_stream(send, request._receive, 200, headers, chunks)
+        return True
+
+
+def create_asgi_app(flask_app: Flask | None = None) -> AsyncRoutes:
+    return AsyncRoutes(flask_app or create_app())
@@ -1,4 +1,6 @@
 from .db import register_db_commands
+from .tokens import register_token_commands
 
 def register_commands(app):
     register_db_commands(app)
+    register_token_commands(app)
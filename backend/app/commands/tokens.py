@@ -0,0 +1,14 @@
+import json
+
+import click
+
+from ..service.token_retention import prune_with_app_config
+
+
+def register_token_commands(app):
+    @app.cli.command("prune_tokens")
+    @click.option("--batch-size", type=int, default=None, help="Rows per DELETE (default REFRESH_TOKEN_PRUNE_BATCH_SIZE).")
+    @click.option("--max-batches", type=int, default=None, help="Stop after this many batches per pass.")
+    def prune_tokens(batch_size, max_batches):
+        """Delete expired and long-revoked refresh tokens; prints rows reclaimed."""
+        click.echo(json.dumps(prune_with_app_config(batch_size=batch_size, max_batches=max_batches)))
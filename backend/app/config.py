@@ -2,8 +2,28 @@ import os
 from dotenv import load_dotenv
 from sqlalchemy.engine import URL
 
+from .service.db_pool import TimedQueuePool
+
 load_dotenv()
 
+
+def _engine_options(url) -> dict:
+    """Pool settings shared by the primary and replica engines (per process)."""
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")),
+    }
+    # In-memory SQLite uses a single static connection; sizing does not apply.
+    if ":memory:" not in str(url) and str(url) not in ("sqlite://", "sqlite:///"):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "20")),
+            pool_timeout=int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30")),
+        )
+    return options
+
+
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
     JWT_SECRET = os.getenv("JWT_SECRET", SECRET_KEY)
@@ -12,8 +32,31 @@ class Config:
     JWT_REFRESH_TTL_DAYS = int(os.getenv("JWT_REFRESH_TTL_DAYS", "14"))
     AUTH_MAX_FAILED_ATTEMPTS = int(os.getenv("AUTH_MAX_FAILED_ATTEMPTS", "5"))
     AUTH_LOCKOUT_MINUTES = int(os.getenv("AUTH_LOCKOUT_MINUTES", "15"))
+    # Sliding-window login limits, checked before the user lookup and password
+    # hash. "memory" is per process, "sqlite" is shared by the workers on a host
+    # (LOGIN_THROTTLE_PATH), "none" counts failures on the user row instead.
+    LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory").lower()
+    LOGIN_THROTTLE_PATH = os.getenv("LOGIN_THROTTLE_PATH") or None
+    LOGIN_THROTTLE_WINDOW_SECONDS = float(os.getenv("LOGIN_THROTTLE_WINDOW_SECONDS", "900"))
+    LOGIN_THROTTLE_MAX_PER_EMAIL = int(os.getenv("LOGIN_THROTTLE_MAX_PER_EMAIL", "10"))
+    LOGIN_THROTTLE_MAX_PER_IP = int(os.getenv("LOGIN_THROTTLE_MAX_PER_IP", "100"))
+    LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS", "5"))
+    # A hash (queued in the pool or running) that takes longer is given up on.
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "30"))
+    AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+    AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    # Refresh-token retention: expired rows are deleted, revoked rows after the
+    # retention window. Interval 0 leaves pruning to `flask prune_tokens`.
+    REFRESH_TOKEN_PRUNE_BATCH_SIZE = int(os.getenv("REFRESH_TOKEN_PRUNE_BATCH_SIZE", "1000"))
+    REFRESH_TOKEN_REVOKED_RETENTION_HOURS = float(os.getenv("REFRESH_TOKEN_REVOKED_RETENTION_HOURS", "24"))
+    REFRESH_TOKEN_PRUNE_INTERVAL_MINUTES = float(os.getenv("REFRESH_TOKEN_PRUNE_INTERVAL_MINUTES", "0"))
 
-    SQLALCHEMY_DATABASE_URI = URL.create(
+    # DATABASE_URL overrides the DB_* settings (e.g. sqlite:///bench.db for local runs).
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or URL.create(
         drivername="mysql+pymysql",
         username=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
@@ -23,5 +66,94 @@ class Config:
         query={"charset": "utf8mb4"},
     )
 
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    # Optional read replica for the read-only endpoints (see service/db_routing.py).
+    # After a client writes, its reads stay on the primary for
+    # REPLICA_STALE_READ_SECONDS so it never sees its own write missing.
+    REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL") or None
+    SQLALCHEMY_BINDS = (
+        {"replica": {"url": REPLICA_DATABASE_URL, **_engine_options(REPLICA_DATABASE_URL)}}
+        if REPLICA_DATABASE_URL
+        else {}
+    )
+    REPLICA_STALE_READ_SECONDS = float(os.getenv("REPLICA_STALE_READ_SECONDS", "5"))
+
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Per-endpoint request/query metrics served at /metrics.
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Log a warning when one request runs the same statement this many times.
+    METRICS_N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "10"))
     SQLALCHEMY_ECHO = os.getenv("SQLALCHEMY_ECHO", "false").lower() == "true"
+    # Content-Encoding for /api responses: the first of COMPRESS_ENCODINGS the
+    # client accepts (br needs the brotli package), for bodies of at least
+    # COMPRESS_MIN_BYTES. Streamed responses are compressed chunk by chunk.
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_ENCODINGS = os.getenv("COMPRESS_ENCODINGS", "br,gzip")
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+
+    GRAPH_BULK_INSERT_BATCH_SIZE = int(os.getenv("GRAPH_BULK_INSERT_BATCH_SIZE", "1000"))
+    GRAPH_PATCH_MAX_OPERATIONS = int(os.getenv("GRAPH_PATCH_MAX_OPERATIONS", "10000"))
+    GRAPH_STREAM_CHUNK_SIZE = int(os.getenv("GRAPH_STREAM_CHUNK_SIZE", "500"))
+    GRAPH_CACHE_MAX_BYTES = int(os.getenv("GRAPH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    GRAPH_CACHE_COMPRESS = os.getenv("GRAPH_CACHE_COMPRESS", "true").lower() == "true"
+    # Per-process CSR adjacency used by the neighbors/khop/path endpoints.
+    GRAPH_ADJACENCY_CACHE_MAX_BYTES = int(os.getenv("GRAPH_ADJACENCY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # Largest ?k= for k-hop expansion; results of any traversal are capped at MAX_RESULTS.
+    GRAPH_TRAVERSAL_MAX_DEPTH = int(os.getenv("GRAPH_TRAVERSAL_MAX_DEPTH", "6"))
+    GRAPH_TRAVERSAL_MAX_RESULTS = int(os.getenv("GRAPH_TRAVERSAL_MAX_RESULTS", "5000"))
+    # Per-process spatial index behind GET /api/graphs/<id>/viewport. Below
+    # DETAIL_ZOOM nodes lose summary/data/avatar; below LABEL_ZOOM also titles.
+    GRAPH_VIEWPORT_CACHE_MAX_BYTES = int(os.getenv("GRAPH_VIEWPORT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+    GRAPH_VIEWPORT_MAX_NODES = int(os.getenv("GRAPH_VIEWPORT_MAX_NODES", "5000"))
+    GRAPH_VIEWPORT_DETAIL_ZOOM = float(os.getenv("GRAPH_VIEWPORT_DETAIL_ZOOM", "0.6"))
+    GRAPH_VIEWPORT_LABEL_ZOOM = float(os.getenv("GRAPH_VIEWPORT_LABEL_ZOOM", "0.25"))
+    # Server-side auto-layout (needs numpy). Jobs run on GRAPH_LAYOUT_WORKERS
+    # background threads per process; at most MAX_PENDING queued or running.
+    GRAPH_LAYOUT_WORKERS = int(os.getenv("GRAPH_LAYOUT_WORKERS", "1"))
+    GRAPH_LAYOUT_MAX_PENDING = int(os.getenv("GRAPH_LAYOUT_MAX_PENDING", "4"))
+    GRAPH_LAYOUT_JOB_HISTORY = int(os.getenv("GRAPH_LAYOUT_JOB_HISTORY", "100"))
+    GRAPH_LAYOUT_MAX_NODES = int(os.getenv("GRAPH_LAYOUT_MAX_NODES", "50000"))
+    GRAPH_LAYOUT_ITERATIONS = int(os.getenv("GRAPH_LAYOUT_ITERATIONS", "100"))
+    GRAPH_LAYOUT_MAX_ITERATIONS = int(os.getenv("GRAPH_LAYOUT_MAX_ITERATIONS", "1000"))
+    GRAPH_LAYOUT_EDGE_LENGTH = float(os.getenv("GRAPH_LAYOUT_EDGE_LENGTH", "150"))
+
+    TODO_PAGE_SIZE = int(os.getenv("TODO_PAGE_SIZE", "50"))
+    TODO_PAGE_MAX_SIZE = int(os.getenv("TODO_PAGE_MAX_SIZE", "200"))
+    VOTE_WRITE_BEHIND = os.getenv("VOTE_WRITE_BEHIND", "true").lower() == "true"
+    VOTE_FLUSH_INTERVAL_MS = int(os.getenv("VOTE_FLUSH_INTERVAL_MS", "200"))
+    TODO_HOT_DECAY_SECONDS = float(os.getenv("TODO_HOT_DECAY_SECONDS", "45000"))
+    # Rebuild from the table periodically to pick up writes made by other workers.
+    TODO_HOT_REBUILD_SECONDS = float(os.getenv("TODO_HOT_REBUILD_SECONDS", "300"))
+    TODO_HOT_MAX_K = int(os.getenv("TODO_HOT_MAX_K", "100"))
+    # GET /api/search: page sizes, how deep results go and the per-request
+    # statement deadline, which together bound a search's cost.
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+    SEARCH_PAGE_MAX_SIZE = int(os.getenv("SEARCH_PAGE_MAX_SIZE", "100"))
+    SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "1000"))
+    # SQLite ranks only the newest this many matches of each kind.
+    SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "10000"))
+    SEARCH_MAX_TERMS = int(os.getenv("SEARCH_MAX_TERMS", "8"))
+    SEARCH_TIMEOUT_MS = int(os.getenv("SEARCH_TIMEOUT_MS", "2000"))
+
+    # 0 sizes the pool to what chat admission lets run at once.
+    GEMINI_CLIENT_POOL_SIZE = int(os.getenv("GEMINI_CLIENT_POOL_SIZE", "0"))
+    GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL") or None
+    GEMINI_TIMEOUT_MS = int(os.getenv("GEMINI_TIMEOUT_MS", "60000"))
+    # memory (per process), sqlite (shared by workers on one host) or none.
+    CHAT_CACHE_BACKEND = os.getenv("CHAT_CACHE_BACKEND", "memory").lower()
+    CHAT_CACHE_PATH = os.getenv("CHAT_CACHE_PATH") or None
+    CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+    CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "1000"))
+    # Concurrent upstream calls per model; override per model with
+    # CHAT_MODEL_CONCURRENCY="gemini-3-pro-preview=2,gemini-2.0-flash=8".
+    CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "4"))
+    CHAT_MODEL_CONCURRENCY = os.getenv("CHAT_MODEL_CONCURRENCY", "")
+    CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "32"))
+    CHAT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "10"))
+
+    # ASGI mode (asgi.py): threads serving the Flask routes that have no async
+    # handler, and an optional explicit URL for the async engine.
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or None
@@ -1,5 +1,30 @@
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy import Select
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """Sends SELECTs to the ``replica`` bind while a request has opted in.
+
+    Views opt in with ``service.db_routing.replica_reads``; flushes and DML
+    always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and (clause is None or isinstance(clause, Select))
+            and has_request_context()
+            and g.get("db_use_replica")
+        ):
+            replica = self._db.engines.get("replica")
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
@@ -14,8 +14,13 @@ class EdgeStatus(enum.Enum):
 
 class Edge(db.Model):
     __tablename__ = "edges"
+    __table_args__ = (
+        db.Index("ix_edges_graph_id_from_node_id", "graph_id", "from_node_id"),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Denormalized from the endpoints so a graph's edges load without joining nodes.
+    graph_id = db.Column(db.String(36), db.ForeignKey("graphs.id"), nullable=False)
     from_node_id = db.Column(db.String(36), db.ForeignKey("nodes.id"), index=True, nullable=False)
     to_node_id = db.Column(db.String(36), db.ForeignKey("nodes.id"), index=True, nullable=False)
     edge_type_id = db.Column(db.String(36), db.ForeignKey("edge_types.id"), index=True)
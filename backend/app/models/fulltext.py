@@ -0,0 +1,46 @@
+"""Full-text indexes, per dialect.
+
+MySQL gets an InnoDB FULLTEXT index declared in the model's
+``__table_args__`` (ngram parser, so titles without spaces between words,
+e.g. Chinese, are tokenized too). SQLite has no FULLTEXT index; an
+external-content FTS5 table ``<table>_fts`` stands in, kept in sync by
+triggers. Either way the database maintains the index inside the writing
+transaction, for ORM and bulk Core statements alike.
+"""
+from sqlalchemy import DDL, event
+
+from ..extensions import db
+
+
+def fulltext_index(name: str, *columns: str):
+    return db.Index(name, *columns, mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql")
+
+
+def sqlite_fts5_ddl(table: str, columns: tuple[str, ...], rowid: str) -> list[str]:
+    """Statements creating ``<table>_fts`` over ``columns`` and its sync triggers.
+
+    ``rowid`` is the integer key the FTS rows share with ``table``; tables
+    without an integer primary key use their implicit ``rowid``, which
+    VACUUM may renumber (``INSERT INTO <table>_fts(<table>_fts) VALUES
+    ('rebuild')`` repairs the index afterwards).
+    """
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.{rowid}, {new});"
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.{rowid}, {old});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', content_rowid='{rowid}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        # Only changes to the indexed columns touch the index (not e.g. todo votes).
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def sqlite_fts5_mirror(table, columns: tuple[str, ...], rowid: str) -> None:
+    """Create (and drop) the SQLite FTS5 stand-in together with ``table``."""
+    for statement in sqlite_fts5_ddl(table.name, columns, rowid):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(table, "before_drop", DDL(f"DROP TABLE IF EXISTS {table.name}_fts").execute_if(dialect="sqlite"))
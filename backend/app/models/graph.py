@@ -25,6 +25,8 @@ class Graph(db.Model):
         nullable=False,
         default=Visibility.PRIVATE,
     )
+    # Bumped on every write through service.graphs; clients send it back as base_revision.
+    revision = db.Column(db.Integer, nullable=False, default=1)
     created_at = db.Column(db.DateTime, default=beijing_now, nullable=False)
     updated_at = db.Column(
         db.DateTime, default=beijing_now, onupdate=beijing_now, nullable=False
@@ -2,6 +2,7 @@ import enum
 import uuid
 from datetime import datetime, timedelta
 from ..extensions import db
+from .fulltext import fulltext_index, sqlite_fts5_mirror
 
 def beijing_now():
     return datetime.utcnow() + timedelta(hours=8)
@@ -16,6 +17,7 @@ class NodeType(enum.Enum):  #给“节点（node）”一个语义类型，用
 
 class Node(db.Model):
     __tablename__ = "nodes"
+    __table_args__ = (fulltext_index("ft_nodes_title_summary", "title", "summary"),)
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     graph_id = db.Column(db.String(36), db.ForeignKey("graphs.id"), index=True, nullable=False)
@@ -35,3 +37,6 @@ class Node(db.Model):
 
     graph = db.relationship("Graph", backref="nodes")
     layout = db.relationship("NodeLayout", backref="node", uselist=False, cascade="all, delete-orphan")
+
+
+sqlite_fts5_mirror(Node.__table__, ("title", "summary"), rowid="rowid")
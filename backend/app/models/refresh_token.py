@@ -4,12 +4,16 @@ from ..extensions import db
 
 class RefreshToken(db.Model):
     __tablename__ = "refresh_tokens"
+    # (user_id, revoked_at, expires_at) answers "active tokens of a user" from the
+    # index alone and also backs the user_id foreign key. expires_at and
+    # revoked_at are scanned by the retention pruner.
+    __table_args__ = (db.Index("ix_refresh_tokens_user_active", "user_id", "revoked_at", "expires_at"),)
 
-    id = db.Column(db.BigInteger, primary_key=True)
-    user_id = db.Column(db.BigInteger, db.ForeignKey("user.id"), nullable=False, index=True)
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey("user.id"), nullable=False)
     token_hash = db.Column(db.String(64), unique=True, nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
-    revoked_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     user_agent = db.Column(db.String(255))
     ip_address = db.Column(db.String(45))
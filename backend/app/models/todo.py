@@ -1,11 +1,16 @@
 from datetime import datetime
 from ..extensions import db
+from .fulltext import fulltext_index, sqlite_fts5_mirror
 
 
 class Todo(db.Model):
     __tablename__ = "todos"
+    __table_args__ = (
+        db.Index("ix_todos_created_at_id", "created_at", "id"),
+        fulltext_index("ft_todos_title_content", "title", "content"),
+    )
 
-    id = db.Column(db.BigInteger, primary_key=True)
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey("user.id"), index=True)
     title = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -17,3 +22,6 @@ class Todo(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
     user = db.relationship("User", backref="todos")
+
+
+sqlite_fts5_mirror(Todo.__table__, ("title", "content"), rowid="id")
@@ -1,11 +1,12 @@
 from datetime import datetime
-from werkzeug.security import check_password_hash, generate_password_hash
 from ..extensions import db
+from ..service.passwords import get_password_hasher
 
 class User(db.Model):
     __tablename__ = "user"
 
-    id = db.Column(db.BigInteger, primary_key=True)
+    # SQLite only autoincrements INTEGER primary keys (local/benchmark databases).
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
     nickname = db.Column(db.String(64), nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
@@ -18,11 +19,15 @@ class User(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
+    # Hashing goes through the shared process pool and may raise PasswordHasherBusy.
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_password_hasher().hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return get_password_hasher().verify(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return get_password_hasher().needs_rehash(self.password_hash)
 
     def is_locked(self) -> bool:
         return bool(self.locked_until and self.locked_until > datetime.utcnow())
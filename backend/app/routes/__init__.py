@@ -3,6 +3,7 @@ from .chat import bp as chat_bp
 from .auth import bp as auth_bp
 from .todos import bp as todos_bp
 from .graphs import bp as graphs_bp
+from .search import bp as search_bp
 
 def register_routes(app):
     app.register_blueprint(health_bp)
@@ -10,3 +11,4 @@ def register_routes(app):
     app.register_blueprint(auth_bp)
     app.register_blueprint(todos_bp)
     app.register_blueprint(graphs_bp)
+    app.register_blueprint(search_bp)
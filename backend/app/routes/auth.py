@@ -5,14 +5,34 @@ from datetime import datetime, timedelta
 
 import jwt
 from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import select, update
 from sqlalchemy.exc import IntegrityError
 
 from ..extensions import db
 from ..models import RefreshToken, User
+from ..service.auth import decode_token, resolve_access_user
+from ..service.db_routing import replica_reads
+from ..service.login_throttle import LoginThrottled, get_login_throttle
+from ..service.passwords import PasswordHasherBusy
 
 bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
 
+@bp.errorhandler(PasswordHasherBusy)
+def _password_hasher_busy(exc: PasswordHasherBusy):
+    db.session.rollback()
+    response = jsonify({"error": str(exc)})
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response, 503
+
+
+@bp.errorhandler(LoginThrottled)
+def _login_throttled(exc: LoginThrottled):
+    response = jsonify({"error": str(exc)})
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response, 429
+
+
 def _now() -> datetime:
     return datetime.utcnow()
 
@@ -34,14 +54,6 @@ def _encode_token(user_id: int, token_type: str, expires_in: timedelta) -> str:
     return jwt.encode(payload, current_app.config["JWT_SECRET"], algorithm=current_app.config["JWT_ALGORITHM"])
 
 
-def _decode_token(token: str) -> dict:
-    return jwt.decode(
-        token,
-        current_app.config["JWT_SECRET"],
-        algorithms=[current_app.config["JWT_ALGORITHM"]],
-    )
-
-
 def _issue_tokens(user: User, req):
     access_ttl = timedelta(minutes=current_app.config["JWT_ACCESS_TTL_MINUTES"])
     refresh_ttl = timedelta(days=current_app.config["JWT_REFRESH_TTL_DAYS"])
@@ -77,27 +89,11 @@ def _serialize_user(user: User):
     }
 
 
-def _get_bearer_token():
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        return None
-    return auth_header.split(" ", 1)[1].strip()
-
-
 def _require_access_user():
-    token = _get_bearer_token()
-    if not token:
-        return None, ("authorization required", 401)
-    try:
-        payload = _decode_token(token)
-    except jwt.ExpiredSignatureError:
-        return None, ("access token expired", 401)
-    except jwt.InvalidTokenError:
-        return None, ("invalid access token", 401)
-    if payload.get("type") != "access":
-        return None, ("invalid token type", 401)
-
-    user = User.query.get(int(payload.get("sub", 0)))
+    auth_user, error = resolve_access_user()
+    if error:
+        return None, error
+    user = db.session.get(User, auth_user.id)
     if not user or not user.is_active:
         return None, ("account not available", 403)
     return user, None
@@ -131,6 +127,26 @@ def register():
     return jsonify({"user": _serialize_user(user), **tokens}), 201
 
 
+def _record_failed_login(user: User, email: str, throttle) -> None:
+    """Count a failed login; with a throttle only the lockout itself is written."""
+    max_attempts = current_app.config["AUTH_MAX_FAILED_ATTEMPTS"]
+    if throttle:
+        failures = throttle.recent_attempts(email)
+        if failures < max_attempts:
+            return
+        throttle.locked_out()
+    else:
+        user.failed_login_count += 1
+        failures = user.failed_login_count
+        if failures < max_attempts:
+            db.session.commit()
+            return
+    lock_minutes = current_app.config["AUTH_LOCKOUT_MINUTES"]
+    user.failed_login_count = failures
+    user.locked_until = _now() + timedelta(minutes=lock_minutes)
+    db.session.commit()
+
+
 @bp.post("/login")
 def login():
     data = request.get_json(silent=True) or {}
@@ -140,6 +156,11 @@ def login():
     if not email or not password:
         return jsonify({"error": "email and password are required"}), 400
 
+    # Raises LoginThrottled before any DB read or password hash.
+    throttle = get_login_throttle()
+    if throttle:
+        throttle.attempt(email, request.remote_addr)
+
     user = User.query.filter_by(email=email).first()
     if user and not user.is_active:
         return jsonify({"error": "account is disabled"}), 403
@@ -148,14 +169,15 @@ def login():
 
     if not user or not user.check_password(password):
         if user:
-            user.failed_login_count += 1
-            max_attempts = current_app.config["AUTH_MAX_FAILED_ATTEMPTS"]
-            if user.failed_login_count >= max_attempts:
-                lock_minutes = current_app.config["AUTH_LOCKOUT_MINUTES"]
-                user.locked_until = _now() + timedelta(minutes=lock_minutes)
-            db.session.commit()
+            _record_failed_login(user, email, throttle)
         return jsonify({"error": "invalid credentials"}), 401
 
+    if throttle:
+        throttle.succeeded(email)
+    # Upgrade hashes made with older method/cost settings while we have the password.
+    if user.password_needs_rehash():
+        user.set_password(password)
+    # Plain assignments: unchanged values do not add columns to the UPDATE.
     user.failed_login_count = 0
     user.locked_until = None
     user.last_login_at = _now()
@@ -165,6 +187,37 @@ def login():
     return jsonify({"user": _serialize_user(user), **tokens})
 
 
+def _claim_refresh_token(token_hash: str, user_id: int) -> str | None:
+    """Revoke the presented refresh token if it is still live, without committing.
+
+    The conditional UPDATE is the only check: of two concurrent refreshes with
+    the same token exactly one matches ``revoked_at IS NULL``, so a token can
+    never be rotated twice. Returns None on success, else the error message;
+    the extra SELECT only runs on that failure path.
+    """
+    now = _now()
+    claimed = db.session.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_hash,
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed == 1:
+        return None
+    db.session.rollback()
+    token_entry = db.session.execute(
+        select(RefreshToken.revoked_at, RefreshToken.expires_at).where(RefreshToken.token_hash == token_hash)
+    ).first()
+    if token_entry and token_entry.revoked_at is None and token_entry.expires_at <= now:
+        return "refresh token expired"
+    return "refresh token revoked"
+
+
 @bp.post("/refresh")
 def refresh():
     data = request.get_json(silent=True) or {}
@@ -173,7 +226,7 @@ def refresh():
         return jsonify({"error": "refresh_token is required"}), 400
 
     try:
-        payload = _decode_token(refresh_token)
+        payload = decode_token(refresh_token)
     except jwt.ExpiredSignatureError:
         return jsonify({"error": "refresh token expired"}), 401
     except jwt.InvalidTokenError:
@@ -182,20 +235,17 @@ def refresh():
     if payload.get("type") != "refresh":
         return jsonify({"error": "invalid token type"}), 401
 
-    token_hash = _hash_token(refresh_token)
-    token_entry = RefreshToken.query.filter_by(token_hash=token_hash).first()
-    if not token_entry or token_entry.revoked_at:
-        return jsonify({"error": "refresh token revoked"}), 401
-    if token_entry.expires_at <= _now():
-        return jsonify({"error": "refresh token expired"}), 401
+    user_id = int(payload.get("sub", 0))
+    error = _claim_refresh_token(_hash_token(refresh_token), user_id)
+    if error:
+        return jsonify({"error": error}), 401
 
-    user = User.query.get(int(payload.get("sub", 0)))
+    user = db.session.get(User, user_id)
     if not user or not user.is_active:
+        db.session.rollback()
         return jsonify({"error": "account not available"}), 403
 
-    token_entry.revoked_at = _now()
-    db.session.commit()
-
+    # The new token is inserted in the same transaction as the revoke.
     tokens = _issue_tokens(user, request)
     return jsonify({"user": _serialize_user(user), **tokens})
 
@@ -217,6 +267,7 @@ def logout():
 
 
 @bp.get("/me")
+@replica_reads
 def me():
     user, error = _require_access_user()
     if error:
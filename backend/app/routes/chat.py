@@ -1,65 +1,166 @@
+import json
 import os
 
-from flask import Blueprint, jsonify, request
-from google import genai
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from ..service.auth import resolve_access_user
+from ..service.chat_admission import ChatOverloaded, get_chat_admission
+from ..service.chat_cache import chat_cache_key, get_chat_cache
+from ..service.llm import ALLOWED_MODELS, DEFAULT_MODEL, get_gemini_pool
 
 bp = Blueprint("chat", __name__, url_prefix="/api/chat")
 
-ALLOWED_MODELS = {
-    "gemini-3-pro-preview",
-    "gemini-2.5-flash",
-    "gemini-2.0-flash",
-}
-DEFAULT_MODEL = "gemini-2.0-flash"
+
+@bp.errorhandler(ChatOverloaded)
+def _chat_overloaded(exc: ChatOverloaded):
+    response = jsonify({"error": str(exc)})
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response, 429
 
 
-def _get_client():
-    api_key = os.getenv("GEMINI_API_KEY", "").strip()
-    if not api_key:
-        raise RuntimeError("GEMINI_API_KEY is not configured")
-    return genai.Client(api_key=api_key)
+def _client_key() -> str:
+    """Fair-queuing identity: the signed-in user, else the client address."""
+    user, _ = resolve_access_user()
+    return f"user:{user.id}" if user else f"ip:{request.remote_addr}"
 
 
-def _extract_text(response) -> str:
+def _extract_text(response, strip: bool = True) -> str:
     text = getattr(response, "text", None)
-    # print("Gemini Response Text:", text)
     if text:
-        return text.strip()
+        return text.strip() if strip else text
     try:
         candidates = getattr(response, "candidates", None) or []
         if not candidates:
             return ""
         parts = getattr(candidates[0].content, "parts", None) or []
-        return "".join(part.text for part in parts if getattr(part, "text", None)).strip()
+        text = "".join(part.text for part in parts if getattr(part, "text", None))
+        return text.strip() if strip else text
     except Exception:
         return ""
 
 
-@bp.post("")
-def chat():
-    data = request.get_json(silent=True) or {}
+def _validate_chat_request(data: dict) -> tuple[str | None, str | None, tuple[str, int] | None]:
+    """Return ``(prompt, model, None)`` or ``(None, None, (message, status))``."""
     prompt = (data.get("prompt") or "").strip()
     if not prompt:
-        return jsonify({"error": "prompt is required"}), 400
+        return None, None, ("prompt is required", 400)
 
     model = (data.get("model") or "").strip()
     if model and model not in ALLOWED_MODELS:
         allowed = ", ".join(sorted(ALLOWED_MODELS))
-        return jsonify({"error": f"model must be one of: {allowed}"}), 400
+        return None, None, (f"model must be one of: {allowed}", 400)
     if not model:
         model = os.getenv("GEMINI_MODEL", DEFAULT_MODEL).strip() or DEFAULT_MODEL
     if model not in ALLOWED_MODELS:
         allowed = ", ".join(sorted(ALLOWED_MODELS))
-        return jsonify({"error": f"configured model must be one of: {allowed}"}), 500
+        return None, None, (f"configured model must be one of: {allowed}", 500)
+    return prompt, model, None
+
+
+def _parse_chat_request():
+    """Return ``(prompt, model, None)`` or ``(None, None, error_response)``."""
+    prompt, model, error = _validate_chat_request(request.get_json(silent=True) or {})
+    if error:
+        message, status = error
+        return None, None, (jsonify({"error": message}), status)
+    return prompt, model, None
+
+
+def _sse(data: dict, event: str | None = None) -> str:
+    payload = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{payload}" if event else payload
+
+
+def _sse_response(events, cache_outcome: str) -> Response:
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        # Disable proxy buffering so tokens reach the browser as they arrive.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Cache": cache_outcome},
+    )
+
+
+@bp.post("")
+def chat():
+    prompt, model, error = _parse_chat_request()
+    if error:
+        return error
+
+    client_key = _client_key()
+
+    def generate() -> str:
+        with get_chat_admission().admit(model, client_key), get_gemini_pool().client() as client:
+            response = client.models.generate_content(model=model, contents=prompt)
+        return _extract_text(response)
+
+    cache = get_chat_cache()
     try:
-        client = _get_client()
-        response = client.models.generate_content(model=model, contents=prompt)
-        # print("Selected Model:", model)
-        text = _extract_text(response)
+        if cache is None:
+            text, outcome = generate(), "bypass"
+        else:
+            text, outcome = cache.get_or_compute(chat_cache_key(prompt, model), generate)
+    except ChatOverloaded:
+        raise
     except Exception as exc:
         return jsonify({"error": f"Gemini request failed: {exc}"}), 500
 
     if not text:
         return jsonify({"error": "Gemini returned empty response"}), 500
 
-    return jsonify({"text": text})
+    response = jsonify({"text": text})
+    response.headers["X-Cache"] = outcome.upper()
+    return response
+
+
+@bp.post("/stream")
+def chat_stream():
+    """Forward generated text to the browser as server-sent events.
+
+    Emits ``data: {"text": ...}`` per chunk, then ``event: done`` (or
+    ``event: error`` if the upstream call fails mid-stream).
+    """
+    prompt, model, error = _parse_chat_request()
+    if error:
+        return error
+    cache = get_chat_cache()
+    key = chat_cache_key(prompt, model)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return _sse_response(iter([_sse({"text": cached}), _sse({}, event="done")]), "HIT")
+    try:
+        pool = get_gemini_pool()
+    except Exception as exc:
+        return jsonify({"error": f"Gemini request failed: {exc}"}), 500
+    # Admit and check out a client before the response starts, so overload
+    # can still be a plain 429.
+    ticket = get_chat_admission().acquire(model, _client_key())
+    try:
+        lease = pool.checkout()
+    except BaseException:
+        ticket.release()
+        raise
+
+    def generate():
+        pieces = []
+        try:
+            for chunk in lease.client.models.generate_content_stream(model=model, contents=prompt):
+                text = _extract_text(chunk, strip=False)
+                if text:
+                    pieces.append(text)
+                    yield _sse({"text": text})
+        except Exception as exc:
+            yield _sse({"error": f"Gemini request failed: {exc}"}, event="error")
+            return
+        finally:
+            lease.release()
+            ticket.release()
+        if cache is not None:
+            # Only completed streams are cached; a client disconnect stops the generator first.
+            cache.set(key, "".join(pieces).strip())
+        yield _sse({}, event="done")
+
+    response = _sse_response(stream_with_context(generate()), "MISS" if cache is not None else "BYPASS")
+    # Covers clients that disconnect before the generator starts.
+    response.call_on_close(lease.release)
+    response.call_on_close(ticket.release)
+    return response
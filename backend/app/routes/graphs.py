@@ -1,66 +1,66 @@
-from flask import Blueprint, abort, current_app, jsonify, request
-import jwt
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context, url_for
 from sqlalchemy import desc
-from ..models import Edge, Graph, Node, User
+from ..models import Graph
+from ..service.auth import require_user
+from ..service.db_routing import replica_reads
 from ..service.graphs import (
+    GRAPH_FORMATS,
+    GRAPH_STREAM_MODES,
     GraphServiceError,
     create_graph as create_graph_service,
-    serialize_graph,
+    encode_graph_document,
+    get_graph_revision,
+    get_owned_graph,
+    iter_graph_json,
+    iter_graph_ndjson,
+    load_graph_rows,
+    patch_graph as patch_graph_service,
+    serialize_graph_rows,
 )
+from ..service.graph_cache import get_graph_snapshot_cache
+from ..service.graph_layout import LayoutBusy, get_layout_job, start_layout
+from ..service.graph_traversal import get_graph_adjacency, parse_traversal_filters
+from ..service.graph_viewport import LOD_FIELDS, get_graph_spatial_index, lod_for_zoom, parse_bbox
 
 bp = Blueprint("graphs", __name__, url_prefix="/api/graphs")
 
+# ETag suffix per Content-Encoding of a cached graph document.
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
 
-def _get_bearer_token():
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        return None
-    return auth_header.split(" ", 1)[1].strip()
 
-
-def _decode_token(token: str) -> dict:
-    return jwt.decode(
-        token,
-        current_app.config["JWT_SECRET"],
-        algorithms=[current_app.config["JWT_ALGORITHM"]],
-    )
+@bp.errorhandler(LayoutBusy)
+def _layout_busy(exc: LayoutBusy):
+    response = jsonify({"error": str(exc)})
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response, 503
 
 
-def _require_user() -> User:
-    token = _get_bearer_token()
-    if not token:
-        abort(401, description="authorization required")
+@bp.post("")
+def create_graph():
+    user = require_user()
+    data = request.get_json() or {}
     try:
-        payload = _decode_token(token)
-    except jwt.ExpiredSignatureError:
-        abort(401, description="access token expired")
-    except jwt.InvalidTokenError:
-        abort(401, description="invalid access token")
-
-    if payload.get("type") != "access":
-        abort(401, description="invalid token type")
-
-    user = User.query.get(int(payload.get("sub", 0)))
-    if not user or not user.is_active:
-        abort(403, description="account not available")
-    return user
+        graph, node_rows, edge_rows = create_graph_service(user, data)
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+    return jsonify(serialize_graph_rows(graph, node_rows, edge_rows)), 201
 
 
-@bp.post("")
-def create_graph():
-    user = _require_user()
+@bp.patch("/<graph_id>")
+def patch_graph(graph_id: str):
+    user = require_user()
     data = request.get_json() or {}
-    print(data)
     try:
-        graph, created_nodes, created_edges = create_graph_service(user, data)
+        changes = patch_graph_service(user, graph_id, data)
     except GraphServiceError as exc:
         abort(exc.status_code, description=exc.message)
-    return jsonify(serialize_graph(graph, created_nodes, created_edges)), 201
+    return jsonify(changes)
 
 
 @bp.get("/mine")
+@replica_reads
 def list_my_graphs():
-    user = _require_user()
+    user = require_user()
     graphs = (
         Graph.query.filter_by(owner_user_id=user.id)
         .order_by(desc(Graph.updated_at))
@@ -79,17 +79,230 @@ def list_my_graphs():
     return jsonify(payload)
 
 
+def _with_etag(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
 @bp.get("/<graph_id>")
+@replica_reads
 def get_graph(graph_id: str):
-    user = _require_user()
-    graph = Graph.query.filter_by(id=graph_id, owner_user_id=user.id).first()
-    if not graph:
-        abort(404, description="graph not found")
-
-    nodes = Node.query.filter_by(graph_id=graph.id).all()
-    edges = (
-        Edge.query.join(Node, Edge.from_node_id == Node.id)
-        .filter(Node.graph_id == graph.id)
-        .all()
+    user = require_user()
+    try:
+        revision = get_graph_revision(user, graph_id)
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+
+    # ?stream=ndjson (or Accept: application/x-ndjson) emits one line per entity;
+    # ?stream=1|true sends the regular document as a chunked response.
+    # ?format=columnar|msgpack (or Accept: application/msgpack) picks a compact
+    # encoding of the whole document. Each representation and Content-Encoding
+    # gets its own strong ETag.
+    stream = request.args.get("stream", "").strip().lower()
+    if stream and stream not in GRAPH_STREAM_MODES:
+        abort(400, description=f"stream must be {', '.join(GRAPH_STREAM_MODES)}")
+    best_type = request.accept_mimetypes.best
+    fmt = (request.args.get("format") or ("msgpack" if best_type == "application/msgpack" else "json")).strip().lower()
+    if fmt not in GRAPH_FORMATS:
+        abort(400, description=f"format must be {', '.join(GRAPH_FORMATS)}")
+    if stream == "ndjson" or best_type == "application/x-ndjson":
+        variant = ".ndjson"
+    elif stream:
+        variant = ".stream"
+    else:
+        variant = "" if fmt == "json" else f".{fmt}"
+    if variant in (".ndjson", ".stream") and fmt != "json":
+        abort(400, description="format is only available without stream")
+    cache = get_graph_snapshot_cache()
+    encoding = None
+    if variant not in (".ndjson", ".stream") and cache.compressor:
+        encoding = cache.compressor.negotiate(request.accept_encodings)
+
+    etag = f"{graph_id}.{revision}{variant}{ENCODING_SUFFIXES.get(encoding, '')}"
+    # Weak comparison, as If-None-Match calls for: compressed streams carry
+    # weak ETags (service/compression.py).
+    if request.if_none_match.contains_weak(etag):
+        return _with_etag(Response(status=304), etag)
+
+    if variant in (".ndjson", ".stream"):
+        try:
+            graph = get_owned_graph(user, graph_id)
+        except GraphServiceError as exc:
+            abort(exc.status_code, description=exc.message)
+        chunk_size = current_app.config["GRAPH_STREAM_CHUNK_SIZE"]
+        if variant == ".ndjson":
+            response = Response(
+                stream_with_context(iter_graph_ndjson(graph, chunk_size)),
+                mimetype="application/x-ndjson",
+            )
+        else:
+            response = Response(
+                stream_with_context(iter_graph_json(graph, chunk_size)),
+                mimetype="application/json",
+            )
+        return _with_etag(response, f"{graph_id}.{graph.revision}{variant}")
+
+    key = graph_id if fmt == "json" else f"{graph_id}.{fmt}"
+    snapshot = cache.get(key, revision)
+    if snapshot is None:
+        try:
+            # Deleted since the revision read: still a 404.
+            graph = get_owned_graph(user, graph_id)
+            node_rows, edge_rows = load_graph_rows(graph.id)
+            body = encode_graph_document(graph, node_rows, edge_rows, fmt)
+        except GraphServiceError as exc:
+            abort(exc.status_code, description=exc.message)
+        snapshot = cache.put(key, graph.revision, body)
+
+    if encoding in snapshot.encoded:
+        response = Response(snapshot.encoded[encoding], mimetype=GRAPH_FORMATS[fmt])
+        response.headers["Content-Encoding"] = encoding
+        variant += ENCODING_SUFFIXES[encoding]
+    else:
+        response = Response(snapshot.body, mimetype=GRAPH_FORMATS[fmt])
+    response.vary.add("Accept-Encoding")
+    if not request.args.get("format"):
+        response.vary.add("Accept")
+    return _with_etag(response, f"{graph_id}.{snapshot.revision}{variant}")
+
+
+def _traversal_args(graph_id: str):
+    """Ownership check, adjacency for the current revision, and the shared filters."""
+    user = require_user()
+    try:
+        revision = get_graph_revision(user, graph_id)
+        direction, statuses = parse_traversal_filters(request.args.get("direction"), request.args.get("status"))
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+    limit = request.args.get("limit", default=current_app.config["GRAPH_TRAVERSAL_MAX_RESULTS"], type=int)
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    limit = min(limit, current_app.config["GRAPH_TRAVERSAL_MAX_RESULTS"])
+    return get_graph_adjacency(graph_id, revision), direction, statuses, limit
+
+
+def _required_arg(name: str) -> str:
+    value = (request.args.get(name) or "").strip()
+    if not value:
+        abort(400, description=f"{name} is required")
+    return value
+
+
+def _k_arg() -> int:
+    k = request.args.get("k", default=2, type=int)
+    max_depth = current_app.config["GRAPH_TRAVERSAL_MAX_DEPTH"]
+    if k < 1 or k > max_depth:
+        abort(400, description=f"k must be between 1 and {max_depth}")
+    return k
+
+
+@bp.get("/<graph_id>/neighbors")
+@replica_reads
+def graph_neighbors(graph_id: str):
+    """Direct neighbors of ``?node=``; ``?direction=out|in|both``, ``?status=active,none,...``."""
+    adjacency, direction, statuses, limit = _traversal_args(graph_id)
+    try:
+        result = adjacency.neighbors(_required_arg("node"), direction, statuses, limit)
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+    return jsonify({"revision": adjacency.revision, **result})
+
+
+@bp.get("/<graph_id>/khop")
+@replica_reads
+def graph_k_hop(graph_id: str):
+    """Nodes within ``?k=`` hops of ``?node=``, each with its distance."""
+    adjacency, direction, statuses, limit = _traversal_args(graph_id)
+    try:
+        result = adjacency.k_hop(_required_arg("node"), _k_arg(), direction, statuses, limit)
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+    return jsonify({"revision": adjacency.revision, **result})
+
+
+@bp.get("/<graph_id>/path")
+@replica_reads
+def graph_shortest_path(graph_id: str):
+    """Fewest-hops path from ``?from=`` to ``?to=`` (``path`` is null when unreachable).
+
+    ``?max_depth=`` bounds the search.
+    """
+    adjacency, direction, statuses, _ = _traversal_args(graph_id)
+    # Unbounded by default: a breadth-first search touches each edge at most once.
+    max_depth = request.args.get("max_depth", type=int)
+    if max_depth is not None and max_depth < 1:
+        abort(400, description="max_depth must be a positive integer")
+    try:
+        result = adjacency.shortest_path(
+            _required_arg("from"), _required_arg("to"), direction, statuses, max_depth
+        )
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+    return jsonify({"revision": adjacency.revision, **result})
+
+
+@bp.get("/<graph_id>/viewport")
+@replica_reads
+def graph_viewport(graph_id: str):
+    """Nodes inside ``?bbox=min_x,min_y,max_x,max_y`` and the edges touching them.
+
+    ``?zoom=`` picks the level of detail (``?lod=full|label|shape`` overrides
+    it); at most GRAPH_VIEWPORT_MAX_NODES nodes (or ``?limit=``) come back.
+    """
+    user = require_user()
+    try:
+        revision = get_graph_revision(user, graph_id)
+        bbox = parse_bbox(request.args.get("bbox"))
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+    zoom = request.args.get("zoom", default=1.0, type=float)
+    if not zoom > 0 or zoom == float("inf"):
+        abort(400, description="zoom must be a positive number")
+    lod = request.args.get("lod") or lod_for_zoom(zoom)
+    if lod not in LOD_FIELDS:
+        abort(400, description="lod must be full, label or shape")
+    max_nodes = current_app.config["GRAPH_VIEWPORT_MAX_NODES"]
+    limit = request.args.get("limit", default=max_nodes, type=int)
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    spatial = get_graph_spatial_index(graph_id, revision)
+    return jsonify(
+        {
+            "graph_id": graph_id,
+            "revision": spatial.revision,
+            "bbox": list(bbox),
+            "zoom": zoom,
+            **spatial.query(bbox, lod, min(limit, max_nodes)),
+        }
     )
-    return jsonify(serialize_graph(graph, nodes, edges))
+
+
+@bp.post("/<graph_id>/layout")
+def start_graph_layout(graph_id: str):
+    """Queue a server-side auto-layout; poll the returned job (``Location``) for progress.
+
+    Body (all optional): ``iterations``, ``edge_length``, ``seed`` and
+    ``mode`` (``full`` places every unpinned node from scratch, ``refine``
+    starts from the current positions). If the graph already has a job
+    queued or running, that job is returned instead.
+    """
+    user = require_user()
+    data = request.get_json(silent=True) or {}
+    try:
+        job, created = start_layout(user, graph_id, data)
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+    response = jsonify(job.to_dict())
+    response.headers["Location"] = url_for(".get_graph_layout_job", graph_id=graph_id, job_id=job.id)
+    return response, 202 if created else 200
+
+
+@bp.get("/<graph_id>/layout/<job_id>")
+def get_graph_layout_job(graph_id: str, job_id: str):
+    user = require_user()
+    try:
+        job = get_layout_job(user, graph_id, job_id)
+    except GraphServiceError as exc:
+        abort(exc.status_code, description=exc.message)
+    return jsonify(job.to_dict())
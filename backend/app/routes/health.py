@@ -1,7 +1,60 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, current_app, jsonify
+
+from ..service.auth import get_auth_cache
+from ..service.chat_admission import get_chat_admission
+from ..service.chat_cache import get_chat_cache
+from ..service.compression import get_response_compressor
+from ..service.db_pool import pool_stats
+from ..service.db_routing import get_recent_writers
+from ..service.graph_cache import get_graph_snapshot_cache
+from ..service.graph_layout import get_layout_runner
+from ..service.graph_traversal import get_graph_adjacency_cache
+from ..service.graph_viewport import get_graph_spatial_index_cache
+from ..service.instrumentation import render_metrics
+from ..service.login_throttle import get_login_throttle
+from ..service.passwords import get_password_hasher
+from ..service.todo_ranking import get_hot_todo_index
+from ..service.token_retention import get_token_pruner
+from ..service.votes import get_vote_aggregator
 
 bp = Blueprint("health", __name__)
 
 @bp.get("/health")
 def health():
     return jsonify({"status": "ok"})
+
+
+@bp.get("/health/stats")
+def stats():
+    # The Gemini pool is only built on first chat request (it needs an API key).
+    gemini_pool = current_app.extensions.get("gemini_pool")
+    chat_cache = get_chat_cache()
+    login_throttle = get_login_throttle()
+    return jsonify(
+        {
+            "auth_cache": get_auth_cache().stats(),
+            "password_hasher": get_password_hasher().stats(),
+            "login_throttle": login_throttle.stats() if login_throttle else None,
+            "votes": get_vote_aggregator().stats(),
+            "hot_todos": get_hot_todo_index().stats(),
+            "compression": get_response_compressor().stats(),
+            "graph_snapshot_cache": get_graph_snapshot_cache().stats(),
+            "graph_adjacency_cache": get_graph_adjacency_cache().stats(),
+            "graph_spatial_index_cache": get_graph_spatial_index_cache().stats(),
+            "graph_layout": get_layout_runner().stats(),
+            "gemini_pool": gemini_pool.stats() if gemini_pool else None,
+            "chat_cache": chat_cache.stats() if chat_cache else None,
+            "chat_admission": get_chat_admission().stats(),
+            "db_pools": pool_stats(current_app),
+            "replica_guard": get_recent_writers().stats(),
+            "token_pruner": get_token_pruner().stats(),
+        }
+    )
+
+
+@bp.get("/metrics")
+def metrics():
+    return Response(
+        render_metrics(current_app, pool_stats(current_app)),
+        mimetype="text/plain; version=0.0.4",
+    )
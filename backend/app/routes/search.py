@@ -0,0 +1,40 @@
+from flask import Blueprint, abort, current_app, jsonify, request
+
+from ..service.auth import require_user
+from ..service.db_routing import replica_reads
+from ..service.search import SearchError, decode_cursor, encode_cursor, parse_terms, parse_types, search as search_service
+
+bp = Blueprint("search", __name__, url_prefix="/api/search")
+
+
+@bp.get("")
+@replica_reads
+def search():
+    """Ranked full-text search over todos and the caller's graph nodes.
+
+    Every word of ``?q=`` must match; there is no prefix matching (whole
+    words on SQLite, substrings via the ngram parser on MySQL). ``?types=``
+    narrows to ``todo`` and/or ``node``, ``?graph_id=`` limits nodes to one
+    graph. Pages like GET /api/todos: ``?limit=``, with the next page's
+    cursor in the ``X-Next-Cursor`` header.
+    """
+    user = require_user()
+    config = current_app.config
+    limit = request.args.get("limit", default=config["SEARCH_PAGE_SIZE"], type=int)
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    cursor = request.args.get("cursor")
+    try:
+        terms = parse_terms(request.args.get("q"))
+        types = parse_types(request.args.get("types"))
+        offset = decode_cursor(cursor) if cursor else 0
+        results, next_offset = search_service(
+            user, terms, types, request.args.get("graph_id"), offset, min(limit, config["SEARCH_PAGE_MAX_SIZE"])
+        )
+    except SearchError as exc:
+        abort(exc.status_code, description=exc.message)
+
+    response = jsonify(results)
+    if next_offset is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_offset)
+    return response
@@ -1,76 +1,148 @@
-import jwt
+import base64
+import json
+from datetime import datetime
+
 from flask import Blueprint, jsonify, request, abort, current_app
-from sqlalchemy import desc
+from sqlalchemy import desc, or_
+from sqlalchemy.orm import load_only
 from ..extensions import db
-from ..models import Todo, User
+from ..models import Todo
+from ..service.auth import require_user
+from ..service.db_routing import replica_reads
+from ..service.todo_ranking import get_hot_todo_index
+from ..service.votes import get_vote_aggregator
 
 bp = Blueprint("todos", __name__, url_prefix="/api/todos")
 
 VALID_STATUSES = {"Pending", "In Progress", "Completed"}
 
+SERIALIZED_FIELDS = {
+    "id": lambda todo: todo.id,
+    "user_id": lambda todo: todo.user_id,
+    "title": lambda todo: todo.title,
+    "content": lambda todo: todo.content,
+    "status": lambda todo: todo.status,
+    "author": lambda todo: todo.author,
+    "heat": lambda todo: max(0, todo.heat + get_vote_aggregator().pending(todo.id)),
+    "created_at": lambda todo: todo.created_at.isoformat(),
+    "updated_at": lambda todo: todo.updated_at.isoformat(),
+}
 
-def _get_bearer_token():
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
-        return None
-    return auth_header.split(" ", 1)[1].strip()
 
+def serialize(todo: Todo, fields=SERIALIZED_FIELDS):
+    return {field: SERIALIZED_FIELDS[field](todo) for field in fields}
+
+
+def _encode_cursor(todo: Todo) -> str:
+    raw = json.dumps([todo.created_at.isoformat(), todo.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
-def _decode_token(token: str) -> dict:
-    return jwt.decode(
-        token,
-        current_app.config["JWT_SECRET"],
-        algorithms=[current_app.config["JWT_ALGORITHM"]],
-    )
 
+# Bounds a cursor must stay within: BIGINT ids, MySQL DATETIME values.
+_MAX_TODO_ID = 2**63 - 1
+_MIN_CURSOR_TIME = datetime(1000, 1, 1)
 
-def _require_user() -> User:
-    token = _get_bearer_token()
-    if not token:
-        abort(401, description="authorization required")
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
     try:
-        payload = _decode_token(token)
-    except jwt.ExpiredSignatureError:
-        abort(401, description="access token expired")
-    except jwt.InvalidTokenError:
-        abort(401, description="invalid access token")
-
-    if payload.get("type") != "access":
-        abort(401, description="invalid token type")
-
-    user = User.query.get(int(payload.get("sub", 0)))
-    if not user or not user.is_active:
-        abort(403, description="account not available")
-    return user
-
-
-def serialize(todo: Todo):
-    return {
-        "id": todo.id,
-        "user_id": todo.user_id,
-        "title": todo.title,
-        "content": todo.content,
-        "status": todo.status,
-        "author": todo.author,
-        "heat": todo.heat,
-        "created_at": todo.created_at.isoformat(),
-        "updated_at": todo.updated_at.isoformat(),
-    }
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, todo_id = json.loads(raw)
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError, OverflowError):
+        abort(400, description="cursor is invalid")
+    # _encode_cursor writes a naive timestamp and an integer id; reject anything else.
+    if (
+        created_at.tzinfo is not None
+        or created_at < _MIN_CURSOR_TIME
+        or type(todo_id) is not int
+        or not 1 <= todo_id <= _MAX_TODO_ID
+    ):
+        abort(400, description="cursor is invalid")
+    return created_at, todo_id
+
+
+def _parse_fields(raw: str | None) -> tuple[str, ...] | None:
+    if not raw:
+        return None
+    fields = tuple(dict.fromkeys(field.strip() for field in raw.split(",") if field.strip()))
+    unknown = [field for field in fields if field not in SERIALIZED_FIELDS]
+    if unknown or not fields:
+        abort(400, description=f"fields must be a subset of {', '.join(SERIALIZED_FIELDS)}")
+    return fields
 
 
 @bp.get("")
+@replica_reads
 def list_todos():
-    limit = request.args.get("limit", type=int)
-    query = Todo.query.order_by(desc(Todo.created_at))
-    if limit:
-        query = query.limit(limit)
-    todos = query.all()
-    return jsonify([serialize(t) for t in todos])
+    """List todos newest first, one page at a time.
+
+    Pages hold ``?limit=`` rows (default ``TODO_PAGE_SIZE``, capped at
+    ``TODO_PAGE_MAX_SIZE``) and follow a keyset on (created_at, id): when more rows
+    exist the opaque cursor for the next page is returned in the ``X-Next-Cursor``
+    header and is passed back as ``?cursor=``. ``?fields=`` restricts the serialized
+    (and loaded) columns, e.g. ``fields=id,title,heat`` skips the ``content`` TEXT column.
+    """
+    limit = request.args.get("limit", default=current_app.config["TODO_PAGE_SIZE"], type=int)
+    if limit < 1:
+        abort(400, description="limit must be a positive integer")
+    limit = min(limit, current_app.config["TODO_PAGE_MAX_SIZE"])
+    cursor = request.args.get("cursor")
+    fields = _parse_fields(request.args.get("fields"))
+
+    query = Todo.query.order_by(desc(Todo.created_at), desc(Todo.id))
+    if fields:
+        columns = {"id", "created_at", *fields}
+        query = query.options(load_only(*(getattr(Todo, column) for column in columns)))
+    if cursor:
+        created_at, todo_id = _decode_cursor(cursor)
+        # The leading created_at bound gives the index a range to seek into;
+        # the OR only filters the ties on created_at.
+        query = query.filter(
+            Todo.created_at <= created_at,
+            or_(Todo.created_at < created_at, Todo.id < todo_id),
+        )
+    todos = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(todos) > limit:
+        todos = todos[:limit]
+        next_cursor = _encode_cursor(todos[-1])
+
+    response = jsonify([serialize(t, fields or SERIALIZED_FIELDS) for t in todos])
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+@bp.get("/hot")
+def list_hot_todos():
+    """Top ``?k=`` todos by recency-decayed heat, served from the in-process index."""
+    k = request.args.get("k", default=10, type=int)
+    if k < 1:
+        abort(400, description="k must be a positive integer")
+    k = min(k, current_app.config["TODO_HOT_MAX_K"])
+    fields = _parse_fields(request.args.get("fields"))
+
+    index = get_hot_todo_index()
+    index.ensure_current(get_vote_aggregator().pending)
+    todo_ids = index.top(k)
+
+    query = Todo.query.filter(Todo.id.in_(todo_ids))
+    if fields:
+        query = query.options(load_only(*(getattr(Todo, field) for field in {"id", *fields})))
+    todos_by_id = {todo.id: todo for todo in query.all()} if todo_ids else {}
+    return jsonify(
+        [
+            serialize(todos_by_id[todo_id], fields or SERIALIZED_FIELDS)
+            for todo_id in todo_ids
+            if todo_id in todos_by_id
+        ]
+    )
 
 
 @bp.get("/mine")
 def list_my_todos():
-    user = _require_user()
+    user = require_user()
     todos = (
         Todo.query.filter_by(user_id=user.id)
         .order_by(desc(Todo.created_at))
@@ -81,7 +153,7 @@ def list_my_todos():
 
 @bp.post("")
 def create_todo():
-    user = _require_user()
+    user = require_user()
     data = request.get_json() or {}
     title = (data.get("title") or "").strip()
     content = (data.get("content") or "").strip()
@@ -101,6 +173,7 @@ def create_todo():
     )
     db.session.add(todo)
     db.session.commit()
+    get_hot_todo_index().upsert(todo.id, todo.heat, todo.created_at)
     return jsonify(serialize(todo)), 201
 
 
@@ -115,18 +188,27 @@ def vote(todo_id: int):
     if delta not in (-1, 1):
         abort(400, description="delta must be -1 or 1")
 
-    todo = Todo.query.get(todo_id)
+    todo = db.session.get(Todo, todo_id)
     if not todo:
         abort(404, description="Todo not found")
 
-    todo.heat = max(0, todo.heat + delta)
-    db.session.commit()
+    # The delta is applied by the write-behind aggregator; serialize() already
+    # adds pending deltas to the persisted heat.
+    aggregator = get_vote_aggregator()
+    aggregator.record(todo.id, delta)
+    get_hot_todo_index().adjust(todo.id, delta)
+    if not aggregator.write_behind:
+        # The flush committed on its own connection. End this session's
+        # transaction first, or under REPEATABLE READ the refresh re-reads the
+        # snapshot taken before the vote.
+        db.session.commit()
+        db.session.refresh(todo)
     return jsonify(serialize(todo))
 
 
 @bp.patch("/<int:todo_id>")
 def update_todo(todo_id: int):
-    user = _require_user()
+    user = require_user()
     data = request.get_json() or {}
     title = data.get("title")
     content = data.get("content")
@@ -134,7 +216,7 @@ def update_todo(todo_id: int):
     if status and status not in VALID_STATUSES:
         abort(400, description=f"status must be one of {', '.join(VALID_STATUSES)}")
 
-    todo = Todo.query.get(todo_id)
+    todo = db.session.get(Todo, todo_id)
     if not todo:
         abort(404, description="Todo not found")
     if todo.user_id != user.id:
@@ -158,8 +240,8 @@ def update_todo(todo_id: int):
 
 @bp.delete("/<int:todo_id>")
 def delete_todo(todo_id: int):
-    user = _require_user()
-    todo = Todo.query.get(todo_id)
+    user = require_user()
+    todo = db.session.get(Todo, todo_id)
     if not todo:
         abort(404, description="Todo not found")
     if todo.user_id != user.id:
@@ -167,4 +249,6 @@ def delete_todo(todo_id: int):
 
     db.session.delete(todo)
     db.session.commit()
+    get_vote_aggregator().discard(todo_id)
+    get_hot_todo_index().remove(todo_id)
     return jsonify({"ok": True})
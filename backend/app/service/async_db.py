@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+
+from flask import current_app
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+_init_lock = threading.Lock()
+# Async driver used in place of each sync driver for the ASGI handlers.
+_ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str | URL) -> URL:
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=_ASYNC_DRIVERS[backend])
+
+
+def get_async_engine(bind: str | None = None) -> AsyncEngine:
+    """Engine for the ASGI handlers, on ``ASYNC_DATABASE_URL`` or the sync URL's async twin.
+
+    ``bind="replica"`` gives the async twin of the replica bind.
+    """
+    key = "async_engine" if bind is None else f"async_engine.{bind}"
+    engine = current_app.extensions.get(key)
+    if engine is None:
+        with _init_lock:
+            engine = current_app.extensions.get(key)
+            if engine is None:
+                config = current_app.config
+                if bind is None:
+                    url = config["ASYNC_DATABASE_URL"] or async_database_url(config["SQLALCHEMY_DATABASE_URI"])
+                    options = dict(config["SQLALCHEMY_ENGINE_OPTIONS"])
+                else:
+                    options = dict(config["SQLALCHEMY_BINDS"][bind])
+                    url = async_database_url(options.pop("url"))
+                # asyncio engines need their own (async-adapted) queue pool.
+                options.pop("poolclass", None)
+                engine = create_async_engine(url, **options)
+                current_app.extensions[key] = engine
+    return engine
+
+
+async def dispose_async_engines(app) -> None:
+    for key, engine in list(app.extensions.items()):
+        if key == "async_engine" or key.startswith("async_engine."):
+            await engine.dispose()
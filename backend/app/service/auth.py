@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import jwt
+from flask import abort, current_app, has_app_context, request
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import User
+from .async_db import get_async_engine
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """The user fields request handlers need, cached instead of re-SELECTed."""
+
+    id: int
+    email: str
+    nickname: str
+    is_active: bool
+
+
+class AccessTokenCache:
+    """Bounded TTL cache of verified access tokens and user activity state.
+
+    Verified token claims are kept per token (with their ``jti``) and user
+    snapshots per user id, both for at most ``ttl`` seconds, so a warm request
+    needs neither a signature check nor a ``user`` SELECT. Entries for a user
+    are dropped once a deactivation or password change commits; other worker
+    processes catch up within ``ttl``. A user row read before an invalidation
+    is not cached after it (see ``generation``).
+    """
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._tokens: OrderedDict[str, tuple[str, int, float]] = OrderedDict()
+        self._users: OrderedDict[int, tuple[AuthUser, float]] = OrderedDict()
+        self._tokens_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation.
+        self._generation = 0
+        self.token_hits = 0
+        self.token_misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self.invalidations = 0
+
+    def get_token(self, token: str) -> int | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None or entry[2] <= now:
+                self.token_misses += 1
+                return None
+            self._tokens.move_to_end(token)
+            self.token_hits += 1
+            return entry[1]
+
+    def put_token(self, token: str, payload: dict) -> None:
+        user_id = int(payload.get("sub", 0))
+        # Never outlive the token itself.
+        remaining = payload.get("exp", 0) - time.time()
+        expires_at = time.monotonic() + min(self.ttl, remaining)
+        with self._lock:
+            self._tokens[token] = (payload.get("jti", ""), user_id, expires_at)
+            self._tokens_by_user.setdefault(user_id, set()).add(token)
+            while len(self._tokens) > self.max_entries:
+                evicted, (_, evicted_user, _) = self._tokens.popitem(last=False)
+                tokens = self._tokens_by_user.get(evicted_user)
+                if tokens is not None:
+                    tokens.discard(evicted)
+                    if not tokens:
+                        del self._tokens_by_user[evicted_user]
+
+    def get_user(self, user_id: int) -> AuthUser | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[1] <= now:
+                self.user_misses += 1
+                return None
+            self._users.move_to_end(user_id)
+            self.user_hits += 1
+            return entry[0]
+
+    @property
+    def generation(self) -> int:
+        """Read before loading a user row and pass to ``put_user``."""
+        return self._generation
+
+    def put_user(self, user: AuthUser, generation: int | None = None) -> None:
+        with self._lock:
+            # The row may predate an invalidation that committed meanwhile.
+            if generation is not None and generation != self._generation:
+                return
+            self._users[user.id] = (user, time.monotonic() + self.ttl)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+            for token in self._tokens_by_user.pop(user_id, set()):
+                self._tokens.pop(token, None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        token_lookups = self.token_hits + self.token_misses
+        user_lookups = self.user_hits + self.user_misses
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "tracked_users": len(self._tokens_by_user),
+            "token_hits": self.token_hits,
+            "token_misses": self.token_misses,
+            "token_hit_rate": round(self.token_hits / token_lookups, 4) if token_lookups else 0.0,
+            "user_hits": self.user_hits,
+            "user_misses": self.user_misses,
+            "user_hit_rate": round(self.user_hits / user_lookups, 4) if user_lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def get_auth_cache() -> AccessTokenCache:
+    cache = current_app.extensions.get("auth_cache")
+    if cache is None:
+        cache = AccessTokenCache(
+            ttl=current_app.config["AUTH_CACHE_TTL_SECONDS"],
+            max_entries=current_app.config["AUTH_CACHE_MAX_ENTRIES"],
+        )
+        current_app.extensions["auth_cache"] = cache
+    return cache
+
+
+# Session.info key of the user ids to drop from the cache when the session commits.
+_CHANGED_USERS = "auth_cache_changed_users"
+
+
+@event.listens_for(User, "after_update")
+def _collect_user_change(mapper, connection, target: User) -> None:
+    # Runs during flush: until the commit other requests still read the old
+    # row, so dropping the cache entry now would let them cache it again.
+    state = inspect(target)
+    changed = any(
+        state.attrs[name].history.has_changes() for name in ("is_active", "password_hash")
+    )
+    if changed and state.session is not None:
+        state.session.info.setdefault(_CHANGED_USERS, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_user_changes(session: Session) -> None:
+    user_ids = session.info.pop(_CHANGED_USERS, None)
+    if user_ids and has_app_context():
+        cache = get_auth_cache()
+        for user_id in user_ids:
+            cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_user_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS, None)
+
+
+def get_bearer_token():
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ", 1)[1].strip()
+
+
+def decode_token(token: str) -> dict:
+    return jwt.decode(
+        token,
+        current_app.config["JWT_SECRET"],
+        algorithms=[current_app.config["JWT_ALGORITHM"]],
+    )
+
+
+def _auth_user_query(user_id: int):
+    return select(User.id, User.email, User.nickname, User.is_active).where(User.id == user_id)
+
+
+def _auth_user_from_row(row) -> AuthUser | None:
+    if row is None:
+        return None
+    return AuthUser(id=row.id, email=row.email, nickname=row.nickname, is_active=row.is_active)
+
+
+def _load_auth_user(user_id: int) -> AuthUser | None:
+    return _auth_user_from_row(db.session.execute(_auth_user_query(user_id)).first())
+
+
+def _access_token_user_id(token: str | None) -> tuple[int | None, tuple[str, int] | None]:
+    if not token:
+        return None, ("authorization required", 401)
+
+    cache = get_auth_cache()
+    user_id = cache.get_token(token)
+    if user_id is None:
+        try:
+            payload = decode_token(token)
+        except jwt.ExpiredSignatureError:
+            return None, ("access token expired", 401)
+        except jwt.InvalidTokenError:
+            return None, ("invalid access token", 401)
+        if payload.get("type") != "access":
+            return None, ("invalid token type", 401)
+        cache.put_token(token, payload)
+        user_id = int(payload.get("sub", 0))
+    return user_id, None
+
+
+def resolve_access_user() -> tuple[AuthUser | None, tuple[str, int] | None]:
+    """Authenticate the request's bearer token; returns ``(user, (message, status))``."""
+    user_id, error = _access_token_user_id(get_bearer_token())
+    if error:
+        return None, error
+
+    cache = get_auth_cache()
+    user = cache.get_user(user_id)
+    if user is None:
+        generation = cache.generation
+        user = _load_auth_user(user_id)
+        if user is not None:
+            cache.put_user(user, generation)
+    if not user or not user.is_active:
+        return None, ("account not available", 403)
+    return user, None
+
+
+async def resolve_access_user_async(token: str | None) -> tuple[AuthUser | None, tuple[str, int] | None]:
+    """``resolve_access_user`` for the ASGI handlers; cache misses use the async engine."""
+    user_id, error = _access_token_user_id(token)
+    if error:
+        return None, error
+
+    cache = get_auth_cache()
+    user = cache.get_user(user_id)
+    if user is None:
+        generation = cache.generation
+        async with get_async_engine().connect() as conn:
+            user = _auth_user_from_row((await conn.execute(_auth_user_query(user_id))).first())
+        if user is not None:
+            cache.put_user(user, generation)
+    if not user or not user.is_active:
+        return None, ("account not available", 403)
+    return user, None
+
+
+def require_user() -> AuthUser:
+    user, error = resolve_access_user()
+    if error:
+        message, code = error
+        abort(code, description=message)
+    return user
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, wait as futures_wait
+from contextlib import contextmanager
+from typing import Iterator
+
+from flask import current_app
+
+
+_init_lock = threading.Lock()
+
+
+class ChatOverloaded(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("chat is at capacity, try again later")
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("future", "granted")
+
+    def __init__(self) -> None:
+        # A concurrent future so both threads and coroutines can wait on it.
+        self.future: Future = Future()
+        self.granted = False
+
+
+class _ModelLane:
+    """Slots and fair wait queue for one model."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        # user key -> that user's waiters; served round-robin across users.
+        self.waiting: OrderedDict[str, deque[_Waiter]] = OrderedDict()
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.shed = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+        self.upstream_ms_total = 0.0
+        self.upstream_ms_max = 0.0
+        self.completed = 0
+        # Moving average of upstream time, used to predict queue waits.
+        self.upstream_ewma = 0.0
+
+    def stats(self) -> dict:
+        admitted, completed = self.admitted, self.completed
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "queued_users": len(self.waiting),
+            "admitted": admitted,
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "avg_queue_ms": round(self.queue_ms_total / admitted, 3) if admitted else 0.0,
+            "max_queue_ms": round(self.queue_ms_max, 3),
+            "avg_upstream_ms": round(self.upstream_ms_total / completed, 3) if completed else 0.0,
+            "max_upstream_ms": round(self.upstream_ms_max, 3),
+        }
+
+
+class ChatAdmission:
+    """Admission control for upstream LLM calls.
+
+    Each model has its own concurrency limit. Callers beyond it wait in a
+    bounded queue that hands freed slots to users round-robin, so one user's
+    burst cannot starve others. A caller is shed with ``ChatOverloaded`` when
+    the queue is full, when its predicted wait already exceeds ``max_wait``,
+    or when ``max_wait`` passes without a slot.
+    """
+
+    def __init__(self, default_limit: int, limits: dict[str, int], max_queue: int, max_wait: float) -> None:
+        self.default_limit = default_limit
+        self.limits = limits
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lanes: dict[str, _ModelLane] = {}
+        self._lock = threading.Lock()
+
+    def _lane(self, model: str) -> _ModelLane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            lane = self._lanes[model] = _ModelLane(self.limits.get(model, self.default_limit))
+        return lane
+
+    def _retry_after(self, lane: _ModelLane) -> int:
+        return max(1, math.ceil(lane.upstream_ewma * (lane.queued + 1) / lane.limit))
+
+    def _enqueue(self, model: str, user_key: str) -> _Waiter | None:
+        """Take a free slot (returns ``None``) or join the wait queue."""
+        with self._lock:
+            lane = self._lane(model)
+            if lane.active < lane.limit and lane.queued == 0:
+                lane.active += 1
+                lane.admitted += 1
+                return None
+            if lane.queued >= self.max_queue:
+                lane.rejected += 1
+                raise ChatOverloaded(self._retry_after(lane))
+            expected_wait = lane.upstream_ewma * (lane.queued + 1) / lane.limit
+            if expected_wait > self.max_wait:
+                lane.shed += 1
+                raise ChatOverloaded(self._retry_after(lane))
+            waiter = _Waiter()
+            lane.waiting.setdefault(user_key, deque()).append(waiter)
+            lane.queued += 1
+            return waiter
+
+    def _settle(self, model: str, user_key: str, waiter: _Waiter) -> None:
+        """After the wait: keep the granted slot, or leave the queue and shed."""
+        with self._lock:
+            lane = self._lanes[model]
+            if waiter.granted:
+                lane.admitted += 1
+                return
+            queue = lane.waiting[user_key]
+            queue.remove(waiter)
+            if not queue:
+                del lane.waiting[user_key]
+            lane.queued -= 1
+            lane.shed += 1
+            raise ChatOverloaded(self._retry_after(lane))
+
+    def _acquire(self, model: str, user_key: str) -> None:
+        waiter = self._enqueue(model, user_key)
+        if waiter is not None:
+            futures_wait([waiter.future], timeout=self.max_wait)
+            self._settle(model, user_key, waiter)
+
+    async def _acquire_async(self, model: str, user_key: str) -> None:
+        waiter = self._enqueue(model, user_key)
+        if waiter is not None:
+            # asyncio.wait (unlike wait_for) never cancels the shared future on timeout.
+            await asyncio.wait([asyncio.wrap_future(waiter.future)], timeout=self.max_wait)
+            self._settle(model, user_key, waiter)
+
+    def _release(self, model: str) -> None:
+        with self._lock:
+            lane = self._lanes[model]
+            if not lane.waiting:
+                lane.active -= 1
+                return
+            # Hand the slot straight to the next user in rotation.
+            user_key, queue = next(iter(lane.waiting.items()))
+            waiter = queue.popleft()
+            if queue:
+                lane.waiting.move_to_end(user_key)
+            else:
+                del lane.waiting[user_key]
+            lane.queued -= 1
+            waiter.granted = True
+            waiter.future.set_result(True)
+
+    def _record(self, model: str, queue_ms: float, upstream_ms: float) -> None:
+        with self._lock:
+            lane = self._lanes[model]
+            lane.queue_ms_total += queue_ms
+            lane.queue_ms_max = max(lane.queue_ms_max, queue_ms)
+            lane.upstream_ms_total += upstream_ms
+            lane.upstream_ms_max = max(lane.upstream_ms_max, upstream_ms)
+            lane.completed += 1
+            seconds = upstream_ms / 1000
+            lane.upstream_ewma = seconds if lane.completed == 1 else 0.8 * lane.upstream_ewma + 0.2 * seconds
+
+    def acquire(self, model: str, user_key: str) -> "ChatTicket":
+        """Wait for a slot; the returned ticket must be released exactly once."""
+        start = time.perf_counter()
+        self._acquire(model, user_key)
+        return ChatTicket(self, model, (time.perf_counter() - start) * 1000)
+
+    async def acquire_async(self, model: str, user_key: str) -> "ChatTicket":
+        """``acquire`` for coroutines: waits without blocking the event loop."""
+        start = time.perf_counter()
+        await self._acquire_async(model, user_key)
+        return ChatTicket(self, model, (time.perf_counter() - start) * 1000)
+
+    @contextmanager
+    def admit(self, model: str, user_key: str) -> Iterator[None]:
+        ticket = self.acquire(model, user_key)
+        try:
+            yield
+        finally:
+            ticket.release()
+
+    def capacity(self, models) -> int:
+        """Upstream calls admitted at once across ``models``."""
+        return sum(self.limits.get(model, self.default_limit) for model in models)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_queue": self.max_queue,
+                "max_wait_seconds": self.max_wait,
+                "models": {model: lane.stats() for model, lane in self._lanes.items()},
+            }
+
+
+class ChatTicket:
+    """A held slot; times the upstream call from admission until release."""
+
+    def __init__(self, admission: ChatAdmission, model: str, queue_ms: float) -> None:
+        self._admission = admission
+        self._model = model
+        self._queue_ms = queue_ms
+        self._started = time.perf_counter()
+        self._released = False
+        self._release_lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._release_lock:
+            if self._released:
+                return
+            self._released = True
+        upstream_ms = (time.perf_counter() - self._started) * 1000
+        self._admission._release(self._model)
+        self._admission._record(self._model, self._queue_ms, upstream_ms)
+
+
+def _parse_limits(spec: str) -> dict[str, int]:
+    limits = {}
+    for item in spec.split(","):
+        model, _, limit = item.partition("=")
+        if model.strip() and limit.strip():
+            limits[model.strip()] = int(limit)
+    return limits
+
+
+def get_chat_admission() -> ChatAdmission:
+    admission = current_app.extensions.get("chat_admission")
+    if admission is None:
+        # Two instances would double the effective limit, so build under a lock.
+        with _init_lock:
+            admission = current_app.extensions.get("chat_admission")
+            if admission is None:
+                admission = ChatAdmission(
+                    default_limit=current_app.config["CHAT_MAX_CONCURRENCY"],
+                    limits=_parse_limits(current_app.config["CHAT_MODEL_CONCURRENCY"]),
+                    max_queue=current_app.config["CHAT_MAX_QUEUE"],
+                    max_wait=current_app.config["CHAT_QUEUE_TIMEOUT_SECONDS"],
+                )
+                current_app.extensions["chat_admission"] = admission
+    return admission
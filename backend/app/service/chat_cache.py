@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Protocol
+
+from flask import current_app
+
+_init_lock = threading.Lock()
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = ".!?。！？ "
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Fold away differences that do not change what is being asked.
+
+    Unicode compatibility forms, case, runs of whitespace and trailing
+    sentence punctuation are ignored, so "Summarize this todo" and
+    "summarize  this todo?" share a cache entry.
+    """
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.rstrip(_TRAILING_PUNCTUATION) or text
+
+
+def chat_cache_key(prompt: str, model: str, params: dict | None = None) -> str:
+    material = json.dumps(
+        {"prompt": normalize_prompt(prompt), "model": model, "params": params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class ChatCacheBackend(Protocol):
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    def size(self) -> int: ...
+
+
+class MemoryChatCacheBackend:
+    """Per-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteChatCacheBackend:
+    """LRU table in a local SQLite file, shared by every worker on the host."""
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self.evictions = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chat_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_chat_cache_accessed_at ON chat_cache (accessed_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> str | None:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value FROM chat_cache WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE chat_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO chat_cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            conn.execute("DELETE FROM chat_cache WHERE expires_at <= ?", (now,))
+            evicted = conn.execute(
+                "DELETE FROM chat_cache WHERE key IN ("
+                " SELECT key FROM chat_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.evictions += max(evicted, 0)
+
+    def size(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM chat_cache").fetchone()[0]
+
+
+class ChatResponseCache:
+    """Cache of chat completions with in-flight request coalescing.
+
+    Concurrent misses for the same key in one process wait on the first
+    caller's upstream call instead of issuing their own. Empty responses and
+    failures are never stored.
+    """
+
+    def __init__(self, backend: ChatCacheBackend, ttl: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def get(self, key: str) -> str | None:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        if value:
+            self.backend.set(key, value, self.ttl)
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> tuple[str, str]:
+        """Return ``(value, outcome)`` where outcome is hit, miss or coalesced."""
+        value = self.backend.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value, "hit"
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = Future()
+                self._inflight[key] = pending
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return pending.result(), "coalesced"
+
+        try:
+            value = compute()
+            self.set(key, value)
+        except BaseException as exc:
+            with self._lock:
+                self.errors += 1
+                self._inflight.pop(key, None)
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        pending.set_result(value)
+        return value, "miss"
+
+    async def get_or_compute_async(
+        self, key: str, compute: Callable[[], Awaitable[str]]
+    ) -> tuple[str, str]:
+        """``get_or_compute`` for coroutines; coalesces with threaded callers too."""
+        value = await asyncio.to_thread(self.backend.get, key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value, "hit"
+
+        with self._lock:
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = Future()
+                self._inflight[key] = pending
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return await asyncio.wrap_future(pending), "coalesced"
+
+        try:
+            value = await compute()
+            if value:
+                await asyncio.to_thread(self.backend.set, key, value, self.ttl)
+        except BaseException as exc:
+            with self._lock:
+                self.errors += 1
+                self._inflight.pop(key, None)
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+        pending.set_result(value)
+        return value, "miss"
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "backend": type(self.backend).__name__,
+                "entries": self.backend.size(),
+                "evictions": self.backend.evictions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "inflight": len(self._inflight),
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+            }
+
+
+def _build_chat_cache() -> ChatResponseCache | None:
+    config = current_app.config
+    kind = config["CHAT_CACHE_BACKEND"]
+    if kind == "none":
+        return None
+    if kind == "sqlite":
+        path = config["CHAT_CACHE_PATH"] or os.path.join(current_app.instance_path, "chat_cache.sqlite3")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        backend = SQLiteChatCacheBackend(path, config["CHAT_CACHE_MAX_ENTRIES"])
+    elif kind == "memory":
+        backend = MemoryChatCacheBackend(config["CHAT_CACHE_MAX_ENTRIES"])
+    else:
+        raise RuntimeError(f"Unknown CHAT_CACHE_BACKEND: {kind}")
+    return ChatResponseCache(backend, config["CHAT_CACHE_TTL_SECONDS"])
+
+
+def get_chat_cache() -> ChatResponseCache | None:
+    """Return the app's chat cache, or ``None`` when ``CHAT_CACHE_BACKEND=none``."""
+    if "chat_cache" not in current_app.extensions:
+        # Concurrent first requests must share one instance, or their misses
+        # would not coalesce.
+        with _init_lock:
+            if "chat_cache" not in current_app.extensions:
+                current_app.extensions["chat_cache"] = _build_chat_cache()
+    return current_app.extensions["chat_cache"]
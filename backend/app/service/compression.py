@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import gzip
+import threading
+import time
+import zlib
+from typing import AsyncIterator, Iterable, Iterator
+
+from flask import Flask, current_app, request
+
+try:  # Optional: see "Response compression" in the README.
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+# Media types worth compressing. Server-sent events are left alone: proxies
+# tend to buffer compressed event streams.
+COMPRESSIBLE_TYPES = frozenset(
+    {"application/json", "application/x-ndjson", "application/msgpack", "text/plain", "text/html"}
+)
+ENCODINGS = ("br", "gzip")
+
+
+class ResponseCompressor:
+    """Picks a Content-Encoding for a request and compresses bodies with it.
+
+    ``encodings`` is in preference order; ``br`` is dropped when the brotli
+    package is missing. Counters per encoding are reported in /health/stats.
+    """
+
+    def __init__(self, encodings: Iterable[str], min_bytes: int, gzip_level: int = 6, brotli_quality: int = 5) -> None:
+        self.encodings = tuple(name for name in encodings if name == "gzip" or (name == "br" and brotli))
+        self.min_bytes = min_bytes
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._lock = threading.Lock()
+        self._stats = {name: {"responses": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0} for name in self.encodings}
+
+    def negotiate(self, accept_encodings) -> str | None:
+        """The accepted encoding with the highest q-value, ties going to the preferred one."""
+        best, best_quality = None, 0
+        for name in self.encodings:
+            quality = accept_encodings[name]
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        # mtime=0 keeps the output a pure function of the body.
+        return gzip.compress(body, self.gzip_level, mtime=0)
+
+    def encode_body(self, body: bytes, encoding: str) -> bytes | None:
+        """``body`` compressed and counted, or None when it is under ``min_bytes``."""
+        if len(body) < self.min_bytes:
+            return None
+        start = time.perf_counter()
+        compressed = self.compress(body, encoding)
+        self.record(encoding, len(body), len(compressed), time.perf_counter() - start)
+        return compressed
+
+    def _stream_codec(self, encoding: str):
+        """``process``, ``flush`` and ``finish`` callables of a streaming compressor."""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+    def compress_stream(self, chunks: Iterable, encoding: str) -> Iterator[bytes]:
+        """Compress a streamed body chunk by chunk, flushing after each one so
+        the client can decode what has arrived so far."""
+        process, flush, finish = self._stream_codec(encoding)
+        bytes_in = bytes_out = 0
+        seconds = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                start = time.perf_counter()
+                data = process(chunk) + flush()
+                seconds += time.perf_counter() - start
+                bytes_in += len(chunk)
+                bytes_out += len(data)
+                if data:
+                    yield data
+            data = finish()
+            bytes_out += len(data)
+            yield data
+        finally:
+            # The wrapped iterable may hold a request context (stream_with_context).
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            self.record(encoding, bytes_in, bytes_out, seconds)
+
+    async def compress_stream_async(self, chunks: AsyncIterator, encoding: str) -> AsyncIterator[bytes]:
+        """``compress_stream`` over an async iterable, for the ASGI handlers."""
+        process, flush, finish = self._stream_codec(encoding)
+        bytes_in = bytes_out = 0
+        seconds = 0.0
+        try:
+            async for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                start = time.perf_counter()
+                data = process(chunk) + flush()
+                seconds += time.perf_counter() - start
+                bytes_in += len(chunk)
+                bytes_out += len(data)
+                if data:
+                    yield data
+            data = finish()
+            bytes_out += len(data)
+            yield data
+        finally:
+            await chunks.aclose()
+            self.record(encoding, bytes_in, bytes_out, seconds)
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, seconds: float) -> None:
+        with self._lock:
+            stats = self._stats[encoding]
+            stats["responses"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["seconds"] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "encodings": list(self.encodings),
+                "min_bytes": self.min_bytes,
+                **{name: {**stats, "seconds": round(stats["seconds"], 3)} for name, stats in self._stats.items()},
+            }
+
+
+def get_response_compressor() -> ResponseCompressor:
+    compressor = current_app.extensions.get("response_compressor")
+    if compressor is None:
+        config = current_app.config
+        compressor = ResponseCompressor(
+            [name.strip().lower() for name in config["COMPRESS_ENCODINGS"].split(",") if name.strip()],
+            min_bytes=config["COMPRESS_MIN_BYTES"],
+            gzip_level=config["COMPRESS_GZIP_LEVEL"],
+            brotli_quality=config["COMPRESS_BROTLI_QUALITY"],
+        )
+        current_app.extensions["response_compressor"] = compressor
+    return compressor
+
+
+def _compress_response(response):
+    if (
+        not request.path.startswith("/api/")
+        or request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.mimetype not in COMPRESSIBLE_TYPES
+        or "Content-Encoding" in response.headers
+        or response.direct_passthrough
+        or "no-transform" in response.headers.get("Cache-Control", "")
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    compressor = get_response_compressor()
+    encoding = compressor.negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compressor.compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        compressed = compressor.encode_body(response.get_data(), encoding)
+        if compressed is None:
+            return response
+        response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    # The bytes differ per encoding, so a strong validator must not be shared
+    # between them; a weak one still answers If-None-Match.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app: Flask) -> None:
+    """Compress /api responses the client accepts an encoding for.
+
+    Registered after the metrics hook, so it runs first and /metrics counts
+    the bytes actually sent.
+    """
+    if app.config["COMPRESS_ENABLED"]:
+        app.after_request(_compress_response)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """``QueuePool`` that reports how long each checkout waited for a connection.
+
+    The pool has no event around the blocking wait, so the engines are built
+    with this class (``poolclass``) and ``PoolMetrics`` subscribes to it. The
+    listener is carried over when ``engine.dispose()`` recreates the pool.
+    """
+
+    wait_listener: PoolMetrics | None = None
+
+    def _do_get(self):
+        listener = self.wait_listener
+        if listener is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            listener.record_wait((time.perf_counter() - start) * 1000, timed_out)
+
+    def recreate(self) -> TimedQueuePool:
+        pool = super().recreate()
+        pool.wait_listener = self.wait_listener
+        return pool
+
+
+class PoolMetrics:
+    """Checkout counts and pool wait time for one engine."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+        pool = engine.pool
+        # Pool events are kept across dispose(); so is the wait listener.
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "invalidate", self._on_invalidate)
+        if isinstance(pool, TimedQueuePool):
+            pool.wait_listener = self
+
+    def record_wait(self, waited_ms: float, timed_out: bool) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_ms_total += waited_ms
+            self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        pool = self.engine.pool
+        stats = {
+            "pool": type(pool).__name__,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_ms_total / self.waits, 3) if self.waits else 0.0,
+            "max_wait_ms": round(self.wait_ms_max, 3),
+        }
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return stats
+
+
+def instrument_engines(app) -> None:
+    """Attach ``PoolMetrics`` to each Flask-SQLAlchemy engine of ``app``."""
+    from ..extensions import db
+
+    with app.app_context():
+        app.extensions["db_pool_metrics"] = {
+            (key or "primary"): PoolMetrics(engine) for key, engine in db.engines.items()
+        }
+
+
+def pool_stats(app) -> dict:
+    return {name: metrics.stats() for name, metrics in app.extensions.get("db_pool_metrics", {}).items()}
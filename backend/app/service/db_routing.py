@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import functools
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from ..extensions import RoutingSession, db
+
+
+class RecentWriters:
+    """Clients that wrote recently, whose reads must stay on the primary.
+
+    Keyed by the caller's bearer token (or address when anonymous). Per
+    process, which matches how long replication lag usually lasts; a client
+    bouncing between workers may still see a stale read within the window.
+    """
+
+    def __init__(self, window: float, max_entries: int = 100_000) -> None:
+        self.window = window
+        self.max_entries = max_entries
+        self._until: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.guarded_reads = 0
+
+    def mark(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.max_entries:
+                self._until = {k: until for k, until in self._until.items() if until > now}
+            self._until[key] = now + self.window
+
+    def is_recent(self, key: str) -> bool:
+        until = self._until.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            with self._lock:
+                self._until.pop(key, None)
+            return False
+        with self._lock:
+            self.guarded_reads += 1
+        return True
+
+    def stats(self) -> dict:
+        return {"window_seconds": self.window, "tracked": len(self._until), "guarded_reads": self.guarded_reads}
+
+
+def get_recent_writers() -> RecentWriters:
+    writers = current_app.extensions.get("recent_writers")
+    if writers is None:
+        writers = RecentWriters(current_app.config["REPLICA_STALE_READ_SECONDS"])
+        current_app.extensions["recent_writers"] = writers
+    return writers
+
+
+def writer_key(authorization: str | None, remote_addr: str | None) -> str:
+    """How a client is remembered in ``RecentWriters``."""
+    return authorization or f"ip:{remote_addr}"
+
+
+def _client_key() -> str:
+    return writer_key(request.headers.get("Authorization"), request.remote_addr)
+
+
+def may_read_replica(client_key: str) -> bool:
+    """A replica is configured and ``client_key`` has not written recently."""
+    return "replica" in db.engines and not get_recent_writers().is_recent(client_key)
+
+
+def replica_reads(view):
+    """Serve the view's SELECTs from the replica, unless the client just wrote."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if may_read_replica(_client_key()):
+            g.db_use_replica = True
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_flush(session, flush_context) -> None:
+    if has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _note_dml(orm_execute_state) -> None:
+    if has_request_context() and (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ):
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session) -> None:
+    if has_request_context() and g.pop("db_wrote", False) and "replica" in db.engines:
+        get_recent_writers().mark(_client_key())
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session) -> None:
+    if has_request_context():
+        g.pop("db_wrote", None)
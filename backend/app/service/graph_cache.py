@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+from flask import current_app
+
+from .compression import ResponseCompressor, get_response_compressor
+
+# A cached entry: anything with ``revision`` and ``size`` (bytes).
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class GraphSnapshot:
+    revision: int
+    body: bytes
+    # Content-Encoding -> pre-compressed body.
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+
+class RevisionCache(Generic[T]):
+    """LRU of per-graph entries, capped by the total of their ``size`` in bytes.
+
+    Each entry carries the ``revision`` it was built from; a lookup with any
+    other revision is a miss, so bumping ``Graph.revision`` is all the
+    invalidation writers need to do. Entries larger than the cap are not kept.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, T] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, revision: int) -> T | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.revision != revision:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: T) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                if previous.revision > entry.revision:
+                    # A newer entry was stored concurrently; keep it.
+                    self._entries[key] = previous
+                    return
+                self._size -= previous.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class GraphSnapshotCache:
+    """Serialized graph documents by graph id, in a ``RevisionCache``.
+
+    Formats other than plain JSON are stored under ``<graph id>.<format>``.
+    """
+
+    def __init__(self, max_bytes: int, compressor: ResponseCompressor | None = None) -> None:
+        self.snapshots: RevisionCache[GraphSnapshot] = RevisionCache(max_bytes)
+        # Each stored body is also kept compressed with every encoding it offers.
+        self.compressor = compressor
+
+    def get(self, graph_id: str, revision: int) -> GraphSnapshot | None:
+        return self.snapshots.get(graph_id, revision)
+
+    def put(self, graph_id: str, revision: int, body: bytes) -> GraphSnapshot:
+        compressor = self.compressor
+        encoded = {name: compressor.compress(body, name) for name in compressor.encodings} if compressor else {}
+        snapshot = GraphSnapshot(revision=revision, body=body, encoded=encoded)
+        self.snapshots.put(graph_id, snapshot)
+        return snapshot
+
+    def stats(self) -> dict:
+        return self.snapshots.stats()
+
+
+def get_graph_snapshot_cache() -> GraphSnapshotCache:
+    cache = current_app.extensions.get("graph_snapshot_cache")
+    if cache is None:
+        cache = GraphSnapshotCache(
+            max_bytes=current_app.config["GRAPH_CACHE_MAX_BYTES"],
+            compressor=get_response_compressor() if current_app.config["GRAPH_CACHE_COMPRESS"] else None,
+        )
+        current_app.extensions["graph_snapshot_cache"] = cache
+    return cache
@@ -0,0 +1,550 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import Flask, current_app
+from sqlalchemy import select, update
+
+from ..extensions import db
+from ..models import Edge, Graph, Node, NodeLayout
+from .auth import AuthUser
+from .graphs import GraphServiceError, _bulk_update, get_graph_revision
+
+try:  # Optional: see "Server-side layout" in the README.
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the deployment
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
+# Pivot nodes for the initial stress (PivotMDS) placement, and the BFS
+# levels all pivots together may take before fewer are used.
+_PIVOTS = 50
+_MIN_PIVOTS = 4
+_BFS_LEVEL_BUDGET = 20000
+# Repulsion only acts within this many ideal edge lengths.
+_REPULSION_RANGE = 3.0
+# Largest repulsion grid, in cells a side.
+_MAX_GRID = 512
+
+
+class LayoutBusy(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("layout workers are saturated, try again later")
+        self.retry_after = retry_after
+
+
+def _adjacency(n: int, sources, targets):
+    """Undirected CSR: neighbours of ``i`` are ``neighbors[offsets[i]:offsets[i + 1]]``."""
+    heads = np.concatenate([sources, targets])
+    tails = np.concatenate([targets, sources])
+    order = np.argsort(heads, kind="stable")
+    offsets = np.searchsorted(heads[order], np.arange(n + 1))
+    return offsets, tails[order]
+
+
+def _bfs(offsets, neighbors, start: int):
+    """Hop distances from ``start`` (-1 when unreachable), one vectorised step per level."""
+    n = len(offsets) - 1
+    dist = np.full(n, -1, dtype=np.int32)
+    dist[start] = 0
+    # Scratch for de-duplicating a level without sorting it.
+    slot_of = np.empty(n, dtype=np.intp)
+    frontier = np.array([start])
+    level = 0
+    while frontier.size:
+        level += 1
+        begins = offsets[frontier]
+        counts = offsets[frontier + 1] - begins
+        total = int(counts.sum())
+        if not total:
+            break
+        # Concatenated ranges begins[i]:begins[i] + counts[i].
+        slots = np.repeat(begins - np.cumsum(counts) + counts, counts) + np.arange(total)
+        reached = neighbors[slots]
+        reached = reached[dist[reached] < 0]
+        positions = np.arange(len(reached))
+        slot_of[reached] = positions
+        reached = reached[slot_of[reached] == positions]
+        dist[reached] = level
+        frontier = reached
+    return dist
+
+
+def pivot_mds(n: int, offsets, neighbors, pivots: int, rng):
+    """PivotMDS (Brandes & Pich): classical MDS on hop distances to a few pivots.
+
+    Returns (n, 2) coordinates in hop units. Pivots are picked max-min, so
+    they spread over the graph; unreachable pairs count as one hop further
+    than the longest path seen.
+    """
+    pivots = min(pivots, n)
+    columns = []
+    nearest = np.full(n, np.inf)
+    pivot = int(rng.integers(n))
+    while len(columns) < pivots:
+        dist = _bfs(offsets, neighbors, pivot).astype(np.float64)
+        if not columns:
+            # Each BFS costs one vectorised step per level, so long chains
+            # get fewer pivots; their shape needs few to pin down anyway.
+            pivots = min(pivots, max(_MIN_PIVOTS, _BFS_LEVEL_BUDGET // max(1, int(dist.max()))))
+        dist[dist < 0] = np.inf
+        columns.append(dist)
+        nearest = np.minimum(nearest, dist)
+        pivot = int(np.argmax(np.where(np.isinf(nearest), -1, nearest)))
+    columns = np.column_stack(columns)
+    finite = np.isfinite(columns)
+    columns[~finite] = columns[finite].max() + 1 if finite.any() else 1
+    squared = columns**2
+    centred = -0.5 * (
+        squared - squared.mean(axis=0) - squared.mean(axis=1)[:, None] + squared.mean()
+    )
+    _, vectors = np.linalg.eigh(centred.T @ centred)
+    return centred @ vectors[:, -2:][:, ::-1]
+
+
+def _repulsion_kernel(padded: int, cells: float):
+    """FFT of the short-range repulsion r / |r|^2, zero past ``cells``, on a ``padded``^2 grid."""
+    offsets = np.fft.fftfreq(padded, 1 / padded)
+    dx, dy = np.meshgrid(offsets, offsets, indexing="ij")
+    r2 = dx * dx + dy * dy
+    r2[0, 0] = 1.0
+    outside = r2 > cells * cells
+    kx, ky = dx / r2, dy / r2
+    kx[0, 0] = ky[0, 0] = 0.0
+    kx[outside] = ky[outside] = 0.0
+    return np.fft.rfft2(kx), np.fft.rfft2(ky)
+
+
+def _grid_repulsion(pos, low, cell: float, padded: int, kernel):
+    """Approximate sum_j (p_i - p_j) / |p_i - p_j|^2 over nearby nodes.
+
+    Nodes are spread onto a grid of ``cell``-sized squares (cloud-in-cell),
+    the grid is convolved with the kernel by FFT, and the field is
+    interpolated back: O(n + g^2 log g) per call for a g x g grid instead
+    of the O(n^2) of exact pairwise forces. The grid is ``padded`` cells a
+    side, with at least the kernel's reach left empty past the nodes, so
+    the FFT's wrap-around never adds forces.
+    """
+    grid = (pos - low) / cell
+    base = grid.astype(np.intp)
+    frac = grid - base
+    ix, iy = base[:, 0], base[:, 1]
+    fx, fy = frac[:, 0], frac[:, 1]
+    corners = (
+        (ix * padded + iy, (1 - fx) * (1 - fy)),
+        ((ix + 1) * padded + iy, fx * (1 - fy)),
+        (ix * padded + iy + 1, (1 - fx) * fy),
+        ((ix + 1) * padded + iy + 1, fx * fy),
+    )
+    density = np.zeros(padded * padded)
+    for flat, weight in corners:
+        density += np.bincount(flat, weights=weight, minlength=padded * padded)
+    spectrum = np.fft.rfft2(density.reshape(padded, padded))
+    field_x = np.fft.irfft2(spectrum * kernel[0], s=(padded, padded)).ravel()
+    field_y = np.fft.irfft2(spectrum * kernel[1], s=(padded, padded)).ravel()
+    force = np.zeros_like(pos)
+    for flat, weight in corners:
+        force[:, 0] += field_x[flat] * weight
+        force[:, 1] += field_y[flat] * weight
+    # Kernel offsets are in cells; rescale to the layout's units.
+    return force / cell
+
+
+def refine_layout(pos, free, sources, targets, edge_length: float, iterations: int, progress=None):
+    """Springs of rest length ``edge_length`` on every edge plus short-range repulsion.
+
+    Moves only rows where ``free`` is true, each by at most a temperature
+    that cools linearly from one edge length.
+    """
+    n = len(pos)
+    k = float(edge_length)
+    report_every = max(1, iterations // 50)
+    # About four cells a side per sqrt(node): finer grids cost FFT time
+    # without separating more nodes.
+    max_grid = int(min(_MAX_GRID, 2 ** np.ceil(np.log2(max(64, 4 * np.sqrt(n))))))
+    kernels = {}
+    for iteration in range(iterations):
+        # The grid follows the layout's bounding box: two cells per edge
+        # length plus the kernel's reach, rounded up to a power of two,
+        # with cells made larger if that would exceed max_grid.
+        low = pos.min(axis=0)
+        extent = float((pos.max(axis=0) - low).max())
+        reach = int(np.ceil(_REPULSION_RANGE))
+        padded = int(min(max_grid, 2 ** np.ceil(np.log2(2 * extent / k + 2 * reach + 2))))
+        cell = max(k / 2, extent / (padded - 2 * reach - 2))
+        # Cell sizes are rounded up to k/2 times a power of sqrt(2), so a
+        # layout that keeps growing reuses a handful of kernels.
+        cell = k / 2 * 2 ** (np.ceil(2 * np.log2(2 * cell / k)) / 2)
+        cells = _REPULSION_RANGE * k / cell
+        if (padded, cells) not in kernels:
+            kernels[(padded, cells)] = _repulsion_kernel(padded, cells)
+        force = k * k * _grid_repulsion(pos, low, cell, padded, kernels[(padded, cells)])
+
+        delta = pos[targets] - pos[sources]
+        distance = np.sqrt((delta * delta).sum(axis=1)) + 1e-9
+        # Capped at one edge length: in small-world graphs many edges must
+        # stay long, and uncapped springs would crush the nodes together.
+        pull = delta * (np.clip(distance - k, -k, k) / distance)[:, None]
+        for axis in range(2):
+            force[:, axis] += np.bincount(sources, weights=pull[:, axis], minlength=n)
+            force[:, axis] -= np.bincount(targets, weights=pull[:, axis], minlength=n)
+
+        temperature = k * (1 - iteration / iterations) + 0.01 * k
+        length = np.sqrt((force * force).sum(axis=1)) + 1e-9
+        step = force * (np.minimum(length, temperature) / length)[:, None]
+        pos[free] += step[free]
+        if progress is not None and (iteration + 1) % report_every == 0:
+            progress(iteration + 1)
+    return pos
+
+
+def _scatter_stacked(pos, free, radius: float, rng) -> None:
+    """Jitter free nodes that share a position with an earlier node.
+
+    Nodes stacked on one point (an import at 0,0, or leaves of one hub that
+    MDS cannot tell apart) would otherwise feel identical forces forever.
+    """
+    _, first, inverse = np.unique(np.round(pos, 3), axis=0, return_index=True, return_inverse=True)
+    stacked = free & (first[inverse.ravel()] != np.arange(len(pos)))
+    if stacked.any():
+        pos[stacked] += rng.uniform(-radius, radius, size=(int(stacked.sum()), 2))
+
+
+def _fit_to_pinned(coords, pos, pinned):
+    """Rotate/reflect and translate ``coords`` so pinned nodes land near their stored positions."""
+    if not pinned.any():
+        return coords - coords.mean(axis=0) + pos.mean(axis=0)
+    source, target = coords[pinned], pos[pinned]
+    source_mean, target_mean = source.mean(axis=0), target.mean(axis=0)
+    if pinned.sum() >= 2:
+        u, _, vt = np.linalg.svd((source - source_mean).T @ (target - target_mean))
+        coords = (coords - source_mean) @ (u @ vt)
+        return coords + target_mean
+    return coords - source_mean + target_mean
+
+
+def compute_layout(
+    positions, pinned, sources, targets, edge_length: float, iterations: int, mode: str, rng, progress=None
+):
+    """Positions for every node; pinned rows come back unchanged.
+
+    ``mode="full"`` places free nodes from scratch (PivotMDS, then
+    refinement); ``mode="refine"`` only refines the current positions.
+    """
+    pos = np.array(positions, dtype=np.float64).reshape(-1, 2)
+    pinned = np.asarray(pinned, dtype=bool)
+    free = ~pinned
+    n = len(pos)
+    if n < 2 or not free.any():
+        return pos
+    sources = np.asarray(sources, dtype=np.intp)
+    targets = np.asarray(targets, dtype=np.intp)
+    k = float(edge_length)
+    if mode == "full":
+        offsets, neighbors = _adjacency(n, sources, targets)
+        coords = pivot_mds(n, offsets, neighbors, _PIVOTS, rng)
+        coords -= coords.mean(axis=0)
+        # One hop should span about one edge length, but small-world graphs
+        # have too few hops across for that: then spread the nodes so each
+        # gets about k^2 of area (an RMS radius of k * sqrt(n / 2 pi)).
+        hop = np.median(np.sqrt(((coords[sources] - coords[targets]) ** 2).sum(axis=1))) if len(sources) else 0
+        rms = np.sqrt((coords * coords).sum(axis=1).mean())
+        scales = [k / hop if hop > 0 else 0, k * np.sqrt(n / (2 * np.pi)) / rms if rms > 0 else 0]
+        coords *= max(scales) or k
+        pos[free] = _fit_to_pinned(coords, pos, pinned)[free]
+    _scatter_stacked(pos, free, k, rng)
+    return refine_layout(pos, free, sources, targets, k, iterations, progress)
+
+
+class LayoutJob:
+    def __init__(self, graph_id: str, owner_user_id: int, options: dict) -> None:
+        self.id = str(uuid.uuid4())
+        self.graph_id = graph_id
+        self.owner_user_id = owner_user_id
+        self.options = options
+        self.status = "queued"
+        self.phase: str | None = None
+        self.iteration = 0
+        self.nodes = 0
+        self.edges = 0
+        self.error: str | None = None
+        self.revision: int | None = None
+        self.timings_ms: dict[str, float] = {}
+        self.created_at = datetime.utcnow()
+        self.finished_at: datetime | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def progress(self) -> float:
+        if self.status == "succeeded":
+            return 1.0
+        if self.phase != "layout" and self.phase != "saving":
+            return 0.0
+        # The iterations are most of the work; saving is the last 5%.
+        done = self.iteration / self.options["iterations"]
+        return round(0.95 * done if self.phase == "layout" else 0.95, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "graph_id": self.graph_id,
+            "status": self.status,
+            "phase": self.phase,
+            "progress": self.progress(),
+            "iteration": self.iteration,
+            "iterations": self.options["iterations"],
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "revision": self.revision,
+            "error": self.error,
+            "timings_ms": self.timings_ms,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def _load_layout_input(graph_id: str):
+    conn = db.session.connection()
+    revision = conn.execute(select(Graph.revision).where(Graph.id == graph_id)).scalar_one_or_none()
+    if revision is None:
+        raise GraphServiceError("graph not found", status_code=404)
+    nodes = conn.execute(
+        select(NodeLayout.node_id, NodeLayout.x, NodeLayout.y, NodeLayout.pinned)
+        .join(Node, Node.id == NodeLayout.node_id)
+        .where(Node.graph_id == graph_id)
+        .order_by(NodeLayout.node_id)
+    ).all()
+    edges = conn.execute(
+        select(Edge.from_node_id, Edge.to_node_id).where(Edge.graph_id == graph_id)
+    ).all()
+    return revision, nodes, edges
+
+
+def _write_layout(graph_id: str, revision: int, node_ids: list[str], pos, free) -> int:
+    """Store the free nodes' positions and bump the graph revision in one transaction."""
+    bumped = db.session.execute(
+        update(Graph)
+        .where(Graph.id == graph_id, Graph.revision == revision)
+        .values(revision=Graph.revision + 1),
+        execution_options={"synchronize_session": False},
+    )
+    if bumped.rowcount != 1:
+        db.session.rollback()
+        raise GraphServiceError("graph was modified while the layout ran, start a new one", status_code=409)
+    rows = [
+        {"node_id": node_ids[i], "x": round(float(x), 2), "y": round(float(y), 2)}
+        for i, (x, y) in enumerate(pos.tolist())
+        if free[i]
+    ]
+    _bulk_update(NodeLayout, rows)
+    db.session.commit()
+    return revision + 1
+
+
+def run_layout_job(job: LayoutJob) -> None:
+    """Load, lay out and save one graph; updates ``job`` as it goes (call inside an app context)."""
+    options = job.options
+    timings = job.timings_ms
+    started = time.perf_counter()
+    job.phase = "loading"
+    revision, nodes, edges = _load_layout_input(job.graph_id)
+    db.session.rollback()  # Do not hold a transaction open while computing.
+    node_ids = [node_id for node_id, _, _, _ in nodes]
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    pairs = [
+        (index[source], index[target])
+        for source, target in edges
+        if source != target and source in index and target in index
+    ]
+    job.nodes, job.edges = len(node_ids), len(pairs)
+    pos = np.array([(x, y) for _, x, y, _ in nodes], dtype=np.float64).reshape(-1, 2)
+    pinned = np.array([bool(is_pinned) for _, _, _, is_pinned in nodes], dtype=bool)
+    timings["load"] = round((time.perf_counter() - started) * 1000, 1)
+
+    started = time.perf_counter()
+    job.phase = "layout"
+    edge_array = np.array(pairs, dtype=np.intp).reshape(-1, 2)
+
+    def progress(iteration: int) -> None:
+        job.iteration = iteration
+
+    pos = compute_layout(
+        pos,
+        pinned,
+        edge_array[:, 0],
+        edge_array[:, 1],
+        edge_length=options["edge_length"],
+        iterations=options["iterations"],
+        mode=options["mode"],
+        rng=np.random.default_rng(options["seed"]),
+        progress=progress,
+    )
+    job.iteration = options["iterations"]
+    timings["layout"] = round((time.perf_counter() - started) * 1000, 1)
+
+    started = time.perf_counter()
+    job.phase = "saving"
+    job.revision = _write_layout(job.graph_id, revision, node_ids, pos, ~pinned)
+    timings["save"] = round((time.perf_counter() - started) * 1000, 1)
+
+
+class LayoutJobRunner:
+    """Runs layout jobs on a small thread pool and remembers recent ones for polling.
+
+    At most ``max_pending`` jobs may be queued or running; one graph has at
+    most one unfinished job, and asking again returns it. Job state lives in
+    this process only.
+    """
+
+    def __init__(self, app: Flask, workers: int, max_pending: int, history: int) -> None:
+        self.app = app
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history = history
+        self._jobs: OrderedDict[str, LayoutJob] = OrderedDict()
+        self._active: dict[str, LayoutJob] = {}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, graph_id: str, owner_user_id: int, options: dict) -> tuple[LayoutJob, bool]:
+        """Queue a layout of ``graph_id``; returns (job, created)."""
+        with self._lock:
+            active = self._active.get(graph_id)
+            if active is not None:
+                return active, False
+            if len(self._active) >= self.max_pending:
+                self.rejected += 1
+                raise LayoutBusy(retry_after=5)
+            job = LayoutJob(graph_id, owner_user_id, options)
+            self._active[graph_id] = job
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.finished:
+                    break
+                self._jobs.popitem(last=False)
+            self.submitted += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="graph-layout")
+                atexit.register(self.stop)
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id: str) -> LayoutJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: LayoutJob) -> None:
+        job.status = "running"
+        try:
+            with self.app.app_context():
+                try:
+                    run_layout_job(job)
+                finally:
+                    db.session.remove()
+        except GraphServiceError as exc:
+            job.error = exc.message
+        except Exception:
+            logger.exception("layout of graph %s failed", job.graph_id)
+            job.error = "layout failed"
+        job.status = "failed" if job.error else "succeeded"
+        job.finished_at = datetime.utcnow()
+        with self._lock:
+            self._active.pop(job.graph_id, None)
+            if job.error:
+                self.failed += 1
+            else:
+                self.succeeded += 1
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "available": np is not None,
+                "workers": self.workers,
+                "active": len(self._active),
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+
+def get_layout_runner() -> LayoutJobRunner:
+    if "layout_runner" not in current_app.extensions:
+        with _init_lock:
+            if "layout_runner" not in current_app.extensions:
+                config = current_app.config
+                current_app.extensions["layout_runner"] = LayoutJobRunner(
+                    current_app._get_current_object(),
+                    workers=config["GRAPH_LAYOUT_WORKERS"],
+                    max_pending=config["GRAPH_LAYOUT_MAX_PENDING"],
+                    history=config["GRAPH_LAYOUT_JOB_HISTORY"],
+                )
+    return current_app.extensions["layout_runner"]
+
+
+def parse_layout_options(data: dict) -> dict:
+    config = current_app.config
+    try:
+        iterations = int(data.get("iterations", config["GRAPH_LAYOUT_ITERATIONS"]))
+        edge_length = float(data.get("edge_length", config["GRAPH_LAYOUT_EDGE_LENGTH"]))
+        seed = data.get("seed")
+        seed = int(seed) if seed is not None else None
+    except (TypeError, ValueError, OverflowError):
+        raise GraphServiceError("iterations, edge_length and seed must be numbers") from None
+    max_iterations = config["GRAPH_LAYOUT_MAX_ITERATIONS"]
+    if not 1 <= iterations <= max_iterations:
+        raise GraphServiceError(f"iterations must be between 1 and {max_iterations}")
+    # NaN slips past a plain comparison and inf overflows the layout.
+    if not math.isfinite(edge_length) or edge_length <= 0:
+        raise GraphServiceError("edge_length must be a positive finite number")
+    # numpy rejects negative seeds, which would only surface in the worker.
+    if seed is not None and seed < 0:
+        raise GraphServiceError("seed must be a non-negative integer")
+    mode = data.get("mode") or "full"
+    if mode not in ("full", "refine"):
+        raise GraphServiceError("mode must be full or refine")
+    return {"iterations": iterations, "edge_length": edge_length, "mode": mode, "seed": seed}
+
+
+def start_layout(user: AuthUser, graph_id: str, data: dict) -> tuple[LayoutJob, bool]:
+    if np is None:
+        raise GraphServiceError("server-side layout needs numpy installed", status_code=501)
+    get_graph_revision(user, graph_id)
+    options = parse_layout_options(data)
+    node_count = db.session.execute(
+        select(db.func.count()).select_from(Node).where(Node.graph_id == graph_id)
+    ).scalar_one()
+    max_nodes = current_app.config["GRAPH_LAYOUT_MAX_NODES"]
+    if node_count > max_nodes:
+        raise GraphServiceError(f"graphs over {max_nodes} nodes cannot be laid out on the server", status_code=413)
+    return get_layout_runner().submit(graph_id, user.id, options)
+
+
+def get_layout_job(user: AuthUser, graph_id: str, job_id: str) -> LayoutJob:
+    job = get_layout_runner().get(job_id)
+    if job is None or job.graph_id != graph_id or job.owner_user_id != user.id:
+        raise GraphServiceError("layout job not found", status_code=404)
+    return job
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+from flask import current_app
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import Edge, EdgeType, Node
+from ..models.edge import EdgeStatus
+from .graph_cache import RevisionCache
+from .graphs import GraphServiceError
+
+# Edge status as stored in the CSR arrays; 0 is "no status set".
+STATUS_CODES = {None: 0, EdgeStatus.ACTIVE: 1, EdgeStatus.PAST: 2, EdgeStatus.BLOCKED: 3}
+STATUS_NAMES = {"none": 0, "active": 1, "past": 2, "blocked": 3}
+# Past and blocked relationships are not followed unless asked for.
+DEFAULT_STATUSES = frozenset({0, 1})
+DIRECTIONS = ("out", "in", "both")
+
+
+class _CSR:
+    """One direction of the adjacency: row ``i`` spans ``offsets[i]:offsets[i + 1]``."""
+
+    __slots__ = ("offsets", "targets", "edges", "statuses")
+
+    def __init__(self, node_count: int, sources: list[int], targets: list[int], edges: list[int], statuses: list[int]) -> None:
+        # Entries are ordered by source with the C-level sort; offsets are then
+        # the first position of each source in that order.
+        order = sorted(range(len(sources)), key=sources.__getitem__)
+        sorted_sources = [sources[i] for i in order]
+        self.offsets = array("i", [bisect_left(sorted_sources, node) for node in range(node_count + 1)])
+        self.targets = array("i", [targets[i] for i in order])
+        self.edges = array("i", [edges[i] for i in order])
+        self.statuses = array("b", [statuses[i] for i in order])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.offsets, self.targets, self.edges, self.statuses))
+
+
+class GraphAdjacency:
+    """Compact adjacency of one graph revision, built once from the edges table.
+
+    Nodes are numbered 0..n-1; ``outgoing`` follows edges from source to
+    target and ``incoming`` the reverse. Edges whose ``EdgeType`` is not
+    directed (or that have no type) are stored in both orientations.
+    """
+
+    def __init__(self, revision: int, nodes: list, edge_rows: list) -> None:
+        self.revision = revision
+        self.node_ids = [node_id for node_id, _, _ in nodes]
+        self.titles = [title for _, title, _ in nodes]
+        self.node_types = [node_type.value for _, _, node_type in nodes]
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        index = self.index
+        edges = [
+            (edge_id, index[source], index[target], STATUS_CODES[status], directed)
+            for edge_id, source, target, status, directed in edge_rows
+            if source in index and target in index
+        ]
+        self.edge_ids = [edge[0] for edge in edges]
+        sources = [edge[1] for edge in edges]
+        targets = [edge[2] for edge in edges]
+        statuses = [edge[3] for edge in edges]
+        numbers = list(range(len(edges)))
+        # Untyped edges and undirected types are traversable both ways, so they
+        # are also stored reversed.
+        undirected = [i for i, edge in enumerate(edges) if not edge[4]]
+        heads = sources + [targets[i] for i in undirected]
+        tails = targets + [sources[i] for i in undirected]
+        numbers += undirected
+        statuses += [statuses[i] for i in undirected]
+        node_count = len(self.node_ids)
+        self.outgoing = _CSR(node_count, heads, tails, numbers, statuses)
+        self.incoming = _CSR(node_count, tails, heads, numbers, statuses)
+
+    @property
+    def size(self) -> int:
+        # Arrays exactly; ids and titles at a rough 100 bytes each.
+        return self.outgoing.nbytes + self.incoming.nbytes + 100 * (2 * len(self.node_ids) + len(self.edge_ids))
+
+    def node_index(self, node_id: str) -> int:
+        index = self.index.get(node_id)
+        if index is None:
+            raise GraphServiceError(f"node '{node_id}' not found", status_code=404)
+        return index
+
+    def _expand(self, node: int, direction: str, statuses: frozenset[int]):
+        """Yield (neighbor, edge, direction) for one hop from ``node``."""
+        for name, csr in (("out", self.outgoing), ("in", self.incoming)):
+            if direction not in (name, "both"):
+                continue
+            targets, edges, codes = csr.targets, csr.edges, csr.statuses
+            for slot in range(csr.offsets[node], csr.offsets[node + 1]):
+                if codes[slot] in statuses:
+                    yield targets[slot], edges[slot], name
+
+    def describe(self, node: int) -> dict:
+        return {"id": self.node_ids[node], "title": self.titles[node], "node_type": self.node_types[node]}
+
+    def neighbors(self, node_id: str, direction: str, statuses: frozenset[int], limit: int) -> dict:
+        start = self.node_index(node_id)
+        seen = set()
+        result = []
+        for neighbor, edge, via in self._expand(start, direction, statuses):
+            if neighbor == start or neighbor in seen:
+                continue
+            seen.add(neighbor)
+            result.append({**self.describe(neighbor), "edge_id": self.edge_ids[edge], "direction": via})
+            if len(result) >= limit:
+                break
+        return {"node": self.describe(start), "neighbors": result, "truncated": len(result) >= limit}
+
+    def k_hop(self, node_id: str, depth: int, direction: str, statuses: frozenset[int], limit: int) -> dict:
+        """Breadth-first expansion up to ``depth`` hops; each node reported at its shortest distance."""
+        start = self.node_index(node_id)
+        distance = {start: 0}
+        frontier = [start]
+        result = []
+        truncated = False
+        for hop in range(1, depth + 1):
+            next_frontier = []
+            for node in frontier:
+                for neighbor, _, _ in self._expand(node, direction, statuses):
+                    if neighbor in distance:
+                        continue
+                    distance[neighbor] = hop
+                    next_frontier.append(neighbor)
+                    result.append({**self.describe(neighbor), "depth": hop})
+                    if len(result) >= limit:
+                        truncated = True
+                        break
+                if truncated:
+                    break
+            frontier = next_frontier
+            if truncated or not frontier:
+                break
+        return {"node": self.describe(start), "depth": depth, "nodes": result, "truncated": truncated}
+
+    def shortest_path(
+        self, source_id: str, target_id: str, direction: str, statuses: frozenset[int], max_depth: int | None
+    ) -> dict:
+        """Fewest-hops path by breadth-first search; ``path`` is None when unreachable."""
+        source = self.node_index(source_id)
+        target = self.node_index(target_id)
+        parent: dict[int, tuple[int, int]] = {source: (-1, -1)}
+        queue = deque([(source, 0)])
+        while queue and target not in parent:
+            node, hops = queue.popleft()
+            if max_depth is not None and hops >= max_depth:
+                continue
+            for neighbor, edge, _ in self._expand(node, direction, statuses):
+                if neighbor not in parent:
+                    parent[neighbor] = (node, edge)
+                    if neighbor == target:
+                        break
+                    queue.append((neighbor, hops + 1))
+        if target not in parent:
+            return {"path": None, "edges": None, "hops": None, "visited": len(parent)}
+        nodes, edges = [], []
+        node = target
+        while node != -1:
+            nodes.append(self.describe(node))
+            node, edge = parent[node]
+            if edge != -1:
+                edges.append(self.edge_ids[edge])
+        nodes.reverse()
+        edges.reverse()
+        return {"path": nodes, "edges": edges, "hops": len(edges), "visited": len(parent)}
+
+
+def build_graph_adjacency(graph_id: str, revision: int) -> GraphAdjacency:
+    """Two column-only queries: the graph's nodes, then its edges with their type's direction."""
+    # Core execution on the session's connection: plain rows, no ORM loading.
+    conn = db.session.connection()
+    nodes = conn.execute(
+        select(Node.id, Node.title, Node.node_type).where(Node.graph_id == graph_id).order_by(Node.id)
+    ).all()
+    edges = conn.execute(
+        select(Edge.id, Edge.from_node_id, Edge.to_node_id, Edge.status, EdgeType.directed)
+        .outerjoin(EdgeType, EdgeType.id == Edge.edge_type_id)
+        .where(Edge.graph_id == graph_id)
+    ).all()
+    return GraphAdjacency(revision, nodes, edges)
+
+
+def get_graph_adjacency_cache() -> RevisionCache[GraphAdjacency]:
+    cache = current_app.extensions.get("graph_adjacency_cache")
+    if cache is None:
+        cache = RevisionCache(max_bytes=current_app.config["GRAPH_ADJACENCY_CACHE_MAX_BYTES"])
+        current_app.extensions["graph_adjacency_cache"] = cache
+    return cache
+
+
+def get_graph_adjacency(graph_id: str, revision: int) -> GraphAdjacency:
+    cache = get_graph_adjacency_cache()
+    adjacency = cache.get(graph_id, revision)
+    if adjacency is None:
+        adjacency = build_graph_adjacency(graph_id, revision)
+        cache.put(graph_id, adjacency)
+    return adjacency
+
+
+def parse_traversal_filters(direction: str | None, status: str | None) -> tuple[str, frozenset[int]]:
+    direction = (direction or "both").strip().lower()
+    if direction not in DIRECTIONS:
+        raise GraphServiceError("direction must be out, in, or both")
+    if not status:
+        return direction, DEFAULT_STATUSES
+    names = {name.strip().lower() for name in status.split(",") if name.strip()}
+    unknown = names - STATUS_NAMES.keys()
+    if unknown or not names:
+        raise GraphServiceError(f"status must be a subset of {', '.join(STATUS_NAMES)}")
+    return direction, frozenset(STATUS_NAMES[name] for name in names)
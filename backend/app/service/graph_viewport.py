@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import math
+import threading
+from array import array
+
+from flask import current_app
+
+from .graph_traversal import _CSR
+from .graph_cache import RevisionCache
+from .graphs import GraphServiceError, _serialize_edge_row, _serialize_node_row, load_graph_rows
+
+# Level of detail by zoom: which node and edge fields a viewport response keeps
+# (None keeps the full representation, as in GET /api/graphs/<id>).
+LOD_FIELDS = {
+    "full": (None, None),
+    "label": (("id", "title", "node_type", "position", "style"), ("id", "source", "target", "label", "type")),
+    "shape": (("id", "node_type", "position", "style"), ("id", "source", "target")),
+}
+# Nodes per grid cell the index aims for.
+_NODES_PER_CELL = 4
+_MAX_NODE_CELLS = 64
+
+
+class GraphSpatialIndex:
+    """Uniform-grid index over the node boxes of one graph revision.
+
+    A node's box is ``position`` to ``position + (width, height)`` (a point
+    when it has no size); it is listed in every cell it overlaps. The
+    serialized nodes and edges are kept alongside, so a viewport query never
+    goes back to the database.
+    """
+
+    def __init__(self, revision: int, node_rows: list, edge_rows: list) -> None:
+        self.revision = revision
+        self.nodes = []
+        boxes = []
+        for row in node_rows:
+            if row["x"] is None:
+                continue
+            self.nodes.append(_serialize_node_row(row))
+            width, height = row["width"] or 0.0, row["height"] or 0.0
+            boxes.append((row["x"], row["y"], row["x"] + width, row["y"] + height))
+        self.index = {node["id"]: i for i, node in enumerate(self.nodes)}
+        self.min_x = array("d", [box[0] for box in boxes])
+        self.min_y = array("d", [box[1] for box in boxes])
+        self.max_x = array("d", [box[2] for box in boxes])
+        self.max_y = array("d", [box[3] for box in boxes])
+        self.bounds = (
+            (min(self.min_x), min(self.min_y), max(self.max_x), max(self.max_y)) if boxes else (0.0, 0.0, 0.0, 0.0)
+        )
+
+        index = self.index
+        self.edges = []
+        sources, targets = [], []
+        for row in edge_rows:
+            source, target = index.get(row["from_node_id"]), index.get(row["to_node_id"])
+            if source is None or target is None:
+                continue
+            self.edges.append(_serialize_edge_row(row))
+            sources.append(source)
+            targets.append(target)
+        # Trimmed copies of nodes and edges per level of detail, made on first use.
+        self._trimmed: dict[str, tuple[list, list]] = {"full": (self.nodes, self.edges)}
+        self._trim_lock = threading.Lock()
+        numbers = list(range(len(self.edges)))
+        # Both endpoints list the edge, so it is found from either side.
+        self.incident = _CSR(
+            len(self.nodes), sources + targets, targets + sources, numbers + numbers, [0] * (2 * len(numbers))
+        )
+
+        self.cell = self._cell_size(boxes)
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        # Nodes spanning more than _MAX_NODE_CELLS cells are checked on every query instead.
+        self.large: list[int] = []
+        cell = self.cell
+        for i, (x0, y0, x1, y1) in enumerate(boxes):
+            cx0, cx1 = math.floor(x0 / cell), math.floor(x1 / cell)
+            cy0, cy1 = math.floor(y0 / cell), math.floor(y1 / cell)
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > _MAX_NODE_CELLS:
+                self.large.append(i)
+                continue
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    self.cells.setdefault((cx, cy), []).append(i)
+
+    @staticmethod
+    def _cell_size(boxes: list) -> float:
+        if not boxes:
+            return 1.0
+        width = max(box[2] for box in boxes) - min(box[0] for box in boxes)
+        height = max(box[3] for box in boxes) - min(box[1] for box in boxes)
+        sizes = sorted(max(box[2] - box[0], box[3] - box[1]) for box in boxes)
+        # Aim for _NODES_PER_CELL nodes per cell over the occupied area, but
+        # no smaller than a typical node, which would then span many cells.
+        spread = math.sqrt(max(width * height, 1.0) * _NODES_PER_CELL / len(boxes))
+        return max(spread, sizes[len(sizes) // 2], 1.0)
+
+    @property
+    def size(self) -> int:
+        # Serialized entities at a rough 600 (node) and 200 (edge) bytes,
+        # plus room for the trimmed levels of detail.
+        return 900 * len(self.nodes) + 300 * len(self.edges) + 56 * len(self.nodes) + 24 * len(self.cells)
+
+    def _lod(self, lod: str) -> tuple[list, list]:
+        trimmed = self._trimmed.get(lod)
+        if trimmed is None:
+            with self._trim_lock:
+                trimmed = self._trimmed.get(lod)
+                if trimmed is None:
+                    node_fields, edge_fields = LOD_FIELDS[lod]
+                    trimmed = (
+                        [{field: node[field] for field in node_fields} for node in self.nodes],
+                        [{field: edge[field] for field in edge_fields} for edge in self.edges],
+                    )
+                    self._trimmed[lod] = trimmed
+        return trimmed
+
+    def _hits(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        bx0, by0, bx1, by1 = self.bounds
+        if x0 <= bx0 and y0 <= by0 and x1 >= bx1 and y1 >= by1:
+            return list(range(len(self.nodes)))
+        cell = self.cell
+        cx0, cx1 = math.floor(x0 / cell), math.floor(x1 / cell)
+        cy0, cy1 = math.floor(y0 / cell), math.floor(y1 / cell)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # Zoomed far out: walking the occupied cells is cheaper.
+            buckets = [
+                members for (cx, cy), members in self.cells.items() if cx0 <= cx <= cx1 and cy0 <= cy <= cy1
+            ]
+        else:
+            cells = self.cells
+            buckets = [
+                cells[(cx, cy)]
+                for cx in range(cx0, cx1 + 1)
+                for cy in range(cy0, cy1 + 1)
+                if (cx, cy) in cells
+            ]
+        min_x, min_y, max_x, max_y = self.min_x, self.min_y, self.max_x, self.max_y
+        candidates = {i for members in buckets for i in members}
+        candidates.update(self.large)
+        return sorted(
+            i for i in candidates if min_x[i] <= x1 and max_x[i] >= x0 and min_y[i] <= y1 and max_y[i] >= y0
+        )
+
+    def query(self, bbox: tuple[float, float, float, float], lod: str, limit: int) -> dict:
+        """Nodes whose box intersects ``bbox`` plus the edges touching them.
+
+        Edges whose other end is outside the result carry that end in
+        ``boundary_nodes`` (id and position only). Past ``limit`` nodes an
+        evenly spaced sample is returned instead, so a zoomed out view still
+        covers the whole box, with only the edges between sampled nodes.
+        """
+        hits = self._hits(*bbox)
+        total = len(hits)
+        truncated = total > limit
+        if truncated:
+            hits = hits[:: math.ceil(total / limit)]
+        nodes, edges = self._lod(lod)
+        selected = set(hits)
+        offsets, edge_numbers, others = self.incident.offsets, self.incident.edges, self.incident.targets
+        edge_ids: set[int] = set()
+        boundary: set[int] = set()
+        for i in hits:
+            for slot in range(offsets[i], offsets[i + 1]):
+                other = others[slot]
+                if other in selected:
+                    edge_ids.add(edge_numbers[slot])
+                elif not truncated:
+                    edge_ids.add(edge_numbers[slot])
+                    boundary.add(other)
+        return {
+            "lod": lod,
+            "nodes": [nodes[i] for i in hits],
+            "edges": [edges[e] for e in sorted(edge_ids)],
+            "boundary_nodes": [
+                {"id": self.nodes[i]["id"], "position": self.nodes[i]["position"]} for i in sorted(boundary)
+            ],
+            "total_nodes": total,
+            "truncated": truncated,
+        }
+
+
+def build_graph_spatial_index(graph_id: str, revision: int) -> GraphSpatialIndex:
+    node_rows, edge_rows = load_graph_rows(graph_id)
+    return GraphSpatialIndex(revision, node_rows, edge_rows)
+
+
+def get_graph_spatial_index_cache() -> RevisionCache[GraphSpatialIndex]:
+    cache = current_app.extensions.get("graph_spatial_index_cache")
+    if cache is None:
+        cache = RevisionCache(max_bytes=current_app.config["GRAPH_VIEWPORT_CACHE_MAX_BYTES"])
+        current_app.extensions["graph_spatial_index_cache"] = cache
+    return cache
+
+
+def get_graph_spatial_index(graph_id: str, revision: int) -> GraphSpatialIndex:
+    cache = get_graph_spatial_index_cache()
+    spatial = cache.get(graph_id, revision)
+    if spatial is None:
+        spatial = build_graph_spatial_index(graph_id, revision)
+        cache.put(graph_id, spatial)
+    return spatial
+
+
+def parse_bbox(raw: str | None) -> tuple[float, float, float, float]:
+    try:
+        x0, y0, x1, y1 = (float(part) for part in (raw or "").split(","))
+    except ValueError:
+        raise GraphServiceError("bbox must be min_x,min_y,max_x,max_y") from None
+    if not all(math.isfinite(value) for value in (x0, y0, x1, y1)) or x0 > x1 or y0 > y1:
+        raise GraphServiceError("bbox must be finite with min <= max")
+    return x0, y0, x1, y1
+
+
+def lod_for_zoom(zoom: float) -> str:
+    config = current_app.config
+    if zoom >= config["GRAPH_VIEWPORT_DETAIL_ZOOM"]:
+        return "full"
+    if zoom >= config["GRAPH_VIEWPORT_LABEL_ZOOM"]:
+        return "label"
+    return "shape"
@@ -1,9 +1,27 @@
 from __future__ import annotations
 
+import uuid
+from typing import AsyncIterator, Iterator
+
+from flask import current_app
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
 from ..extensions import db
-from ..models import Edge, Graph, Node, NodeLayout, User
+from ..models import Edge, Graph, Node, NodeLayout
 from ..models.graph import Visibility
 from ..models.node import NodeType
+from .auth import AuthUser
+
+try:  # Optional: see "Response compression" in the README.
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the deployment
+    msgpack = None
+
+# Representations of GET /api/graphs/<id> (?format=) and their media types.
+GRAPH_FORMATS = {"json": "application/json", "columnar": "application/json", "msgpack": "application/msgpack"}
+# Accepted ?stream= values: a chunked JSON document, or one NDJSON line per entity.
+GRAPH_STREAM_MODES = ("1", "true", "ndjson")
 
 
 class GraphServiceError(Exception):
@@ -29,88 +47,360 @@ def parse_node_type(raw_value: str) -> NodeType:
     raise GraphServiceError("node_type must be person, org, place, event, or custom")
 
 
-def _serialize_node(node: Node) -> dict:
-    layout = node.layout
-    position = None
+def _node_style(row) -> dict | None:
+    if row["x"] is None:
+        return None
     style = {}
-    if layout:
-        position = {"x": layout.x, "y": layout.y}
-        if layout.style and isinstance(layout.style, dict):
-            style.update(layout.style)
-        if layout.width is not None:
-            style["width"] = layout.width
-        if layout.height is not None:
-            style["height"] = layout.height
+    layout_style = row["layout_style"]
+    if layout_style and isinstance(layout_style, dict):
+        style.update(layout_style)
+    if row["width"] is not None:
+        style["width"] = row["width"]
+    if row["height"] is not None:
+        style["height"] = row["height"]
+    return style or None
+
+
+def _serialize_node_row(row) -> dict:
+    """Serialize a flat node row carrying its layout columns (x, y, ..., layout_style)."""
+    position = None if row["x"] is None else {"x": row["x"], "y": row["y"]}
     return {
-        "id": node.id,
-        "title": node.title,
-        "node_type": node.node_type.value,
-        "graph_id": node.graph_id,
-        "avatar_url": node.avatar_url,
-        "summary": node.summary,
-        "data": node.data or {},
+        "id": row["id"],
+        "title": row["title"],
+        "node_type": row["node_type"].value,
+        "graph_id": row["graph_id"],
+        "avatar_url": row["avatar_url"],
+        "summary": row["summary"],
+        "data": row["data"] or {},
         "position": position,
-        "style": style or None,
+        "style": _node_style(row),
+    }
+
+
+def _serialize_edge_row(row) -> dict:
+    meta = row["meta"] or {}
+    return {
+        "id": row["id"],
+        "source": row["from_node_id"],
+        "target": row["to_node_id"],
+        "label": row["label"],
+        "type": meta.get("type"),
+        "style": meta.get("style"),
+    }
+
+
+def _serialize_graph_info(graph: Graph) -> dict:
+    return {
+        "id": graph.id,
+        "name": graph.name,
+        "visibility": graph.visibility.value,
+        "owner_user_id": graph.owner_user_id,
+        "revision": graph.revision,
+        "created_at": graph.created_at.isoformat(),
+        "updated_at": graph.updated_at.isoformat(),
+    }
+
+
+def serialize_graph_rows(graph: Graph, node_rows: list, edge_rows: list) -> dict:
+    return {
+        "graph": _serialize_graph_info(graph),
+        "nodes": [_serialize_node_row(row) for row in node_rows],
+        "edges": [_serialize_edge_row(row) for row in edge_rows],
+    }
+
+
+def serialize_graph_columnar(graph: Graph, node_rows: list, edge_rows: list) -> dict:
+    """``serialize_graph_rows`` as one list per field instead of one object per entity.
+
+    Edge ``source``/``target`` are positions in ``nodes["id"]``, so node ids
+    are sent once; positions are split into ``x``/``y`` (null when unplaced)
+    and ``graph_id`` is left out of the nodes.
+    """
+    index = {row["id"]: i for i, row in enumerate(node_rows)}
+    edge_meta = [row["meta"] or {} for row in edge_rows]
+    return {
+        "format": "columnar",
+        "graph": _serialize_graph_info(graph),
+        "nodes": {
+            "id": list(index),
+            "title": [row["title"] for row in node_rows],
+            "node_type": [row["node_type"].value for row in node_rows],
+            "avatar_url": [row["avatar_url"] for row in node_rows],
+            "summary": [row["summary"] for row in node_rows],
+            "data": [row["data"] or {} for row in node_rows],
+            "x": [row["x"] for row in node_rows],
+            "y": [row["y"] for row in node_rows],
+            "style": [_node_style(row) for row in node_rows],
+        },
+        "edges": {
+            "id": [row["id"] for row in edge_rows],
+            "source": [index[row["from_node_id"]] for row in edge_rows],
+            "target": [index[row["to_node_id"]] for row in edge_rows],
+            "label": [row["label"] for row in edge_rows],
+            "type": [meta.get("type") for meta in edge_meta],
+            "style": [meta.get("style") for meta in edge_meta],
+        },
+    }
+
+
+def encode_graph_document(graph: Graph, node_rows: list, edge_rows: list, fmt: str) -> bytes:
+    """The full graph document in one of ``GRAPH_FORMATS``."""
+    if fmt == "json":
+        return (current_app.json.dumps(serialize_graph_rows(graph, node_rows, edge_rows)) + "\n").encode("utf-8")
+    document = serialize_graph_columnar(graph, node_rows, edge_rows)
+    if fmt == "msgpack":
+        if msgpack is None:
+            raise GraphServiceError("format=msgpack needs the msgpack package installed", status_code=501)
+        return msgpack.packb(document)
+    return (current_app.json.dumps(document) + "\n").encode("utf-8")
+
+
+def _node_rows_query():
+    return select(
+        Node.id,
+        Node.graph_id,
+        Node.node_type,
+        Node.title,
+        Node.avatar_url,
+        Node.summary,
+        Node.data,
+        NodeLayout.x,
+        NodeLayout.y,
+        NodeLayout.width,
+        NodeLayout.height,
+        NodeLayout.style.label("layout_style"),
+    ).outerjoin(NodeLayout, NodeLayout.node_id == Node.id)
+
+
+def _edge_rows_query():
+    return select(Edge.id, Edge.from_node_id, Edge.to_node_id, Edge.label, Edge.meta)
+
+
+def load_graph_rows(graph_id: str) -> tuple[list, list]:
+    """Load a graph's nodes (with layouts) and edges in two column-only queries."""
+    node_rows = db.session.execute(_node_rows_query().where(Node.graph_id == graph_id)).mappings()
+    edge_rows = db.session.execute(_edge_rows_query().where(Edge.graph_id == graph_id)).mappings()
+    return node_rows.all(), edge_rows.all()
+
+
+def _iter_row_chunks(statement, chunk_size: int) -> Iterator[list]:
+    # yield_per switches the driver to a server-side cursor, so only one chunk
+    # of rows is held in memory at a time.
+    result = db.session.execute(statement, execution_options={"yield_per": chunk_size})
+    yield from result.mappings().partitions()
+
+
+def iter_graph_json(graph: Graph, chunk_size: int) -> Iterator[str]:
+    """Yield the ``serialize_graph_rows`` document piece by piece."""
+    dumps = current_app.json.dumps
+    yield '{"graph":' + dumps(_serialize_graph_info(graph)) + ',"nodes":['
+    separator = ""
+    for rows in _iter_row_chunks(_node_rows_query().where(Node.graph_id == graph.id), chunk_size):
+        yield separator + ",".join(dumps(_serialize_node_row(row)) for row in rows)
+        separator = ","
+    yield '],"edges":['
+    separator = ""
+    for rows in _iter_row_chunks(_edge_rows_query().where(Edge.graph_id == graph.id), chunk_size):
+        yield separator + ",".join(dumps(_serialize_edge_row(row)) for row in rows)
+        separator = ","
+    yield "]}"
+
+
+def iter_graph_ndjson(graph: Graph, chunk_size: int) -> Iterator[str]:
+    """Yield one ``{"type": ..., "data": ...}`` line per graph, node and edge."""
+    dumps = current_app.json.dumps
+    yield dumps({"type": "graph", "data": _serialize_graph_info(graph)}) + "\n"
+    for rows in _iter_row_chunks(_node_rows_query().where(Node.graph_id == graph.id), chunk_size):
+        yield "".join(
+            dumps({"type": "node", "data": _serialize_node_row(row)}) + "\n" for row in rows
+        )
+    for rows in _iter_row_chunks(_edge_rows_query().where(Edge.graph_id == graph.id), chunk_size):
+        yield "".join(
+            dumps({"type": "edge", "data": _serialize_edge_row(row)}) + "\n" for row in rows
+        )
+
+
+async def _aiter_row_chunks(conn: AsyncConnection, statement, chunk_size: int) -> AsyncIterator[list]:
+    result = await conn.stream(statement.execution_options(yield_per=chunk_size))
+    async for rows in result.mappings().partitions():
+        yield rows
+
+
+async def aiter_graph_json(conn: AsyncConnection, graph, chunk_size: int) -> AsyncIterator[str]:
+    """``iter_graph_json`` on an async connection; ``graph`` may be a ``graphs`` row."""
+    dumps = current_app.json.dumps
+    yield '{"graph":' + dumps(_serialize_graph_info(graph)) + ',"nodes":['
+    separator = ""
+    statement = _node_rows_query().where(Node.graph_id == graph.id)
+    async for rows in _aiter_row_chunks(conn, statement, chunk_size):
+        yield separator + ",".join(dumps(_serialize_node_row(row)) for row in rows)
+        separator = ","
+    yield '],"edges":['
+    separator = ""
+    statement = _edge_rows_query().where(Edge.graph_id == graph.id)
+    async for rows in _aiter_row_chunks(conn, statement, chunk_size):
+        yield separator + ",".join(dumps(_serialize_edge_row(row)) for row in rows)
+        separator = ","
+    yield "]}"
+
+
+async def aiter_graph_ndjson(conn: AsyncConnection, graph, chunk_size: int) -> AsyncIterator[str]:
+    """``iter_graph_ndjson`` on an async connection."""
+    dumps = current_app.json.dumps
+    yield dumps({"type": "graph", "data": _serialize_graph_info(graph)}) + "\n"
+    statement = _node_rows_query().where(Node.graph_id == graph.id)
+    async for rows in _aiter_row_chunks(conn, statement, chunk_size):
+        yield "".join(dumps({"type": "node", "data": _serialize_node_row(row)}) + "\n" for row in rows)
+    statement = _edge_rows_query().where(Edge.graph_id == graph.id)
+    async for rows in _aiter_row_chunks(conn, statement, chunk_size):
+        yield "".join(dumps({"type": "edge", "data": _serialize_edge_row(row)}) + "\n" for row in rows)
+
+
+async def aget_owned_graph_row(conn: AsyncConnection, user_id: int, graph_id: str):
+    """The user's ``graphs`` row, or ``None``; attribute access matches ``Graph``."""
+    result = await conn.execute(
+        select(*Graph.__table__.c).where(Graph.id == graph_id, Graph.owner_user_id == user_id)
+    )
+    return result.first()
+
+
+def get_owned_graph(user: AuthUser, graph_id: str) -> Graph:
+    graph = Graph.query.filter_by(id=graph_id, owner_user_id=user.id).first()
+    if not graph:
+        raise GraphServiceError("graph not found", status_code=404)
+    return graph
+
+
+def get_graph_revision(user: AuthUser, graph_id: str) -> int:
+    """Cheap existence/ownership check that reads only the revision counter."""
+    revision = db.session.execute(
+        select(Graph.revision).where(Graph.id == graph_id, Graph.owner_user_id == user.id)
+    ).scalar()
+    if revision is None:
+        raise GraphServiceError("graph not found", status_code=404)
+    return revision
+
+
+def _bulk_insert(model, rows: list[dict]) -> None:
+    if not rows:
+        return
+    batch_size = max(1, current_app.config["GRAPH_BULK_INSERT_BATCH_SIZE"])
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(insert(model), rows[start : start + batch_size])
+
+
+def _parse_layout_style(style) -> tuple[dict, float | None, float | None]:
+    layout_style = dict(style) if isinstance(style, dict) else {}
+    width = layout_style.pop("width", None)
+    height = layout_style.pop("height", None)
+    return (
+        layout_style,
+        float(width) if width is not None else None,
+        float(height) if height is not None else None,
+    )
+
+
+def _parse_position(position) -> dict:
+    position = position if isinstance(position, dict) else {}
+    x = position.get("x")
+    y = position.get("y")
+    if x is None or y is None:
+        raise GraphServiceError("node position requires x and y")
+    try:
+        return {"x": float(x), "y": float(y)}
+    except (TypeError, ValueError):
+        raise GraphServiceError("node position x and y must be numbers") from None
+
+
+def _build_node_rows(node_payload, graph_id: str) -> tuple[dict, dict]:
+    if not isinstance(node_payload, dict):
+        raise GraphServiceError("each node must be an object")
+    title = (node_payload.get("title") or "").strip()
+    if not title:
+        raise GraphServiceError("node title is required")
+
+    position = _parse_position(node_payload.get("position"))
+    layout_style, width, height = _parse_layout_style(node_payload.get("style") or {})
+
+    node_row = {
+        "id": str(uuid.uuid4()),
+        "graph_id": graph_id,
+        "node_type": parse_node_type(node_payload.get("node_type")),
+        "title": title,
+        "avatar_url": node_payload.get("avatar_url"),
+        "summary": node_payload.get("summary"),
+        "data": node_payload.get("data") or {},
+    }
+    layout_row = {
+        "node_id": node_row["id"],
+        "x": position["x"],
+        "y": position["y"],
+        "width": width,
+        "height": height,
+        "style": layout_style or None,
+    }
+    return node_row, layout_row
+
+
+def _flat_node_row(node_row: dict, layout_row: dict) -> dict:
+    return {
+        **node_row,
+        "x": layout_row["x"],
+        "y": layout_row["y"],
+        "width": layout_row["width"],
+        "height": layout_row["height"],
+        "layout_style": layout_row["style"],
     }
 
 
-def serialize_graph(graph: Graph, nodes: list[Node], edges: list[Edge]) -> dict:
+def _build_edge_row(edge_payload: dict, graph_id: str, source_id: str, target_id: str) -> dict:
     return {
-        "graph": {
-            "id": graph.id,
-            "name": graph.name,
-            "visibility": graph.visibility.value,
-            "owner_user_id": graph.owner_user_id,
-            "created_at": graph.created_at.isoformat(),
-            "updated_at": graph.updated_at.isoformat(),
+        "id": str(uuid.uuid4()),
+        "graph_id": graph_id,
+        "from_node_id": source_id,
+        "to_node_id": target_id,
+        "label": edge_payload.get("label"),
+        "meta": {
+            "type": edge_payload.get("type"),
+            "style": edge_payload.get("style"),
         },
-        "nodes": [_serialize_node(node) for node in nodes],
-        "edges": [
-            {
-                "id": edge.id,
-                "source": edge.from_node_id,
-                "target": edge.to_node_id,
-                "label": edge.label,
-                "type": (edge.meta or {}).get("type"),
-                "style": (edge.meta or {}).get("style"),
-            }
-            for edge in edges
-        ],
     }
 
 
-def create_graph(user: User, data: dict) -> tuple[Graph, list[Node], list[Edge]]:
+def create_graph(user: AuthUser, data: dict) -> tuple[Graph, list[dict], list[dict]]:
+    """Create a graph with its nodes, layouts and edges.
+
+    Returns the graph plus flat node and edge rows for ``serialize_graph_rows``.
+    """
     graph_data = data.get("graph") or {}
     graph_name = (graph_data.get("name") or "").strip()
     if not graph_name:
         raise GraphServiceError("graph name is required")
 
     graph = Graph(
+        id=str(uuid.uuid4()),
         owner_user_id=user.id,
         name=graph_name,
         description=graph_data.get("description"),
         visibility=parse_visibility(graph_data.get("visibility")),
+        revision=1,
     )
-    db.session.add(graph)
-    db.session.flush()
 
     nodes_payload = data.get("nodes") or []
     edges_payload = data.get("edges") or []
     if not isinstance(nodes_payload, list) or not isinstance(edges_payload, list):
         raise GraphServiceError("nodes and edges must be lists")
 
-    created_nodes: list[Node] = []
-    created_edges: list[Edge] = []
-    node_ids: set[str] = set()
+    # Ids are assigned here instead of being read back after a flush, so the
+    # whole payload can be validated first and written with batched INSERTs.
+    node_rows: list[dict] = []
+    layout_rows: list[dict] = []
+    edge_rows: list[dict] = []
+    created_nodes: list[dict] = []
     client_id_map: dict[str, str] = {}
 
     for node_payload in nodes_payload:
-        if not isinstance(node_payload, dict):
-            raise GraphServiceError("each node must be an object")
-        title = (node_payload.get("title") or "").strip()
-        if not title:
-            raise GraphServiceError("node title is required")
-
+        node_row, layout_row = _build_node_rows(node_payload, graph.id)
         client_node_id = node_payload.get("id")
         if client_node_id is not None:
             client_node_id = str(client_node_id)
@@ -118,42 +408,10 @@ def create_graph(user: User, data: dict) -> tuple[Graph, list[Node], list[Edge]]
                 raise GraphServiceError(
                     f"node id '{client_node_id}' is duplicated in payload", status_code=409
                 )
-        node = Node(
-            id=None,
-            graph_id=graph.id,
-            node_type=parse_node_type(node_payload.get("node_type")),
-            title=title,
-            avatar_url=node_payload.get("avatar_url"),
-            summary=node_payload.get("summary"),
-            data=node_payload.get("data") or {},
-        )
-        db.session.add(node)
-        db.session.flush()
-        node_ids.add(node.id)
-        if client_node_id is not None:
-            client_id_map[client_node_id] = node.id
-        created_nodes.append(node)
-
-        position = node_payload.get("position") or {}
-        x = position.get("x")
-        y = position.get("y")
-        if x is None or y is None:
-            raise GraphServiceError("node position requires x and y")
-
-        style = node_payload.get("style") or {}
-        layout_style = dict(style) if isinstance(style, dict) else {}
-        width = layout_style.pop("width", None)
-        height = layout_style.pop("height", None)
-
-        layout = NodeLayout(
-            node_id=node.id,
-            x=float(x),
-            y=float(y),
-            width=float(width) if width is not None else None,
-            height=float(height) if height is not None else None,
-            style=layout_style or None,
-        )
-        db.session.add(layout)
+            client_id_map[client_node_id] = node_row["id"]
+        node_rows.append(node_row)
+        layout_rows.append(layout_row)
+        created_nodes.append(_flat_node_row(node_row, layout_row))
 
     for edge_payload in edges_payload:
         if not isinstance(edge_payload, dict):
@@ -166,18 +424,276 @@ def create_graph(user: User, data: dict) -> tuple[Graph, list[Node], list[Edge]]
         target_id = client_id_map.get(str(target)) if client_id_map else None
         if source_id is None or target_id is None:
             raise GraphServiceError("edge endpoints must reference known nodes")
+        edge_rows.append(_build_edge_row(edge_payload, graph.id, source_id, target_id))
+
+    db.session.add(graph)
+    _bulk_insert(Node, node_rows)
+    _bulk_insert(NodeLayout, layout_rows)
+    _bulk_insert(Edge, edge_rows)
+    db.session.commit()
+    return graph, created_nodes, edge_rows
+
+
+def _bulk_update(model, rows: list[dict]) -> None:
+    """UPDATE rows by primary key, one executemany per distinct set of columns."""
+    groups: dict[tuple, list[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    for group in groups.values():
+        db.session.execute(update(model), group)
 
-        edge = Edge(
-            from_node_id=source_id,
-            to_node_id=target_id,
-            label=edge_payload.get("label"),
-            meta={
-                "type": edge_payload.get("type"),
-                "style": edge_payload.get("style"),
-            },
+
+def _node_changes(changes) -> tuple[dict, dict]:
+    if not isinstance(changes, dict) or not changes:
+        raise GraphServiceError("update_node requires a non-empty changes object")
+    node_values: dict = {}
+    layout_values: dict = {}
+    if "title" in changes:
+        title = (changes.get("title") or "").strip()
+        if not title:
+            raise GraphServiceError("node title is required")
+        node_values["title"] = title
+    if "node_type" in changes:
+        node_values["node_type"] = parse_node_type(changes.get("node_type"))
+    for key in ("avatar_url", "summary"):
+        if key in changes:
+            node_values[key] = changes.get(key)
+    if "data" in changes:
+        node_values["data"] = changes.get("data") or {}
+    if "position" in changes:
+        layout_values.update(_parse_position(changes.get("position")))
+    if "style" in changes:
+        layout_style, width, height = _parse_layout_style(changes.get("style") or {})
+        layout_values.update(style=layout_style or None, width=width, height=height)
+    return node_values, layout_values
+
+
+class _GraphPatch:
+    """Folds a list of patch operations into per-table inserts, updates and deletes."""
+
+    def __init__(self, graph_id: str) -> None:
+        self.graph_id = graph_id
+        self.added_nodes: dict[str, tuple[dict, dict]] = {}
+        self.added_edges: dict[str, dict] = {}
+        self.node_updates: dict[str, dict] = {}
+        self.layout_updates: dict[str, dict] = {}
+        self.deleted_nodes: dict[str, None] = {}
+        self.removed_edges: dict[str, None] = {}
+        self.node_id_map: dict[str, str] = {}
+        self.edge_id_map: dict[str, str] = {}
+        self.existing_node_refs: set[str] = set()
+        self.existing_edge_refs: set[str] = set()
+
+    @staticmethod
+    def _ref(operation: dict, key: str = "id") -> str:
+        ref = operation.get(key)
+        if ref is None or ref == "":
+            raise GraphServiceError(f"{operation['op']} requires {key}")
+        return str(ref)
+
+    def _resolve_node(self, ref: str) -> str:
+        node_id = self.node_id_map.get(ref, ref)
+        if node_id in self.deleted_nodes:
+            raise GraphServiceError(f"node '{ref}' is deleted earlier in this patch")
+        if node_id not in self.added_nodes:
+            self.existing_node_refs.add(node_id)
+        return node_id
+
+    def _change_node(self, node_id: str, node_values: dict, layout_values: dict) -> None:
+        if node_id in self.added_nodes:
+            node_row, layout_row = self.added_nodes[node_id]
+            node_row.update(node_values)
+            layout_row.update(layout_values)
+            return
+        if node_values:
+            self.node_updates.setdefault(node_id, {}).update(node_values)
+        if layout_values:
+            self.layout_updates.setdefault(node_id, {}).update(layout_values)
+
+    def _drop_added_edges_touching(self, node_id: str) -> None:
+        for edge_id, row in list(self.added_edges.items()):
+            if node_id in (row["from_node_id"], row["to_node_id"]):
+                del self.added_edges[edge_id]
+
+    def apply(self, operation) -> None:
+        if not isinstance(operation, dict):
+            raise GraphServiceError("each operation must be an object")
+        op = operation.get("op")
+        if op == "add_node":
+            node_payload = operation.get("node")
+            node_row, layout_row = _build_node_rows(node_payload, self.graph_id)
+            client_id = node_payload.get("id")
+            if client_id is not None:
+                client_id = str(client_id)
+                if client_id in self.node_id_map:
+                    raise GraphServiceError(
+                        f"node id '{client_id}' is duplicated in payload", status_code=409
+                    )
+                self.node_id_map[client_id] = node_row["id"]
+            self.added_nodes[node_row["id"]] = (node_row, layout_row)
+        elif op == "update_node":
+            node_id = self._resolve_node(self._ref(operation))
+            self._change_node(node_id, *_node_changes(operation.get("changes")))
+        elif op == "move_node":
+            node_id = self._resolve_node(self._ref(operation))
+            self._change_node(node_id, {}, _parse_position(operation.get("position")))
+        elif op == "delete_node":
+            node_id = self._resolve_node(self._ref(operation))
+            self._drop_added_edges_touching(node_id)
+            if node_id in self.added_nodes:
+                del self.added_nodes[node_id]
+            else:
+                self.node_updates.pop(node_id, None)
+                self.layout_updates.pop(node_id, None)
+                self.deleted_nodes[node_id] = None
+        elif op == "add_edge":
+            edge_payload = operation.get("edge")
+            if not isinstance(edge_payload, dict):
+                raise GraphServiceError("add_edge requires an edge object")
+            source = edge_payload.get("source")
+            target = edge_payload.get("target")
+            if not source or not target:
+                raise GraphServiceError("edge source and target are required")
+            edge_row = _build_edge_row(
+                edge_payload,
+                self.graph_id,
+                self._resolve_node(str(source)),
+                self._resolve_node(str(target)),
+            )
+            client_id = edge_payload.get("id")
+            if client_id is not None:
+                self.edge_id_map[str(client_id)] = edge_row["id"]
+            self.added_edges[edge_row["id"]] = edge_row
+        elif op == "remove_edge":
+            ref = self._ref(operation)
+            edge_id = self.edge_id_map.get(ref, ref)
+            if edge_id in self.added_edges:
+                del self.added_edges[edge_id]
+            else:
+                self.existing_edge_refs.add(edge_id)
+                self.removed_edges[edge_id] = None
+        else:
+            raise GraphServiceError(
+                "op must be add_node, update_node, move_node, delete_node, add_edge, or remove_edge"
+            )
+
+    def validate_refs(self) -> None:
+        if self.existing_node_refs:
+            found = set(
+                db.session.scalars(
+                    select(Node.id).where(
+                        Node.graph_id == self.graph_id, Node.id.in_(self.existing_node_refs)
+                    )
+                )
+            )
+            missing = self.existing_node_refs - found
+            if missing:
+                raise GraphServiceError(f"node '{min(missing)}' not found", status_code=404)
+        if self.existing_edge_refs:
+            found = set(
+                db.session.scalars(
+                    select(Edge.id).where(
+                        Edge.graph_id == self.graph_id, Edge.id.in_(self.existing_edge_refs)
+                    )
+                )
+            )
+            missing = self.existing_edge_refs - found
+            if missing:
+                raise GraphServiceError(f"edge '{min(missing)}' not found", status_code=404)
+        if self.deleted_nodes:
+            incident = db.session.scalars(
+                select(Edge.id).where(
+                    Edge.graph_id == self.graph_id,
+                    or_(
+                        Edge.from_node_id.in_(self.deleted_nodes),
+                        Edge.to_node_id.in_(self.deleted_nodes),
+                    )
+                )
+            )
+            for edge_id in incident:
+                self.removed_edges[edge_id] = None
+
+    def write(self) -> None:
+        no_sync = {"synchronize_session": False}
+        if self.removed_edges:
+            db.session.execute(
+                delete(Edge).where(Edge.id.in_(self.removed_edges)), execution_options=no_sync
+            )
+        if self.deleted_nodes:
+            db.session.execute(
+                delete(NodeLayout).where(NodeLayout.node_id.in_(self.deleted_nodes)),
+                execution_options=no_sync,
+            )
+            db.session.execute(
+                delete(Node).where(Node.id.in_(self.deleted_nodes)), execution_options=no_sync
+            )
+        _bulk_insert(Node, [rows[0] for rows in self.added_nodes.values()])
+        _bulk_insert(NodeLayout, [rows[1] for rows in self.added_nodes.values()])
+        _bulk_insert(Edge, list(self.added_edges.values()))
+        _bulk_update(Node, [{"id": key, **values} for key, values in self.node_updates.items()])
+        _bulk_update(
+            NodeLayout,
+            [{"node_id": key, **values} for key, values in self.layout_updates.items()],
+        )
+
+
+def patch_graph(user: AuthUser, graph_id: str, data: dict) -> dict:
+    """Apply a batch of node/edge operations to a graph in one transaction.
+
+    Returns only the touched entities and the graph's new revision.
+    """
+    graph = get_owned_graph(user, graph_id)
+    operations = data.get("operations")
+    if not isinstance(operations, list) or not operations:
+        raise GraphServiceError("operations must be a non-empty list")
+    max_operations = current_app.config["GRAPH_PATCH_MAX_OPERATIONS"]
+    if len(operations) > max_operations:
+        raise GraphServiceError(f"a patch may contain at most {max_operations} operations")
+
+    current_revision = graph.revision
+    base_revision = data.get("base_revision")
+    if base_revision is not None:
+        try:
+            base_revision = int(base_revision)
+        except (TypeError, ValueError):
+            raise GraphServiceError("base_revision must be an integer") from None
+    if base_revision is not None and base_revision != current_revision:
+        raise GraphServiceError(
+            f"graph has changed (current revision {current_revision})", status_code=409
         )
-        db.session.add(edge)
-        created_edges.append(edge)
 
+    patch = _GraphPatch(graph.id)
+    for operation in operations:
+        patch.apply(operation)
+    patch.validate_refs()
+
+    # Bumping the revision first takes the graph row lock, so concurrent patches
+    # serialize here and the loser sees a stale revision instead of a lost update.
+    bumped = db.session.execute(
+        update(Graph)
+        .where(Graph.id == graph.id, Graph.revision == current_revision)
+        .values(revision=Graph.revision + 1),
+        execution_options={"synchronize_session": False},
+    )
+    if bumped.rowcount != 1:
+        db.session.rollback()
+        raise GraphServiceError("graph was modified concurrently, retry", status_code=409)
+    patch.write()
     db.session.commit()
-    return graph, created_nodes, created_edges
+
+    changed_ids = (set(patch.node_updates) | set(patch.layout_updates)) - set(patch.deleted_nodes)
+    node_rows = [_flat_node_row(*rows) for rows in patch.added_nodes.values()]
+    if changed_ids:
+        node_rows.extend(
+            db.session.execute(_node_rows_query().where(Node.id.in_(changed_ids))).mappings()
+        )
+
+    return {
+        "graph_id": graph_id,
+        "revision": current_revision + 1,
+        "nodes": [_serialize_node_row(row) for row in node_rows],
+        "edges": [_serialize_edge_row(row) for row in patch.added_edges.values()],
+        "deleted_node_ids": list(patch.deleted_nodes),
+        "deleted_edge_ids": list(patch.removed_edges),
+        "id_map": {"nodes": patch.node_id_map, "edges": patch.edge_id_map},
+    }
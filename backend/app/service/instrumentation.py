@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import Flask, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+# Sample of a request served outside Flask (the ASGI handlers), which has no ``g``.
+_async_sample: ContextVar["_RequestSample | None"] = ContextVar("metrics_async_sample", default=None)
+
+
+class _RequestSample:
+    __slots__ = ("started", "queries", "db_seconds", "serialize_seconds", "statements")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+
+class _EndpointStats:
+    __slots__ = (
+        "requests",
+        "latency_buckets",
+        "latency_sum",
+        "query_buckets",
+        "queries",
+        "db_seconds",
+        "serialize_seconds",
+        "response_bytes",
+        "n_plus_one",
+    )
+
+    def __init__(self) -> None:
+        self.requests: Counter[str] = Counter()
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.query_buckets = [0] * len(QUERY_BUCKETS)
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.response_bytes = 0
+        self.n_plus_one = 0
+
+
+def _observe(buckets: list[int], bounds: tuple, value: float) -> None:
+    for index, bound in enumerate(bounds):
+        if value <= bound:
+            buckets[index] += 1
+
+
+class RequestMetrics:
+    """Per-endpoint request latency, DB queries/time, JSON time and bytes.
+
+    A request's numbers are collected on ``g`` while it runs (SQLAlchemy
+    cursor events and the app's JSON provider report into it) and folded into
+    the per-endpoint totals once the response has been fully sent, so
+    streamed responses are measured end to end.
+    """
+
+    def __init__(self, n_plus_one_threshold: int) -> None:
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._endpoints: dict[tuple[str, str], _EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, method: str, status: int, sample: _RequestSample, response_bytes: int) -> None:
+        latency = time.perf_counter() - sample.started
+        repeated = [(statement, count) for statement, count in sample.statements.items() if count >= self.n_plus_one_threshold]
+        for statement, count in repeated:
+            logger.warning(
+                "possible N+1: %s %s ran the same query %d times: %s",
+                method,
+                endpoint,
+                count,
+                " ".join(statement.split())[:200],
+            )
+        with self._lock:
+            stats = self._endpoints.get((endpoint, method))
+            if stats is None:
+                stats = self._endpoints[(endpoint, method)] = _EndpointStats()
+            stats.requests[str(status)] += 1
+            _observe(stats.latency_buckets, LATENCY_BUCKETS, latency)
+            stats.latency_sum += latency
+            _observe(stats.query_buckets, QUERY_BUCKETS, sample.queries)
+            stats.queries += sample.queries
+            stats.db_seconds += sample.db_seconds
+            stats.serialize_seconds += sample.serialize_seconds
+            stats.response_bytes += response_bytes
+            stats.n_plus_one += len(repeated)
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            def family(name: str, kind: str, help_text: str) -> None:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+            family("app_requests_total", "counter", "Requests by endpoint, method and status.")
+            for (endpoint, method), stats in endpoints:
+                for status, count in sorted(stats.requests.items()):
+                    lines.append(f'app_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            family("app_request_duration_seconds", "histogram", "Time from request start to the last response byte.")
+            for (endpoint, method), stats in endpoints:
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                for bound, count in zip(LATENCY_BUCKETS, stats.latency_buckets):
+                    lines.append(f'app_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                total = sum(stats.requests.values())
+                lines.append(f'app_request_duration_seconds_bucket{{{labels},le="+Inf"}} {total}')
+                lines.append(f"app_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+                lines.append(f"app_request_duration_seconds_count{{{labels}}} {total}")
+
+            family("app_db_queries_per_request", "histogram", "SQL statements executed per request.")
+            for (endpoint, method), stats in endpoints:
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                for bound, count in zip(QUERY_BUCKETS, stats.query_buckets):
+                    lines.append(f'app_db_queries_per_request_bucket{{{labels},le="{bound}"}} {count}')
+                total = sum(stats.requests.values())
+                lines.append(f'app_db_queries_per_request_bucket{{{labels},le="+Inf"}} {total}')
+                lines.append(f"app_db_queries_per_request_sum{{{labels}}} {stats.queries}")
+                lines.append(f"app_db_queries_per_request_count{{{labels}}} {total}")
+
+            for name, attribute, help_text in (
+                ("app_db_seconds_total", "db_seconds", "Time spent executing SQL."),
+                ("app_serialization_seconds_total", "serialize_seconds", "Time spent encoding JSON."),
+                ("app_response_bytes_total", "response_bytes", "Response body bytes sent."),
+                ("app_n_plus_one_warnings_total", "n_plus_one", "Requests that repeated one query past the threshold."),
+            ):
+                family(name, "counter", help_text)
+                for (endpoint, method), stats in endpoints:
+                    value = getattr(stats, attribute)
+                    value = f"{value:.6f}" if isinstance(value, float) else value
+                    lines.append(f'{name}{{endpoint="{endpoint}",method="{method}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """The default provider, charging encode time to the current request."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        if not has_request_context() or "metrics_sample" not in g:
+            return super().dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            g.metrics_sample.serialize_seconds += time.perf_counter() - start
+
+
+def _current_sample() -> _RequestSample | None:
+    if has_request_context():
+        return g.get("metrics_sample")
+    return _async_sample.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_sample() is not None:
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get("metrics_query_start")
+    sample = _current_sample()
+    if not starts or sample is None:
+        return
+    sample.db_seconds += time.perf_counter() - starts.pop()
+    sample.queries += 1
+    sample.statements[statement] += 1
+
+
+def _counting(iterable, counter: list[int]):
+    for chunk in iterable:
+        counter[0] += len(chunk)
+        yield chunk
+
+
+def init_instrumentation(app: Flask) -> None:
+    if not app.config["METRICS_ENABLED"]:
+        return
+    metrics = RequestMetrics(app.config["METRICS_N_PLUS_ONE_THRESHOLD"])
+    app.extensions["request_metrics"] = metrics
+    app.json = TimedJSONProvider(app)
+    # Engine class events cover the primary, replica and any later engine.
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _start_sample() -> None:
+        g.metrics_sample = _RequestSample()
+
+    @app.after_request
+    def _finish_sample(response):
+        sample = g.get("metrics_sample")
+        if sample is None:
+            return response
+        endpoint = request.url_rule.endpoint if request.url_rule else "unmatched"
+        method = request.method
+        status = response.status_code
+        if response.is_streamed:
+            sent = [0]
+            response.response = _counting(response.response, sent)
+            # Finish after the last chunk; streamed views keep adding DB time
+            # to the same sample through stream_with_context.
+            response.call_on_close(lambda: metrics.record(endpoint, method, status, sample, sent[0]))
+        else:
+            size = response.calculate_content_length() or 0
+            response.call_on_close(lambda: metrics.record(endpoint, method, status, sample, size))
+        return response
+
+
+@contextmanager
+def async_request_sample(app: Flask):
+    """Collect a sample for a request served by a native async handler.
+
+    Yields None when metrics are off. Statements run on the async engine are
+    charged to the sample, also from tasks started inside the block (they copy
+    the context); the caller records it with ``RequestMetrics.record``.
+    """
+    if "request_metrics" not in app.extensions:
+        yield None
+        return
+    sample = _RequestSample()
+    token = _async_sample.set(sample)
+    try:
+        yield sample
+    finally:
+        _async_sample.reset(token)
+
+
+def render_metrics(app: Flask, pools: dict) -> str:
+    metrics = app.extensions.get("request_metrics")
+    text = metrics.render() if metrics is not None else ""
+    lines = []
+    for name, key, kind, help_text in (
+        ("app_db_pool_checkouts_total", "checkouts", "counter", "Connections checked out of the pool."),
+        ("app_db_pool_timeouts_total", "timeouts", "counter", "Checkouts that timed out waiting for a connection."),
+        ("app_db_pool_wait_max_ms", "max_wait_ms", "gauge", "Longest wait for a pooled connection."),
+        ("app_db_pool_checked_out", "checked_out", "gauge", "Connections currently in use."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for engine, stats in sorted(pools.items()):
+            if key in stats:
+                lines.append(f'{name}{{engine="{engine}"}} {stats[key]}')
+    return text + "\n".join(lines) + "\n"
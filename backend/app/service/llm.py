@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import httpx
+from flask import current_app
+from google import genai
+from google.genai import types
+
+from .chat_admission import ChatOverloaded, get_chat_admission
+
+ALLOWED_MODELS = {
+    "gemini-3-pro-preview",
+    "gemini-2.5-flash",
+    "gemini-2.0-flash",
+}
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+_init_lock = threading.Lock()
+
+
+class GeminiClientPool:
+    """Process-wide pool of ``genai.Client`` instances.
+
+    Each client owns a keep-alive HTTP connection pool, so reusing clients across
+    requests avoids a TLS handshake per chat call. ``GEMINI_BASE_URL`` points the
+    clients at another endpoint (e.g. ``benchmarks/fake_gemini.py``).
+    """
+
+    def __init__(
+        self, api_key: str, size: int, base_url: str | None, timeout_ms: int, checkout_timeout: float
+    ) -> None:
+        self.api_key = api_key
+        self.size = size
+        self.base_url = base_url
+        self.timeout_ms = timeout_ms
+        self.checkout_timeout = checkout_timeout
+        self._idle: queue.LifoQueue[genai.Client] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._async_clients: list[genai.Client] = []
+        self._async_rotation = itertools.count()
+        self.created = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+
+    def _create(self, **http_options) -> genai.Client:
+        http_options = types.HttpOptions(timeout=self.timeout_ms, **http_options)
+        if self.base_url:
+            http_options.base_url = self.base_url
+        return genai.Client(api_key=self.api_key, http_options=http_options)
+
+    def async_client(self) -> genai.Client:
+        """A client for ``client.aio`` calls from the ASGI handlers.
+
+        Coroutines share clients instead of checking them out; calls rotate over
+        ``size`` clients because httpx's pool bookkeeping grows with the square of
+        the connections held by one client. Connection limits are lifted since
+        chat admission control already bounds concurrent upstream calls.
+        """
+        if not self._async_clients:
+            with self._lock:
+                if not self._async_clients:
+                    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+                    self._async_clients = [
+                        self._create(async_client_args={"limits": limits}) for _ in range(self.size)
+                    ]
+        return self._async_clients[next(self._async_rotation) % self.size]
+
+    def checkout(self) -> "ClientLease":
+        """Take an idle client, create one while under ``size``, else wait.
+
+        Waits at most ``checkout_timeout`` and then raises ``ChatOverloaded``,
+        like a caller shed by chat admission. The lease must be released.
+        """
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self.created < self.size
+                if can_create:
+                    self.created += 1
+            if can_create:
+                try:
+                    client = self._create()
+                except BaseException:
+                    with self._lock:
+                        self.created -= 1
+                    raise
+            else:
+                self.waits += 1
+                try:
+                    client = self._idle.get(timeout=self.checkout_timeout)
+                except queue.Empty:
+                    self.timeouts += 1
+                    raise ChatOverloaded(max(1, math.ceil(self.checkout_timeout))) from None
+        self.checkouts += 1
+        return ClientLease(self, client)
+
+    @contextmanager
+    def client(self) -> Iterator[genai.Client]:
+        lease = self.checkout()
+        try:
+            yield lease.client
+        finally:
+            lease.release()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "created": self.created,
+            "idle": self._idle.qsize(),
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+        }
+
+
+class ClientLease:
+    """A checked-out client; ``release`` returns it to the pool exactly once."""
+
+    def __init__(self, pool: GeminiClientPool, client: genai.Client) -> None:
+        self.client = client
+        self._pool = pool
+        self._released = False
+        self._release_lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._release_lock:
+            if self._released:
+                return
+            self._released = True
+        self._pool._idle.put(self.client)
+
+
+def get_gemini_pool() -> GeminiClientPool:
+    pool = current_app.extensions.get("gemini_pool")
+    if pool is not None:
+        return pool
+    with _init_lock:
+        pool = current_app.extensions.get("gemini_pool")
+        if pool is None:
+            api_key = os.getenv("GEMINI_API_KEY", "").strip()
+            if not api_key:
+                raise RuntimeError("GEMINI_API_KEY is not configured")
+            config = current_app.config
+            # By default one client per call chat admission lets through, so an
+            # admitted call never waits for a client.
+            size = config["GEMINI_CLIENT_POOL_SIZE"] or get_chat_admission().capacity(ALLOWED_MODELS)
+            pool = GeminiClientPool(
+                api_key=api_key,
+                size=size,
+                base_url=config["GEMINI_BASE_URL"],
+                timeout_ms=config["GEMINI_TIMEOUT_MS"],
+                checkout_timeout=config["CHAT_QUEUE_TIMEOUT_SECONDS"],
+            )
+            current_app.extensions["gemini_pool"] = pool
+    return pool
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from flask import current_app
+
+_init_lock = threading.Lock()
+
+
+class LoginThrottled(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("too many login attempts, try again later")
+        self.retry_after = retry_after
+
+
+def _roll(state: tuple[int, int, int], window_index: int) -> tuple[int, int, int]:
+    """Advance a (window_index, current, previous) counter to ``window_index``."""
+    index, current, previous = state
+    if index == window_index:
+        return state
+    if index == window_index - 1:
+        return window_index, 0, current
+    return window_index, 0, 0
+
+
+def _estimate(state: tuple[int, int, int], elapsed_fraction: float) -> float:
+    """Sliding-window count: the previous window weighted by how much of it still overlaps."""
+    _, current, previous = state
+    return previous * (1 - elapsed_fraction) + current
+
+
+def _retry_after(state: tuple[int, int, int], limit: int, window: float, elapsed_fraction: float) -> int:
+    """Seconds until one more attempt would fit under ``limit``."""
+    _, current, previous = state
+    if current + 1 > limit:
+        # Wait out this window; the whole current count then becomes "previous".
+        fraction_needed = 1 + (1 - (limit - 1) / current)
+    else:
+        fraction_needed = 1 - (limit - 1 - current) / previous
+    return max(1, math.ceil((fraction_needed - elapsed_fraction) * window))
+
+
+class LoginThrottleBackend(Protocol):
+    def hit(self, limits: list[tuple[str, int]], window: float) -> int | None: ...
+    def count(self, key: str, window: float) -> float: ...
+    def reset(self, key: str) -> None: ...
+    def size(self) -> int: ...
+
+
+def _window_position(window: float) -> tuple[int, float]:
+    now = time.time()
+    return int(now // window), (now % window) / window
+
+
+class MemoryLoginThrottleBackend:
+    """Per-process sliding-window counters, LRU-capped at ``max_keys``."""
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._counters: OrderedDict[str, tuple[int, int, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, limits: list[tuple[str, int]], window: float) -> int | None:
+        """Count one attempt against every key, or none if any key is over its limit.
+
+        Returns None when admitted, else the Retry-After in seconds.
+        """
+        window_index, fraction = _window_position(window)
+        with self._lock:
+            states = [_roll(self._counters.get(key, (window_index, 0, 0)), window_index) for key, _ in limits]
+            for state, (_, limit) in zip(states, limits):
+                if _estimate(state, fraction) + 1 > limit:
+                    return _retry_after(state, limit, window, fraction)
+            for state, (key, _) in zip(states, limits):
+                self._counters[key] = (window_index, state[1] + 1, state[2])
+                self._counters.move_to_end(key)
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+                self.evictions += 1
+        return None
+
+    def count(self, key: str, window: float) -> float:
+        window_index, fraction = _window_position(window)
+        with self._lock:
+            state = self._counters.get(key)
+        return _estimate(_roll(state, window_index), fraction) if state else 0.0
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._counters)
+
+
+class SQLiteLoginThrottleBackend:
+    """Sliding-window counters in a local SQLite file, shared by every worker on the host."""
+
+    # Stale counters are swept on every Nth hit rather than on each one.
+    _SWEEP_EVERY = 500
+
+    def __init__(self, path: str, max_keys: int) -> None:
+        self.path = path
+        self.max_keys = max_keys
+        self._local = threading.local()
+        self._hits = 0
+        self.evictions = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS login_throttle ("
+                " key TEXT PRIMARY KEY, window_index INTEGER NOT NULL,"
+                " current INTEGER NOT NULL, previous INTEGER NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _state(self, conn: sqlite3.Connection, key: str, window_index: int) -> tuple[int, int, int]:
+        row = conn.execute(
+            "SELECT window_index, current, previous FROM login_throttle WHERE key = ?", (key,)
+        ).fetchone()
+        return _roll(tuple(row), window_index) if row else (window_index, 0, 0)
+
+    def hit(self, limits: list[tuple[str, int]], window: float) -> int | None:
+        window_index, fraction = _window_position(window)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            states = [self._state(conn, key, window_index) for key, _ in limits]
+            for state, (_, limit) in zip(states, limits):
+                if _estimate(state, fraction) + 1 > limit:
+                    conn.execute("COMMIT")
+                    return _retry_after(state, limit, window, fraction)
+            conn.executemany(
+                "INSERT OR REPLACE INTO login_throttle (key, window_index, current, previous) VALUES (?, ?, ?, ?)",
+                [(key, window_index, state[1] + 1, state[2]) for state, (key, _) in zip(states, limits)],
+            )
+            self._hits += 1
+            if self._hits % self._SWEEP_EVERY == 0:
+                self._sweep(conn, window_index)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return None
+
+    def _sweep(self, conn: sqlite3.Connection, window_index: int) -> None:
+        # Counters two windows old estimate to zero.
+        conn.execute("DELETE FROM login_throttle WHERE window_index < ?", (window_index - 1,))
+        evicted = conn.execute(
+            "DELETE FROM login_throttle WHERE key IN ("
+            " SELECT key FROM login_throttle ORDER BY window_index DESC LIMIT -1 OFFSET ?)",
+            (self.max_keys,),
+        ).rowcount
+        self.evictions += max(evicted, 0)
+
+    def count(self, key: str, window: float) -> float:
+        window_index, fraction = _window_position(window)
+        return _estimate(self._state(self._connect(), key, window_index), fraction)
+
+    def reset(self, key: str) -> None:
+        self._connect().execute("DELETE FROM login_throttle WHERE key = ?", (key,))
+
+    def size(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM login_throttle").fetchone()[0]
+
+
+def _key(kind: str, value: str) -> str:
+    # Hashed so the shared SQLite file does not hold plain emails and IPs.
+    return kind + ":" + hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+class LoginThrottle:
+    """Sliding-window limits on login attempts per email and per client IP.
+
+    ``attempt`` runs before the user lookup and password hash, so a
+    credential-stuffing burst is turned away without touching the database
+    or the hasher pool. A successful login clears its email's counter.
+    """
+
+    def __init__(self, backend: LoginThrottleBackend, window: float, max_per_email: int, max_per_ip: int) -> None:
+        self.backend = backend
+        self.window = window
+        self.max_per_email = max_per_email
+        self.max_per_ip = max_per_ip
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.lockouts = 0
+
+    def attempt(self, email: str, ip: str | None) -> None:
+        limits = [(_key("email", email), self.max_per_email)]
+        if ip:
+            limits.append((_key("ip", ip), self.max_per_ip))
+        retry_after = self.backend.hit(limits, self.window)
+        with self._lock:
+            if retry_after is None:
+                self.admitted += 1
+            else:
+                self.rejected += 1
+        if retry_after is not None:
+            raise LoginThrottled(retry_after)
+
+    def recent_attempts(self, email: str) -> int:
+        """Attempts on ``email`` in the current window, including the one in progress."""
+        return math.ceil(self.backend.count(_key("email", email), self.window))
+
+    def succeeded(self, email: str) -> None:
+        self.backend.reset(_key("email", email))
+
+    def locked_out(self) -> None:
+        with self._lock:
+            self.lockouts += 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "window_seconds": self.window,
+            "max_per_email": self.max_per_email,
+            "max_per_ip": self.max_per_ip,
+            "keys": self.backend.size(),
+            "evictions": self.backend.evictions,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "lockouts_persisted": self.lockouts,
+        }
+
+
+def _build_login_throttle() -> LoginThrottle | None:
+    config = current_app.config
+    kind = config["LOGIN_THROTTLE_BACKEND"]
+    if kind == "none":
+        return None
+    if kind == "sqlite":
+        path = config["LOGIN_THROTTLE_PATH"] or os.path.join(current_app.instance_path, "login_throttle.sqlite3")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        backend = SQLiteLoginThrottleBackend(path, config["LOGIN_THROTTLE_MAX_KEYS"])
+    elif kind == "memory":
+        backend = MemoryLoginThrottleBackend(config["LOGIN_THROTTLE_MAX_KEYS"])
+    else:
+        raise RuntimeError(f"Unknown LOGIN_THROTTLE_BACKEND: {kind}")
+    return LoginThrottle(
+        backend,
+        window=config["LOGIN_THROTTLE_WINDOW_SECONDS"],
+        max_per_email=config["LOGIN_THROTTLE_MAX_PER_EMAIL"],
+        max_per_ip=config["LOGIN_THROTTLE_MAX_PER_IP"],
+    )
+
+
+def get_login_throttle() -> LoginThrottle | None:
+    """Return the app's login throttle, or ``None`` when ``LOGIN_THROTTLE_BACKEND=none``."""
+    if "login_throttle" not in current_app.extensions:
+        with _init_lock:
+            if "login_throttle" not in current_app.extensions:
+                current_app.extensions["login_throttle"] = _build_login_throttle()
+    return current_app.extensions["login_throttle"]
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("password hashing is saturated, try again later")
+        self.retry_after = retry_after
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHasher:
+    """Runs password hashes off the request thread on a bounded process pool.
+
+    At most ``max_pending`` hashes may be running or queued; callers that cannot
+    get a slot within ``queue_timeout`` get ``PasswordHasherBusy`` instead of
+    piling up behind a login storm. With ``workers=0`` hashes run inline (still
+    behind the same admission limit). A pool broken by a dead worker is
+    replaced and the hash retried once. A pooled hash that has not finished
+    after ``hash_timeout`` also gets ``PasswordHasherBusy``.
+    """
+
+    def __init__(
+        self, method: str, workers: int, max_pending: int, queue_timeout: float, hash_timeout: float = 30.0
+    ) -> None:
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.hash_timeout = hash_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._prefix: str | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.pool_restarts = 0
+        self.timeouts = 0
+        self.total_queue_ms = 0.0
+        self.max_queue_ms = 0.0
+        self.total_hash_ms = 0.0
+        if workers > 0:
+            atexit.register(self.stop)
+
+    @property
+    def prefix(self) -> str:
+        """Method/cost prefix of hashes produced with the current settings."""
+        if self._prefix is None:
+            self._prefix = generate_password_hash("", method=self.method).split("$", 1)[0]
+        return self._prefix
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # spawn: workers must not inherit the app's locks and threads.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        with self._executor_lock:
+            # Concurrent callers see the same broken pool; replace it once.
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, func, *args):
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(_timed, func, *args)
+                return future.result(timeout=self.hash_timeout)
+            except BrokenProcessPool:
+                self._replace_executor(executor)
+                if attempt:
+                    logger.error("password hash pool broke again after a restart")
+                    break
+                logger.warning("password hash worker died, restarting the pool")
+            except FutureTimeout:
+                with self._stats_lock:
+                    self.timeouts += 1
+                if not future.cancel():
+                    # Already running, so a worker is stuck: later hashes must
+                    # not queue behind it. The old pool exits once it finishes.
+                    logger.error("password hash ran past %.1fs, restarting the pool", self.hash_timeout)
+                    self._replace_executor(executor)
+                break
+        raise PasswordHasherBusy(retry_after=max(1, round(self.queue_timeout)))
+
+    def _run(self, func, *args):
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._stats_lock:
+                self.rejected += 1
+            raise PasswordHasherBusy(retry_after=max(1, round(self.queue_timeout)))
+        with self._stats_lock:
+            self.in_flight += 1
+        try:
+            if self.workers > 0:
+                result, hash_seconds = self._submit(func, *args)
+            else:
+                result, hash_seconds = _timed(func, *args)
+        finally:
+            self._slots.release()
+            with self._stats_lock:
+                self.in_flight -= 1
+        total_ms = (time.perf_counter() - start) * 1000
+        queue_ms = max(0.0, total_ms - hash_seconds * 1000)
+        with self._stats_lock:
+            self.completed += 1
+            self.total_hash_ms += hash_seconds * 1000
+            self.total_queue_ms += queue_ms
+            self.max_queue_ms = max(self.max_queue_ms, queue_ms)
+        return result
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run(check_password_hash, pwhash, password)
+
+    def stop(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        return pwhash.split("$", 1)[0] != self.prefix
+
+    def stats(self) -> dict:
+        completed = self.completed
+        return {
+            "method": self.prefix,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "completed": completed,
+            "rejected": self.rejected,
+            "pool_restarts": self.pool_restarts,
+            "timeouts": self.timeouts,
+            "avg_queue_ms": round(self.total_queue_ms / completed, 3) if completed else 0.0,
+            "max_queue_ms": round(self.max_queue_ms, 3),
+            "avg_hash_ms": round(self.total_hash_ms / completed, 3) if completed else 0.0,
+        }
+
+
+def get_password_hasher() -> PasswordHasher:
+    hasher = current_app.extensions.get("password_hasher")
+    if hasher is None:
+        hasher = PasswordHasher(
+            method=current_app.config["PASSWORD_HASH_METHOD"],
+            workers=current_app.config["PASSWORD_HASH_WORKERS"],
+            max_pending=current_app.config["PASSWORD_HASH_MAX_PENDING"],
+            queue_timeout=current_app.config["PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS"],
+            hash_timeout=current_app.config["PASSWORD_HASH_TIMEOUT_SECONDS"],
+        )
+        current_app.extensions["password_hasher"] = hasher
+    return hasher
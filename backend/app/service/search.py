@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import base64
+import json
+import re
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import and_, column, func, literal_column, select, table
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.exc import OperationalError
+
+from ..extensions import db
+from ..models import Graph, Node, Todo
+from .auth import AuthUser
+
+SEARCH_TYPES = ("todo", "node")
+# Words as the tokenizers see them. Quotes and operators are dropped, so user
+# input never reaches the MATCH grammar.
+_WORD = re.compile(r"\w+")
+# bm25 weight of a title match relative to a body match (SQLite).
+_TITLE_WEIGHT = 4.0
+_EXCERPT_CHARS = 200
+# MySQL error for "maximum statement execution time exceeded".
+_MYSQL_TIMEOUT = 3024
+
+
+class SearchError(Exception):
+    def __init__(self, message: str, status_code: int = 400) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def parse_terms(raw: str | None) -> list[str]:
+    terms = list(dict.fromkeys(word.lower() for word in _WORD.findall(raw or "")))
+    if not terms:
+        raise SearchError("q must contain at least one word")
+    max_terms = current_app.config["SEARCH_MAX_TERMS"]
+    if len(terms) > max_terms:
+        raise SearchError(f"q may contain at most {max_terms} words")
+    return terms
+
+
+def parse_types(raw: str | None) -> tuple[str, ...]:
+    if not raw:
+        return SEARCH_TYPES
+    types = tuple(dict.fromkeys(name.strip().lower() for name in raw.split(",") if name.strip()))
+    if not types or any(name not in SEARCH_TYPES for name in types):
+        raise SearchError(f"types must be a subset of {', '.join(SEARCH_TYPES)}")
+    return types
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([offset]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        (offset,) = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise SearchError("cursor is invalid") from None
+    # encode_cursor writes a plain integer; floats such as 1e400 are forged.
+    if type(offset) is not int or offset < 0:
+        raise SearchError("cursor is invalid")
+    return offset
+
+
+def _mysql_against(terms: list[str]) -> str:
+    # Every word required; with the ngram parser a quoted word matches as a substring.
+    return " ".join(f'+"{term}"' for term in terms)
+
+
+def _fts5_match(terms: list[str]) -> str:
+    # Every word required, as whole words: a prefix query ("term"*) merges the
+    # doclists of every matching term up front, however few rows are wanted.
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def _fts5_candidates(fts: str, terms: list[str], limit: int, rowids=None):
+    """The newest ``limit`` matches in ``fts`` with their bm25 score (higher is better).
+
+    FTS5 walks its matches in rowid order, so the LIMIT stops the scan: a word
+    found in millions of rows costs no more than ``limit`` of them.
+    """
+    table_ = table(fts, column("rowid"))
+    statement = select(
+        table_.c.rowid, (-func.bm25(literal_column(fts), _TITLE_WEIGHT, 1.0)).label("score")
+    ).where(literal_column(fts).op("MATCH")(_fts5_match(terms)))
+    if rowids is not None:
+        # Unary + keeps SQLite from driving the scan by the IN list (one MATCH
+        # per listed rowid); the list is only checked against the matches.
+        statement = statement.where(literal_column(f"+{fts}.rowid").in_(rowids))
+    return statement.order_by(table_.c.rowid.desc()).limit(limit).subquery()
+
+
+def _todo_query(dialect: str, terms: list[str], candidates_limit: int):
+    columns = (
+        Todo.id,
+        Todo.title,
+        func.substr(Todo.content, 1, _EXCERPT_CHARS).label("excerpt"),
+        Todo.status,
+        Todo.author,
+        Todo.created_at,
+    )
+    if dialect == "mysql":
+        matched = match(Todo.title, Todo.content, against=_mysql_against(terms)).in_boolean_mode()
+        return select(*columns, matched.label("score")).where(matched), Todo.id
+    candidates = _fts5_candidates("todos_fts", terms, limit=candidates_limit)
+    statement = select(*columns, candidates.c.score).join_from(candidates, Todo, Todo.id == candidates.c.rowid)
+    return statement, Todo.id
+
+
+def _node_query(dialect: str, terms: list[str], candidates_limit: int, user: AuthUser, graph_id: str | None):
+    columns = (Node.id, Node.graph_id, Graph.name.label("graph_name"), Node.title, Node.summary, Node.node_type)
+    owned = Graph.owner_user_id == user.id
+    if graph_id:
+        owned = and_(owned, Node.graph_id == graph_id)
+    if dialect == "mysql":
+        matched = match(Node.title, Node.summary, against=_mysql_against(terms)).in_boolean_mode()
+        statement = select(*columns, matched.label("score")).join(Graph, Graph.id == Node.graph_id).where(matched, owned)
+        return statement, Node.id
+    # Restricted to the caller's nodes before the candidate limit, so other
+    # users' matches never crowd them out.
+    rowids = select(literal_column("nodes.rowid")).select_from(Node).join(Graph, Graph.id == Node.graph_id).where(owned)
+    candidates = _fts5_candidates("nodes_fts", terms, limit=candidates_limit, rowids=rowids)
+    statement = (
+        select(*columns, candidates.c.score)
+        .join_from(candidates, Node, literal_column("nodes.rowid") == candidates.c.rowid)
+        .join(Graph, Graph.id == Node.graph_id)
+    )
+    return statement, Node.id
+
+
+def _serialize_todo(row) -> dict:
+    return {
+        "type": "todo",
+        "id": row.id,
+        "title": row.title,
+        "excerpt": row.excerpt,
+        "status": row.status,
+        "author": row.author,
+        "created_at": row.created_at.isoformat(),
+        "score": float(row.score),
+    }
+
+
+def _serialize_node(row) -> dict:
+    return {
+        "type": "node",
+        "id": row.id,
+        "graph_id": row.graph_id,
+        "graph_name": row.graph_name,
+        "title": row.title,
+        "summary": row.summary,
+        "node_type": row.node_type.value,
+        "score": float(row.score),
+    }
+
+
+@contextmanager
+def _sqlite_deadline(conn, deadline: float):
+    """Interrupt SQLite statements still running at ``deadline`` (monotonic)."""
+    if conn.dialect.name != "sqlite":
+        yield
+        return
+    driver_connection = conn.connection.driver_connection
+    driver_connection.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+    try:
+        yield
+    finally:
+        driver_connection.set_progress_handler(None, 0)
+
+
+def _timed_out(exc: OperationalError) -> bool:
+    args = getattr(exc.orig, "args", ())
+    return (args and args[0] == _MYSQL_TIMEOUT) or "interrupted" in str(exc.orig)
+
+
+def search(
+    user: AuthUser, terms: list[str], types: tuple[str, ...], graph_id: str | None, offset: int, limit: int
+) -> tuple[list[dict], int | None]:
+    """One page of matches, best first; returns the results and the next offset (or None).
+
+    Each kind is ranked by its own index (MATCH relevance on MySQL, bm25 on
+    SQLite, title matches weighted higher) and the kinds are interleaved by
+    score. Results stop SEARCH_MAX_RESULTS deep, SQLite scores at most
+    SEARCH_MAX_CANDIDATES matches and every statement stops at the
+    SEARCH_TIMEOUT_MS deadline, so one request's cost stays bounded however
+    many rows match.
+    """
+    config = current_app.config
+    max_results = config["SEARCH_MAX_RESULTS"]
+    if offset >= max_results:
+        return [], None
+    limit = min(limit, max_results - offset)
+    depth = offset + limit + 1
+
+    conn = db.session.connection()
+    dialect = conn.dialect.name
+    if dialect not in ("mysql", "sqlite"):
+        raise SearchError("search needs a MySQL or SQLite database", status_code=501)
+    candidates = max(config["SEARCH_MAX_CANDIDATES"], depth)
+    queries = []
+    if "todo" in types:
+        queries.append((*_todo_query(dialect, terms, candidates), _serialize_todo))
+    if "node" in types:
+        queries.append((*_node_query(dialect, terms, candidates, user, graph_id), _serialize_node))
+
+    deadline = time.monotonic() + config["SEARCH_TIMEOUT_MS"] / 1000
+    results: list[dict] = []
+    try:
+        with _sqlite_deadline(conn, deadline):
+            for statement, key, serialize in queries:
+                remaining_ms = max(1, int((deadline - time.monotonic()) * 1000))
+                statement = (
+                    statement.order_by(literal_column("score").desc(), key)
+                    .limit(depth)
+                    .prefix_with(f"/*+ MAX_EXECUTION_TIME({remaining_ms}) */", dialect="mysql")
+                )
+                results.extend(serialize(row) for row in conn.execute(statement))
+    except OperationalError as exc:
+        if not _timed_out(exc):
+            raise
+        db.session.rollback()
+        raise SearchError("search took too long, try more specific words", status_code=503) from None
+
+    results.sort(key=lambda result: -result["score"])
+    page = results[offset : offset + limit]
+    more = len(results) > offset + limit and offset + limit < max_results
+    return page, offset + limit if more else None
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+
+from flask import Flask, current_app
+from sqlalchemy import select
+
+from ..extensions import db
+from ..models import Todo
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(2024, 1, 1)
+
+
+def hot_score(heat: int, created_at: datetime, decay_seconds: float) -> float:
+    """Recency-decayed score: every 10x in heat is worth ``decay_seconds`` of age.
+
+    The score only depends on the todo itself (not on the current time), so the
+    ordering never has to be recomputed as todos age.
+    """
+    age = (created_at - _EPOCH).total_seconds()
+    return math.log10(max(heat, 1)) + age / decay_seconds
+
+
+class HotTodoIndex:
+    """In-process ranking of todo ids by ``hot_score``.
+
+    Keys are kept in a sorted list, so the top-k is a slice and every vote,
+    create or delete is a binary search plus one list insert/remove. The full
+    reload from the database (``rebuild``) runs once up front and then in the
+    background every ``rebuild_seconds``, while the current ranking keeps
+    serving.
+    """
+
+    def __init__(self, decay_seconds: float, rebuild_seconds: float) -> None:
+        self.decay_seconds = decay_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self._keys: list[tuple[float, int]] = []
+        self._entries: dict[int, tuple[tuple[float, int], int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._built_at: float | None = None
+        # Held by the one rebuild in flight.
+        self._rebuild_lock = threading.Lock()
+        # Todos changed while a rebuild runs; None when none is running.
+        self._dirty: set[int] | None = None
+        self.rebuilds = 0
+        self.rebuild_failures = 0
+
+    def _key(self, todo_id: int, heat: int, created_at: datetime) -> tuple[float, int]:
+        return (-hot_score(heat, created_at, self.decay_seconds), -todo_id)
+
+    def _insert(self, todo_id: int, heat: int, created_at: datetime) -> None:
+        key = self._key(todo_id, heat, created_at)
+        bisect.insort(self._keys, key)
+        self._entries[todo_id] = (key, heat, created_at)
+
+    def _remove(self, todo_id: int) -> tuple[int, datetime] | None:
+        entry = self._entries.pop(todo_id, None)
+        if entry is None:
+            return None
+        key, heat, created_at = entry
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._keys[index] == key:
+            del self._keys[index]
+        return heat, created_at
+
+    def _mark_dirty(self, todo_id: int) -> None:
+        if self._dirty is not None:
+            self._dirty.add(todo_id)
+
+    def _load(self, statement, pending) -> dict:
+        entries = {}
+        for todo_id, heat, created_at in db.session.execute(statement).all():
+            heat = max(0, heat + pending(todo_id))
+            entries[todo_id] = (self._key(todo_id, heat, created_at), heat, created_at)
+        return entries
+
+    def rebuild(self, pending=lambda todo_id: 0) -> None:
+        """Reload every todo, then swap the new ranking in.
+
+        Creates, votes and deletes made meanwhile (they reach the index after
+        the database or vote buffer) mark their todo dirty; dirty rows are read
+        again until none are left, so the swap loses none of them.
+        """
+        with self._lock:
+            self._dirty = set()
+        try:
+            entries = self._load(select(Todo.id, Todo.heat, Todo.created_at), pending)
+            keys = sorted(entry[0] for entry in entries.values())
+            while True:
+                with self._lock:
+                    dirty, self._dirty = self._dirty, set()
+                    if not dirty:
+                        self._keys = keys
+                        self._entries = entries
+                        self._built_at = time.monotonic()
+                        self.rebuilds += 1
+                        return
+                # End the transaction, so the re-read sees rows committed since
+                # (REPEATABLE READ would keep serving the first snapshot).
+                db.session.rollback()
+                fresh = self._load(
+                    select(Todo.id, Todo.heat, Todo.created_at).where(Todo.id.in_(dirty)), pending
+                )
+                for todo_id in dirty:
+                    previous = entries.pop(todo_id, None)
+                    if previous is not None:
+                        del keys[bisect.bisect_left(keys, previous[0])]
+                    if todo_id in fresh:
+                        entries[todo_id] = fresh[todo_id]
+                        bisect.insort(keys, fresh[todo_id][0])
+        finally:
+            with self._lock:
+                self._dirty = None
+
+    def is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.rebuild_seconds
+
+    def ensure_current(self, pending=lambda todo_id: 0) -> None:
+        """Build on first use (concurrent callers wait for that one build); once
+        stale, start a background rebuild and keep serving the current ranking."""
+        if self._built_at is None:
+            with self._rebuild_lock:
+                if self._built_at is None:
+                    self.rebuild(pending)
+            return
+        if self.is_stale() and self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(
+                target=self._rebuild_in_background,
+                args=(current_app._get_current_object(), pending),
+                name="hot-todo-rebuild",
+                daemon=True,
+            ).start()
+
+    def _rebuild_in_background(self, app: Flask, pending) -> None:
+        try:
+            with app.app_context():
+                self.rebuild(pending)
+        except Exception:
+            logger.exception("hot todo index rebuild failed")
+            self.rebuild_failures += 1
+            # Keep the current ranking and retry after another interval.
+            self._built_at = time.monotonic()
+        finally:
+            self._rebuild_lock.release()
+
+    def upsert(self, todo_id: int, heat: int, created_at: datetime) -> None:
+        with self._lock:
+            self._mark_dirty(todo_id)
+            if self._built_at is None:
+                return
+            self._remove(todo_id)
+            self._insert(todo_id, heat, created_at)
+
+    def adjust(self, todo_id: int, delta: int) -> None:
+        with self._lock:
+            self._mark_dirty(todo_id)
+            if self._built_at is None:
+                return
+            previous = self._remove(todo_id)
+            if previous is not None:
+                heat, created_at = previous
+                self._insert(todo_id, max(0, heat + delta), created_at)
+
+    def remove(self, todo_id: int) -> None:
+        with self._lock:
+            self._mark_dirty(todo_id)
+            self._remove(todo_id)
+
+    def top(self, k: int) -> list[int]:
+        with self._lock:
+            return [-todo_id for _, todo_id in self._keys[:k]]
+
+    def stats(self) -> dict:
+        built_at = self._built_at
+        return {
+            "todos": len(self._keys),
+            "rebuilding": self._rebuild_lock.locked(),
+            "rebuilds": self.rebuilds,
+            "rebuild_failures": self.rebuild_failures,
+            "age_seconds": round(time.monotonic() - built_at, 3) if built_at is not None else None,
+        }
+
+
+def get_hot_todo_index() -> HotTodoIndex:
+    index = current_app.extensions.get("hot_todo_index")
+    if index is None:
+        index = HotTodoIndex(
+            decay_seconds=current_app.config["TODO_HOT_DECAY_SECONDS"],
+            rebuild_seconds=current_app.config["TODO_HOT_REBUILD_SECONDS"],
+        )
+        current_app.extensions["hot_todo_index"] = index
+    return index
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask, current_app
+from sqlalchemy import delete, select
+
+from ..extensions import db
+from ..models import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+
+def _delete_in_batches(condition, batch_size: int, max_batches: int | None) -> tuple[int, int]:
+    """DELETE rows matching ``condition`` ``batch_size`` ids at a time.
+
+    Each batch is its own short transaction, so pruning a large backlog never
+    holds row locks (or a long undo log) across the whole table.
+    Returns (rows deleted, batches run).
+    """
+    table = RefreshToken.__table__
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = db.session.execute(
+            select(table.c.id).where(condition).order_by(table.c.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.session.execute(delete(table).where(table.c.id.in_(ids)))
+        db.session.commit()
+        deleted += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return deleted, batches
+
+
+def prune_refresh_tokens(
+    batch_size: int,
+    revoked_retention: timedelta,
+    now: datetime | None = None,
+    max_batches: int | None = None,
+) -> dict:
+    """Delete expired refresh tokens, and revoked ones older than ``revoked_retention``.
+
+    Expired rows can never be used again. Revoked rows are kept for a while
+    so a replayed (already rotated) token is still recognised as revoked
+    rather than unknown.
+    """
+    now = now or datetime.utcnow()
+    table = RefreshToken.__table__
+    start = time.perf_counter()
+    expired, expired_batches = _delete_in_batches(table.c.expires_at <= now, batch_size, max_batches)
+    revoked, revoked_batches = _delete_in_batches(
+        table.c.revoked_at <= now - revoked_retention, batch_size, max_batches
+    )
+    return {
+        "expired": expired,
+        "revoked": revoked,
+        "rows_reclaimed": expired + revoked,
+        "batches": expired_batches + revoked_batches,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+def prune_with_app_config(batch_size: int | None = None, max_batches: int | None = None) -> dict:
+    config = current_app.config
+    return prune_refresh_tokens(
+        batch_size=batch_size or config["REFRESH_TOKEN_PRUNE_BATCH_SIZE"],
+        revoked_retention=timedelta(hours=config["REFRESH_TOKEN_REVOKED_RETENTION_HOURS"]),
+        max_batches=max_batches,
+    )
+
+
+class TokenPruner:
+    """Runs ``prune_refresh_tokens`` every ``interval`` seconds on a daemon thread.
+
+    Every worker process runs its own pruner; the deletes are idempotent, so
+    overlapping runs only cost an extra empty SELECT.
+    """
+
+    def __init__(self, app: Flask, interval: float) -> None:
+        self.app = app
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.rows_reclaimed = 0
+        self.last_run: dict | None = None
+        self.last_run_at: datetime | None = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="token-pruner", daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def run_once(self) -> dict | None:
+        try:
+            with self.app.app_context():
+                result = prune_with_app_config()
+        except Exception:
+            self.failures += 1
+            logger.exception("refresh token prune failed")
+            return None
+        self.runs += 1
+        self.rows_reclaimed += result["rows_reclaimed"]
+        self.last_run = result
+        self.last_run_at = datetime.utcnow()
+        if result["rows_reclaimed"]:
+            logger.info(
+                "pruned %d refresh tokens (%d expired, %d revoked) in %.1f ms",
+                result["rows_reclaimed"],
+                result["expired"],
+                result["revoked"],
+                result["elapsed_ms"],
+            )
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "running": self._thread is not None and not self._stopped.is_set(),
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "rows_reclaimed": self.rows_reclaimed,
+            "last_run": self.last_run,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.run_once()
+
+
+def get_token_pruner() -> TokenPruner:
+    pruner = current_app.extensions.get("token_pruner")
+    if pruner is None:
+        pruner = TokenPruner(
+            current_app._get_current_object(),
+            interval=current_app.config["REFRESH_TOKEN_PRUNE_INTERVAL_MINUTES"] * 60,
+        )
+        current_app.extensions["token_pruner"] = pruner
+    return pruner
+
+
+def init_token_pruner(app: Flask) -> None:
+    """Start the background pruner when ``REFRESH_TOKEN_PRUNE_INTERVAL_MINUTES`` > 0."""
+    if app.config["REFRESH_TOKEN_PRUNE_INTERVAL_MINUTES"] <= 0:
+        return
+    with app.app_context():
+        get_token_pruner().start()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+
+from flask import Flask, current_app
+from sqlalchemy import bindparam, case, update
+
+from ..extensions import db
+from ..models import Todo
+
+logger = logging.getLogger(__name__)
+
+_todos = Todo.__table__
+_delta = bindparam("delta")
+# Portable spelling of heat = GREATEST(0, heat + :delta); one statement per
+# flush, executed with one parameter set per todo.
+_APPLY_DELTAS = (
+    update(_todos)
+    .where(_todos.c.id == bindparam("todo_id"))
+    .values(heat=case((_todos.c.heat + _delta < 0, 0), else_=_todos.c.heat + _delta))
+)
+
+
+class VoteAggregator:
+    """Write-behind buffer for todo votes.
+
+    Votes are summed per todo in memory and flushed every ``flush_interval``
+    seconds as atomic ``heat = GREATEST(0, heat + delta)`` updates, so a burst of
+    clicks on one todo costs one row update instead of one commit per click.
+    """
+
+    def __init__(self, app: Flask, flush_interval: float, write_behind: bool = True) -> None:
+        self.app = app
+        self.flush_interval = flush_interval
+        self.write_behind = write_behind
+        self._pending: dict[int, int] = {}
+        self._inflight: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.votes_received = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rows_flushed = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def record(self, todo_id: int, delta: int) -> None:
+        with self._lock:
+            self._pending[todo_id] = self._pending.get(todo_id, 0) + delta
+            self.votes_received += 1
+        if not self.write_behind:
+            self.flush()
+            return
+        self._ensure_started()
+
+    def pending(self, todo_id: int) -> int:
+        """Delta accepted for ``todo_id`` but not yet committed."""
+        return self._pending.get(todo_id, 0) + self._inflight.get(todo_id, 0)
+
+    def discard(self, todo_id: int) -> None:
+        with self._lock:
+            self._pending.pop(todo_id, None)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            rows = [
+                {"todo_id": todo_id, "delta": delta}
+                for todo_id, delta in sorted(batch.items())
+                if delta
+            ]
+            if not rows:
+                self._inflight = {}
+                return 0
+
+            start = time.perf_counter()
+            try:
+                with self.app.app_context(), db.engine.begin() as connection:
+                    connection.execute(_APPLY_DELTAS, rows)
+            except Exception:
+                self.flush_failures += 1
+                logger.exception("vote flush failed, %d todos requeued", len(rows))
+                with self._lock:
+                    for todo_id, delta in batch.items():
+                        self._pending[todo_id] = self._pending.get(todo_id, 0) + delta
+                    self._inflight = {}
+                return 0
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._inflight = {}
+            self.flushes += 1
+            self.rows_flushed += len(rows)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+            return len(rows)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval * 2)
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "write_behind": self.write_behind,
+            "queue_depth": len(self._pending),
+            "pending_votes": sum(abs(delta) for delta in list(self._pending.values())),
+            "votes_received": self.votes_received,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "rows_flushed": self.rows_flushed,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="vote-flusher", daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            self.flush()
+
+
+def get_vote_aggregator() -> VoteAggregator:
+    aggregator = current_app.extensions.get("vote_aggregator")
+    if aggregator is None:
+        aggregator = VoteAggregator(
+            current_app._get_current_object(),
+            flush_interval=current_app.config["VOTE_FLUSH_INTERVAL_MS"] / 1000,
+            write_behind=current_app.config["VOTE_WRITE_BEHIND"],
+        )
+        current_app.extensions["vote_aggregator"] = aggregator
+    return aggregator
@@ -0,0 +1 @@
+"""Benchmarks for the backend API (run as ``python -m benchmarks.<name>``)."""
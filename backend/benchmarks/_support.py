@@ -0,0 +1,100 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against ``DATABASE_URL`` when it is set, otherwise against a
+throwaway SQLite file so they work without a MySQL instance.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+
+def make_app(**config):
+    """A fresh app with empty tables; ``config`` overrides ``Config`` values."""
+    os.environ.setdefault("JWT_SECRET", "benchmark-secret-" + "x" * 32)
+    if not os.getenv("DATABASE_URL"):
+        fd, path = tempfile.mkstemp(prefix="bench-", suffix=".db")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app(config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def create_user(user_id: int = 1, email: str = "bench@example.com"):
+    from app.extensions import db
+    from app.models import User
+
+    user = User(id=user_id, email=email, nickname=f"bench-{user_id}", password_hash="")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def auth_headers(app, user_id: int) -> dict:
+    from app.routes.auth import _encode_token
+
+    with app.app_context():
+        token = _encode_token(user_id, "access", timedelta(hours=1))
+    return {"Authorization": f"Bearer {token}"}
+
+
+class QueryCounter:
+    """Counts statements sent to the database while active."""
+
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        from sqlalchemy import event
+
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        from sqlalchemy import event
+
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+class QueryCounters:
+    """``QueryCounter`` over every engine (primary and replica binds)."""
+
+    def __init__(self, engines) -> None:
+        self.counters = [QueryCounter(engine) for engine in engines]
+
+    @property
+    def count(self) -> int:
+        return sum(counter.count for counter in self.counters)
+
+    def __enter__(self) -> "QueryCounters":
+        for counter in self.counters:
+            counter.__enter__()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for counter in self.counters:
+            counter.__exit__(*exc)
+
+
+@contextmanager
+def timer():
+    result = {"seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
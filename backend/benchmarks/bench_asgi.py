@@ -0,0 +1,232 @@
+"""Load test: WSGI thread pool vs the ASGI entry point under slow chat streams.
+
+Starts ``benchmarks.fake_gemini`` (slow token stream) and then, in turn, a
+WSGI server with a fixed thread pool (like a sync gunicorn/waitress
+deployment) and uvicorn serving ``asgi.py``. Each is hit with N concurrent
+``POST /api/chat/stream`` requests; we report latency, errors and the server
+process's peak thread count and RSS.
+
+Usage: python -m benchmarks.bench_asgi [--concurrency 100,1000] [--wsgi-threads 32]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .fake_gemini import serve as serve_fake_gemini
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(mode: str, port: int, threads: int) -> None:
+    from ._support import make_app
+
+    flask_app = make_app()
+    if mode == "asgi":
+        import uvicorn
+
+        from app.asgi import create_asgi_app
+
+        uvicorn.run(create_asgi_app(flask_app), port=port, log_level="warning", backlog=4096)
+        return
+
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs) -> None:
+            pass
+
+    class PooledWSGIServer(BaseWSGIServer):
+        """Werkzeug's server with a fixed worker pool instead of a thread per request."""
+
+        request_queue_size = 4096
+
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, **kwargs)
+            self._workers = ThreadPoolExecutor(threads)
+
+        def process_request(self, request, client_address) -> None:
+            self._workers.submit(self._process, request, client_address)
+
+        def _process(self, request, client_address) -> None:
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer("127.0.0.1", port, flask_app, handler=QuietHandler).serve_forever()
+
+
+def _proc_status(pid: int) -> tuple[int, int]:
+    """(threads, RSS in KiB) of a running process, from /proc."""
+    values = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            key, _, value = line.partition(":")
+            values[key] = value.strip()
+    return int(values["Threads"]), int(values["VmRSS"].split()[0])
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, pid: int) -> None:
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak_threads = 0
+        self.peak_rss_kib = 0
+        self.running = True
+
+    def run(self) -> None:
+        while self.running:
+            try:
+                threads, rss = _proc_status(self.pid)
+            except (FileNotFoundError, KeyError):
+                return
+            self.peak_threads = max(self.peak_threads, threads)
+            self.peak_rss_kib = max(self.peak_rss_kib, rss)
+            time.sleep(0.05)
+
+
+async def _load(port: int, concurrency: int) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(300)
+    samples, errors = [], 0
+
+    async def one(client, index: int) -> None:
+        nonlocal errors
+        started = time.perf_counter()
+        first_byte = None
+        try:
+            async with client.stream("POST", "/api/chat/stream", json={"prompt": f"load {index}"}) as response:
+                async for _ in response.aiter_raw():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok and first_byte is not None:
+            samples.append((first_byte, time.perf_counter() - started))
+        else:
+            errors += 1
+
+    # httpx pool bookkeeping grows with the square of its connections, so the
+    # load generator spreads its requests over clients of ~50 connections.
+    clients = [
+        httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=timeout)
+        for _ in range(max(1, concurrency // 50))
+    ]
+    # Warm up: builds the server's Gemini clients before anything is timed.
+    await clients[0].post("/api/chat/stream", json={"prompt": "warm up"})
+    started = time.perf_counter()
+    await asyncio.gather(*(one(clients[i % len(clients)], i) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    for client in clients:
+        await client.aclose()
+
+    def pct(values, q):
+        values = sorted(values)
+        return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1) if values else None
+
+    return {
+        "concurrency": concurrency,
+        "ok": len(samples),
+        "errors": errors,
+        "wall_s": round(wall, 2),
+        "ttfb_ms_p50": pct([s[0] for s in samples], 0.5),
+        "ttfb_ms_p99": pct([s[0] for s in samples], 0.99),
+        "total_ms_p50": round(statistics.median(s[1] for s in samples) * 1000, 1) if samples else None,
+        "total_ms_p99": pct([s[1] for s in samples], 0.99),
+    }
+
+
+def _wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", default="100,1000")
+    parser.add_argument("--wsgi-threads", type=int, default=32)
+    # Few, slow tokens keep the run I/O-bound: parsing each streamed chunk in
+    # google-genai costs CPU, which would otherwise dominate on small machines.
+    parser.add_argument("--tokens", type=int, default=5)
+    parser.add_argument("--token-delay-ms", type=float, default=200)
+    parser.add_argument("--first-token-delay-ms", type=float, default=200)
+    parser.add_argument("--serve", choices=["wsgi", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        _serve(args.serve, args.port, args.wsgi_threads)
+        return
+
+    fake = serve_fake_gemini("127.0.0.1", 0, args.tokens, args.token_delay_ms, args.first_token_delay_ms)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+    fd, db_path = tempfile.mkstemp(prefix="bench-", suffix=".db")
+    os.close(fd)
+    env = {
+        **os.environ,
+        "GEMINI_BASE_URL": f"http://127.0.0.1:{fake.server_address[1]}",
+        "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY", "fake-key"),
+        "DATABASE_URL": os.getenv("DATABASE_URL", f"sqlite:///{db_path}"),
+        # Measure the serving model, not admission control or the cache.
+        "CHAT_CACHE_BACKEND": "none",
+        "CHAT_MAX_CONCURRENCY": "100000",
+        "CHAT_MAX_QUEUE": "100000",
+        "GEMINI_CLIENT_POOL_SIZE": str(args.wsgi_threads),
+    }
+
+    results = []
+    for mode in ("wsgi", "asgi"):
+        for concurrency in (int(value) for value in args.concurrency.split(",")):
+            port = _free_port()
+            server = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.bench_asgi", "--serve", mode, "--port", str(port),
+                 "--wsgi-threads", str(args.wsgi_threads)],
+                env=env,
+            )
+            try:
+                _wait_for_port(port)
+                sampler = _Sampler(server.pid)
+                sampler.start()
+                result = asyncio.run(_load(port, concurrency))
+                sampler.running = False
+                sampler.join()
+            finally:
+                server.terminate()
+                server.wait()
+            results.append(
+                {"mode": mode, **result, "peak_threads": sampler.peak_threads,
+                 "peak_rss_mib": round(sampler.peak_rss_kib / 1024, 1)}
+            )
+            print(json.dumps(results[-1]), file=sys.stderr)
+
+    fake.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Time-to-first-byte of ``POST /api/chat`` vs ``POST /api/chat/stream``.
+
+Starts ``benchmarks.fake_gemini`` in-process and points the backend at it, so
+no API key or network access is needed.
+
+Usage: python -m benchmarks.bench_chat_stream [--requests 20] [--tokens 50]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+
+from .fake_gemini import serve
+
+
+def _measure(client, path: str, prompt: str) -> tuple[float, float]:
+    started = time.perf_counter()
+    response = client.post(path, json={"prompt": prompt}, buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    first_byte = time.perf_counter() - started
+    for _ in chunks:
+        pass
+    response.close()
+    assert response.status_code == 200, response.status_code
+    return first_byte, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay-ms", type=float, default=20)
+    parser.add_argument("--first-token-delay-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    server = serve("127.0.0.1", 0, args.tokens, args.token_delay_ms, args.first_token_delay_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("GEMINI_API_KEY", "fake-key")
+
+    from ._support import make_app
+
+    client = make_app().test_client()
+    results = {}
+    for path in ("/api/chat", "/api/chat/stream"):
+        samples = [_measure(client, path, f"hello {i}") for i in range(args.requests)]
+        results[path] = {
+            "ttfb_ms_p50": round(statistics.median(s[0] for s in samples) * 1000, 1),
+            "total_ms_p50": round(statistics.median(s[1] for s in samples) * 1000, 1),
+        }
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
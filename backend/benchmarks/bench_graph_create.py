@@ -0,0 +1,67 @@
+"""Round trips and wall time of ``POST /api/graphs`` for growing payloads.
+
+Usage: python -m benchmarks.bench_graph_create [--sizes 100,1000,10000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+
+from ._support import QueryCounter, auth_headers, create_user, make_app, timer
+
+
+def build_payload(node_count: int, edges_per_node: int = 2) -> dict:
+    nodes = [
+        {
+            "id": f"n{i}",
+            "title": f"Node {i}",
+            "node_type": "person",
+            "position": {"x": float(i % 100) * 40, "y": float(i // 100) * 40},
+            "style": {"width": 120, "height": 40},
+        }
+        for i in range(node_count)
+    ]
+    edges = [
+        {"source": f"n{i}", "target": f"n{(i + step) % node_count}", "label": "knows"}
+        for i in range(node_count)
+        for step in range(1, edges_per_node + 1)
+    ]
+    return {"graph": {"name": f"bench-{node_count}"}, "nodes": nodes, "edges": edges}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        create_user()
+    headers = auth_headers(app, 1)
+    client = app.test_client()
+
+    from app.extensions import db
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        payload = build_payload(size)
+        with app.app_context():
+            engine = db.engine
+        with QueryCounter(engine) as counter, timer() as elapsed:
+            response = client.post("/api/graphs", json=payload, headers=headers)
+        assert response.status_code == 201, response.get_data(as_text=True)
+        body = response.get_json()
+        results.append(
+            {
+                "nodes": size,
+                "edges": len(body["edges"]),
+                "round_trips": counter.count,
+                "wall_ms": round(elapsed["seconds"] * 1000, 2),
+            }
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
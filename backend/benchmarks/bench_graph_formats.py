@@ -0,0 +1,114 @@
+"""Size and cost of the GET /api/graphs/<id> representations.
+
+For each ``--sizes`` entry, seeds a graph of that many nodes (and
+``--edges-per-node`` times as many edges), loads its rows once and, for
+every format (``json``, ``columnar``, ``msgpack`` when installed) and
+content encoding (identity, ``gzip``, ``br`` when installed), reports the
+body size, the median time to encode and compress it on the server and the
+median time for a client to decompress and parse it. Requests through the
+test client are timed too: the first per format (cold, filling the snapshot
+cache) and then each encoding from the cache (warm).
+
+Usage: python -m benchmarks.bench_graph_formats [--sizes 500,2000,10000] [--edges-per-node 3] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import statistics
+import time
+
+from ._support import auth_headers, make_app, timer
+from .seed import seed_graphs, seed_users
+
+
+def _median_ms(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, round(statistics.median(samples) * 1000, 1)
+
+
+def _decoders() -> dict:
+    decoders = {"identity": lambda body: body, "gzip": gzip.decompress}
+    try:
+        import brotli
+
+        decoders["br"] = brotli.decompress
+    except ImportError:
+        pass
+    return decoders
+
+
+def _parsers() -> dict:
+    parsers = {"json": json.loads, "columnar": json.loads}
+    try:
+        import msgpack
+
+        parsers["msgpack"] = msgpack.unpackb
+    except ImportError:
+        pass
+    return parsers
+
+
+def run(app, headers: dict, nodes: int, edges_per_node: int, repeat: int) -> dict:
+    from app.extensions import db
+    from app.models import Graph
+    from app.service.compression import get_response_compressor
+    from app.service.graphs import encode_graph_document, load_graph_rows
+
+    with app.app_context():
+        graph_id = seed_graphs(1, nodes, nodes * edges_per_node)[0]
+        graph = db.session.get(Graph, graph_id)
+        node_rows, edge_rows = load_graph_rows(graph_id)
+        compressor = get_response_compressor()
+        decoders = _decoders()
+        formats = []
+        for fmt, parse in _parsers().items():
+            body, encode_ms = _median_ms(lambda: encode_graph_document(graph, node_rows, edge_rows, fmt), repeat)
+            encodings = []
+            for encoding, decode in decoders.items():
+                if encoding == "identity":
+                    encoded, compress_ms = body, 0.0
+                else:
+                    encoded, compress_ms = _median_ms(lambda: compressor.compress(body, encoding), repeat)
+                _, decode_ms = _median_ms(lambda: parse(decode(encoded)), repeat)
+                encodings.append(
+                    {"encoding": encoding, "bytes": len(encoded), "compress_ms": compress_ms, "decode_ms": decode_ms}
+                )
+            formats.append({"format": fmt, "encode_ms": encode_ms, "encodings": encodings})
+
+    client = app.test_client()
+    requests = {}
+    for fmt in _parsers():
+        url = f"/api/graphs/{graph_id}?format={fmt}"
+        # The first request of a format builds the snapshot, every encoding included.
+        with timer() as cold:
+            client.get(url, headers=headers)
+        requests[fmt] = {"cold_ms": round(cold["seconds"] * 1000, 1)}
+        for encoding in decoders:
+            request_headers = {**headers, "Accept-Encoding": encoding}
+            response, warm_ms = _median_ms(lambda: client.get(url, headers=request_headers), repeat)
+            requests[fmt][encoding] = {"bytes": len(response.data), "warm_ms": warm_ms}
+    return {"nodes": nodes, "edges": len(edge_rows), "formats": formats, "requests": requests}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="500,2000,10000")
+    parser.add_argument("--edges-per-node", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    app = make_app()
+    with app.app_context():
+        seed_users(1)
+    headers = auth_headers(app, 1)
+    results = [run(app, headers, int(size), args.edges_per_node, args.repeat) for size in args.sizes.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
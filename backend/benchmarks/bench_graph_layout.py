@@ -0,0 +1,94 @@
+"""Server-side auto-layout of seeded graphs (``POST /api/graphs/<id>/layout``).
+
+For each ``--sizes`` entry, seeds a graph of that many nodes (each linked to
+the next ``--edges-per-node`` nodes, placed row by row on a 40-unit grid
+regardless of structure, as after an import), starts a layout job,
+polls it to completion and reports the job's load/layout/save timings plus
+two quality numbers: median edge length relative to the requested one, and
+the share of (sampled) nodes closer than a tenth of it to another node.
+
+Usage: python -m benchmarks.bench_graph_layout [--sizes 1000,5000,20000] [--edges-per-node 3]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from ._support import auth_headers, make_app, timer
+from .seed import seed_graphs, seed_users
+
+
+def _quality(graph_id: str, edge_length: float, sample: int = 1000) -> dict:
+    from app.extensions import db
+    from app.models import Edge, Node, NodeLayout
+
+    rows = db.session.execute(
+        db.select(NodeLayout.node_id, NodeLayout.x, NodeLayout.y)
+        .join(Node, Node.id == NodeLayout.node_id)
+        .where(Node.graph_id == graph_id)
+    ).all()
+    index = {node_id: i for i, (node_id, _, _) in enumerate(rows)}
+    pos = np.array([(x, y) for _, x, y in rows])
+    pairs = np.array(
+        [
+            (index[source], index[target])
+            for source, target in db.session.execute(
+                db.select(Edge.from_node_id, Edge.to_node_id).where(Edge.graph_id == graph_id)
+            )
+        ]
+    )
+    lengths = np.linalg.norm(pos[pairs[:, 0]] - pos[pairs[:, 1]], axis=1)
+    picked = np.random.default_rng(0).choice(len(pos), min(sample, len(pos)), replace=False)
+    nearest = np.array([np.partition(np.linalg.norm(pos - pos[i], axis=1), 1)[1] for i in picked])
+    return {
+        "median_edge_ratio": round(float(np.median(lengths)) / edge_length, 2),
+        "crowded_share": round(float((nearest < edge_length / 10).mean()), 3),
+    }
+
+
+def run(app, headers: dict, nodes: int, edges_per_node: int) -> dict:
+    with app.app_context():
+        graph_id = seed_graphs(1, nodes, nodes * edges_per_node)[0]
+    client = app.test_client()
+    with timer() as elapsed:
+        response = client.post(f"/api/graphs/{graph_id}/layout", headers=headers, json={})
+        location = response.headers["Location"]
+        polls = 0
+        while True:
+            job = client.get(location, headers=headers).get_json()
+            polls += 1
+            if job["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.1)
+    with app.app_context():
+        quality = _quality(graph_id, app.config["GRAPH_LAYOUT_EDGE_LENGTH"]) if job["status"] == "succeeded" else {}
+    return {
+        "nodes": job["nodes"],
+        "edges": job["edges"],
+        "status": job["status"],
+        "error": job["error"],
+        "wall_s": round(elapsed["seconds"], 2),
+        "polls": polls,
+        "timings_ms": job["timings_ms"],
+        **quality,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,5000,20000")
+    parser.add_argument("--edges-per-node", type=int, default=3)
+    args = parser.parse_args()
+    app = make_app()
+    with app.app_context():
+        seed_users(1)
+    headers = auth_headers(app, 1)
+    results = [run(app, headers, int(size), args.edges_per_node) for size in args.sizes.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Query count and wall time of ``GET /api/graphs/<id>`` for growing graphs.
+
+Also acts as a regression check: loading a graph must take the same number
+of queries regardless of its size, otherwise the script exits non-zero.
+
+Usage: python -m benchmarks.bench_graph_load [--sizes 100,1000,10000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from ._support import QueryCounter, auth_headers, create_user, make_app, timer
+from .bench_graph_create import build_payload
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        create_user()
+    headers = auth_headers(app, 1)
+    client = app.test_client()
+
+    from app.extensions import db
+
+    with app.app_context():
+        engine = db.engine
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        created = client.post("/api/graphs", json=build_payload(size), headers=headers)
+        assert created.status_code == 201, created.get_data(as_text=True)
+        graph_id = created.get_json()["graph"]["id"]
+
+        with QueryCounter(engine) as counter, timer() as elapsed:
+            response = client.get(f"/api/graphs/{graph_id}", headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        body = response.get_json()
+        results.append(
+            {
+                "nodes": len(body["nodes"]),
+                "edges": len(body["edges"]),
+                "queries": counter.count,
+                "wall_ms": round(elapsed["seconds"] * 1000, 2),
+            }
+        )
+
+    print(json.dumps(results, indent=2))
+    query_counts = {result["queries"] for result in results}
+    if len(query_counts) != 1:
+        print(f"query count grows with graph size: {sorted(query_counts)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Overhead of the per-request metrics (``METRICS_ENABLED``).
+
+Builds an app with metrics off, seeds 50 todos and a graph, and times
+``GET /api/todos`` and ``GET /api/graphs/<id>``; then builds a second app with
+metrics on over the same database and times the same requests.
+
+Usage: python -m benchmarks.bench_instrumentation [--requests 500] [--nodes 500]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+
+from ._support import auth_headers, create_user, make_app, timer
+from .bench_graph_create import build_payload
+
+
+def run(client, path: str, headers: dict, requests: int) -> dict:
+    samples = []
+    for _ in range(requests):
+        with timer() as elapsed:
+            # buffered=True closes the response, which is when metrics are recorded.
+            response = client.get(path, headers=headers, buffered=True)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        samples.append(elapsed["seconds"] * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3),
+    }
+
+
+def measure(app, path: str, headers: dict, requests: int) -> dict:
+    client = app.test_client()
+    run(client, path, headers, 20)
+    return run(client, path, headers, requests)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--nodes", type=int, default=500)
+    args = parser.parse_args()
+
+    plain = make_app(METRICS_ENABLED=False)
+    with plain.app_context():
+        create_user()
+    headers = auth_headers(plain, 1)
+    client = plain.test_client()
+    for i in range(50):
+        response = client.post(
+            "/api/todos", json={"title": f"Todo {i}", "content": "c", "author": "bench"}, headers=headers
+        )
+        assert response.status_code == 201, response.get_data(as_text=True)
+    graph_id = client.post("/api/graphs", json=build_payload(args.nodes), headers=headers).get_json()["graph"]["id"]
+    paths = {"todos": "/api/todos", "graph": f"/api/graphs/{graph_id}"}
+
+    # Metrics hook SQLAlchemy's Engine class, which the plain app would then
+    # pay for too, so it is measured before the instrumented app exists.
+    off = {name: measure(plain, path, headers, args.requests) for name, path in paths.items()}
+
+    from app import create_app
+
+    # Same DATABASE_URL, so the second app sees the seeded rows.
+    instrumented = create_app({"METRICS_ENABLED": True})
+    assert "request_metrics" in instrumented.extensions
+    on = {name: measure(instrumented, path, headers, args.requests) for name, path in paths.items()}
+
+    results = [
+        {
+            "endpoint": name,
+            "off": off[name],
+            "on": on[name],
+            "p50_overhead_pct": round((on[name]["p50_ms"] / off[name]["p50_ms"] - 1) * 100, 1),
+        }
+        for name in paths
+    ]
+    print(json.dumps({"requests": args.requests, "graph_nodes": args.nodes, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Credential-stuffing burst against ``POST /api/auth/login``.
+
+Sends ``--attempts`` wrong-password logins from one client: a third aimed at
+one existing account, the rest at other seeded accounts. Run once with
+``LOGIN_THROTTLE_BACKEND=none`` (failures counted on the user row) and once
+per throttle backend, reporting status codes, password hashes computed,
+UPDATEs on the ``user`` table and wall time.
+
+Usage: python -m benchmarks.bench_login_throttle [--attempts 300] [--backends none,memory,sqlite]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+
+from ._support import make_app, timer
+from .seed import seed_email, seed_users
+
+
+def run(backend: str, attempts: int) -> dict:
+    os.environ.pop("DATABASE_URL", None)
+    app = make_app()
+    app.config["LOGIN_THROTTLE_BACKEND"] = backend
+    if backend == "sqlite":
+        fd, path = tempfile.mkstemp(prefix="bench-throttle-", suffix=".db")
+        os.close(fd)
+        app.config["LOGIN_THROTTLE_PATH"] = path
+    with app.app_context():
+        from app.extensions import db
+        from app.service.passwords import get_password_hasher
+
+        seed_users(100)
+        engine = db.engine
+        hasher = get_password_hasher()
+
+    user_updates = 0
+
+    def on_execute(conn, cursor, statement, *args) -> None:
+        nonlocal user_updates
+        if statement.lstrip().upper().startswith("UPDATE USER"):
+            user_updates += 1
+
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    client = app.test_client()
+    statuses: dict[str, int] = {}
+    with timer() as elapsed:
+        for i in range(attempts):
+            email = seed_email(1) if i % 3 == 0 else seed_email(i % 99 + 2)
+            response = client.post("/api/auth/login", json={"email": email, "password": "wrong-password"})
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+    event.remove(engine, "before_cursor_execute", on_execute)
+    return {
+        "backend": backend,
+        "statuses": dict(sorted(statuses.items())),
+        "password_hashes": hasher.completed,
+        "user_row_updates": user_updates,
+        "wall_s": round(elapsed["seconds"], 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--attempts", type=int, default=300)
+    parser.add_argument("--backends", default="none,memory,sqlite")
+    args = parser.parse_args()
+    results = [run(backend, args.attempts) for backend in args.backends.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Refresh-token rotation: double-spend check and latency.
+
+1. ``--rounds`` times, logs in and fires ``--concurrency`` simultaneous
+   ``POST /api/auth/refresh`` requests with the same refresh token at a
+   threaded HTTP server. Exactly one may succeed; otherwise the script exits
+   non-zero.
+2. Times a chain of ``--chain`` sequential refreshes through the test client
+   and reports p50/p99 and SQL statements per refresh.
+
+Usage: python -m benchmarks.bench_refresh_rotation [--rounds 20] [--concurrency 16] [--chain 500]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import statistics
+import sys
+import threading
+import time
+
+from ._support import QueryCounters, make_app
+from .seed import SEED_PASSWORD, seed_email, seed_users
+from .suite import _percentile, _serve_http
+
+
+def _login(client) -> str:
+    response = client.post("/api/auth/login", json={"email": seed_email(1), "password": SEED_PASSWORD})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()["refresh_token"]
+
+
+def race(port: int, refresh_token: str, concurrency: int) -> list[int]:
+    """Statuses of ``concurrency`` refreshes released at the same instant."""
+    barrier = threading.Barrier(concurrency)
+    statuses = []
+    body = json.dumps({"refresh_token": refresh_token})
+
+    def one() -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        connection.connect()
+        barrier.wait()
+        connection.request("POST", "/api/auth/refresh", body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        statuses.append(response.status)
+        connection.close()
+
+    threads = [threading.Thread(target=one) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--chain", type=int, default=500)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        from app.extensions import db
+
+        seed_users(1)
+        engines = list(db.engines.values())
+    client = app.test_client()
+    server = _serve_http(app)
+
+    double_spends = 0
+    outcomes = {}
+    for _ in range(args.rounds):
+        statuses = race(server.server_port, _login(client), args.concurrency)
+        for status in statuses:
+            outcomes[status] = outcomes.get(status, 0) + 1
+        if statuses.count(200) != 1:
+            double_spends += 1
+    server.shutdown()
+
+    refresh_token = _login(client)
+    samples = []
+    with QueryCounters(engines) as counter:
+        for _ in range(args.chain):
+            started = time.perf_counter()
+            response = client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+            samples.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.get_data(as_text=True)
+            refresh_token = response.get_json()["refresh_token"]
+    samples.sort()
+
+    print(
+        json.dumps(
+            {
+                "race": {
+                    "rounds": args.rounds,
+                    "concurrency": args.concurrency,
+                    "statuses": {str(status): count for status, count in sorted(outcomes.items())},
+                    "rounds_without_exactly_one_success": double_spends,
+                },
+                "chain": {
+                    "refreshes": args.chain,
+                    "p50_ms": round(statistics.median(samples) * 1000, 3),
+                    "p99_ms": round(_percentile(samples, 0.99) * 1000, 3),
+                    "queries_per_refresh": round(counter.count / args.chain, 2),
+                },
+            },
+            indent=2,
+        )
+    )
+    if double_spends:
+        print(f"{double_spends} round(s) did not have exactly one successful refresh", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Latency of ``GET /api/todos`` keyset pages at increasing depth.
+
+Seeds ``--rows`` todos (default 1M), then times the first page and pages
+starting deep into the table, with and without the ``content`` column.
+
+Usage: python -m benchmarks.bench_todos_pagination [--rows 1000000] [--limit 50]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+
+from ._support import make_app, timer
+from .seed import seed_todos
+
+
+def cursor_at_depth(depth: int) -> str:
+    from sqlalchemy import desc
+
+    from app.models import Todo
+    from app.routes.todos import _encode_cursor
+
+    todo = (
+        Todo.query.order_by(desc(Todo.created_at), desc(Todo.id)).offset(depth).limit(1).first()
+    )
+    return _encode_cursor(todo)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seed_todos(args.rows)
+        depths = [0] + [d for d in (args.rows // 10, args.rows // 2, args.rows - args.limit - 1) if d > 0]
+        cursors = {depth: cursor_at_depth(depth) if depth else None for depth in depths}
+    client = app.test_client()
+
+    results = []
+    for depth, cursor in cursors.items():
+        for fields in (None, "id,title,status,author,heat,created_at"):
+            params = {"limit": args.limit}
+            if cursor:
+                params["cursor"] = cursor
+            if fields:
+                params["fields"] = fields
+            samples = []
+            for _ in range(args.repeat):
+                with timer() as elapsed:
+                    response = client.get("/api/todos", query_string=params)
+                assert response.status_code == 200, response.get_data(as_text=True)
+                samples.append(elapsed["seconds"] * 1000)
+            results.append(
+                {
+                    "depth": depth,
+                    "fields": fields or "all",
+                    "rows": len(response.get_json()),
+                    "bytes": len(response.get_data()),
+                    "p50_ms": round(statistics.median(samples), 3),
+                    "max_ms": round(max(samples), 3),
+                }
+            )
+
+    print(json.dumps({"seeded_rows": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
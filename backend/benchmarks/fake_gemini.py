@@ -0,0 +1,115 @@
+"""Local stand-in for the Gemini REST API.
+
+Serves ``:generateContent`` and ``:streamGenerateContent?alt=sse`` for any
+model, echoing the prompt back word by word with a configurable delay, so the
+chat endpoints can be exercised without network access or an API key.
+
+Usage: python -m benchmarks.fake_gemini [--port 8765] [--token-delay-ms 20]
+
+Then run the backend with ``GEMINI_BASE_URL=http://127.0.0.1:8765`` and any
+non-empty ``GEMINI_API_KEY``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _response(text: str, finished: bool) -> dict:
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate]}
+
+
+def _prompt_text(body: dict) -> str:
+    parts = [
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    ]
+    return " ".join(part for part in parts if part)
+
+
+def make_handler(tokens: int, token_delay: float, first_token_delay: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # noqa: A002 - keep stderr quiet
+            pass
+
+        def _words(self) -> list[str]:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            words = f"echo: {_prompt_text(body)}".split()
+            while len(words) < tokens:
+                words.append(f"token{len(words)}")
+            return [word + " " for word in words[:tokens]]
+
+        def do_POST(self):  # noqa: N802 - http.server naming
+            path = self.path.split("?", 1)[0]
+            words = self._words()
+            time.sleep(first_token_delay)
+            if path.endswith(":streamGenerateContent"):
+                self._stream(words)
+            elif path.endswith(":generateContent"):
+                time.sleep(token_delay * len(words))
+                body = json.dumps(_response("".join(words), True)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_error(404)
+
+        def _stream(self, words: list[str]) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for index, word in enumerate(words):
+                    if index:
+                        time.sleep(token_delay)
+                    event = f"data: {json.dumps(_response(word, index == len(words) - 1))}\r\n\r\n"
+                    data = event.encode()
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # The caller gave up on the stream (e.g. the browser disconnected).
+                self.close_connection = True
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open hundreds of connections at once.
+    request_queue_size = 4096
+
+
+def serve(host: str, port: int, tokens: int, token_delay_ms: float, first_token_delay_ms: float):
+    handler = make_handler(tokens, token_delay_ms / 1000, first_token_delay_ms / 1000)
+    return _Server((host, port), handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay-ms", type=float, default=20)
+    parser.add_argument("--first-token-delay-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.tokens, args.token_delay_ms, args.first_token_delay_ms)
+    print(f"fake Gemini listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Seed a benchmark database with realistic volumes.
+
+Users and todos are written with batched core INSERTs; graphs go through
+``service.graphs.create_graph`` so their rows look exactly like ones created
+through the API. Every seeded user has the password ``SEED_PASSWORD``.
+
+Usage: python -m benchmarks.seed [--users 100000] [--todos 1000000]
+       [--graphs 1] [--graph-nodes 10000] [--graph-edges 50000]
+
+Without ``DATABASE_URL`` this seeds a throwaway SQLite file and prints its
+path; point ``DATABASE_URL`` at a MySQL container to seed that instead.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+from ._support import make_app, timer
+from .bench_graph_create import build_payload
+
+SEED_PASSWORD = "bench-password"
+
+
+def seed_email(user_id: int) -> str:
+    return f"user{user_id}@bench.example"
+
+
+def seed_users(count: int, batch_size: int = 20000) -> None:
+    from flask import current_app
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+
+    from app.extensions import db
+    from app.models import User
+
+    # One hash shared by every row: hashing 100k passwords would dominate seeding.
+    password_hash = generate_password_hash(SEED_PASSWORD, method=current_app.config["PASSWORD_HASH_METHOD"])
+    now = datetime(2024, 1, 1)
+    for offset in range(0, count, batch_size):
+        batch = [
+            {
+                "id": i,
+                "email": seed_email(i),
+                "nickname": f"user-{i}",
+                "password_hash": password_hash,
+                "is_active": True,
+                "failed_login_count": 0,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(offset + 1, min(offset + batch_size, count) + 1)
+        ]
+        db.session.execute(insert(User), batch)
+    db.session.commit()
+
+
+def seed_todos(rows: int, users: int = 0, batch_size: int = 20000) -> None:
+    from sqlalchemy import insert
+
+    from app.extensions import db
+    from app.models import Todo
+
+    start = datetime(2024, 1, 1)
+    content = "lorem ipsum dolor sit amet " * 20
+    for offset in range(0, rows, batch_size):
+        batch = [
+            {
+                "id": i + 1,
+                "user_id": i % users + 1 if users else None,
+                "title": f"Todo {i}",
+                "content": content,
+                "status": "Pending",
+                "author": "bench",
+                "heat": i % 97,
+                # Every 10 todos share a timestamp so the id tie-breaker is exercised.
+                "created_at": start + timedelta(seconds=i // 10),
+                "updated_at": start,
+            }
+            for i in range(offset, min(offset + batch_size, rows))
+        ]
+        db.session.execute(insert(Todo), batch)
+    db.session.commit()
+
+
+def seed_graphs(count: int, nodes: int, edges: int, owner_id: int = 1) -> list[str]:
+    from app.service.auth import AuthUser
+    from app.service.graphs import create_graph
+
+    owner = AuthUser(id=owner_id, email=seed_email(owner_id), nickname=f"user-{owner_id}", is_active=True)
+    edges_per_node = max(1, round(edges / nodes)) if nodes else 0
+    graph_ids = []
+    for _ in range(count):
+        graph, _, _ = create_graph(owner, build_payload(nodes, edges_per_node))
+        graph_ids.append(graph.id)
+    return graph_ids
+
+
+def seed_all(users: int, todos: int, graphs: int, graph_nodes: int, graph_edges: int) -> dict:
+    """Seed everything into the current app's database; returns what was created."""
+    timings = {}
+    with timer() as elapsed:
+        seed_users(max(1, users))
+    timings["users_s"] = round(elapsed["seconds"], 2)
+    with timer() as elapsed:
+        seed_todos(todos, users)
+    timings["todos_s"] = round(elapsed["seconds"], 2)
+    with timer() as elapsed:
+        graph_ids = seed_graphs(graphs, graph_nodes, graph_edges)
+    timings["graphs_s"] = round(elapsed["seconds"], 2)
+    return {
+        "users": max(1, users),
+        "todos": todos,
+        "graph_ids": graph_ids,
+        "graph_nodes": graph_nodes,
+        "graph_edges": graph_nodes * max(1, round(graph_edges / graph_nodes)) if graph_nodes else 0,
+        "seed_timings": timings,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--todos", type=int, default=1_000_000)
+    parser.add_argument("--graphs", type=int, default=1)
+    parser.add_argument("--graph-nodes", type=int, default=10_000)
+    parser.add_argument("--graph-edges", type=int, default=50_000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        seeded = seed_all(args.users, args.todos, args.graphs, args.graph_nodes, args.graph_edges)
+    print(json.dumps({"database_url": os.environ["DATABASE_URL"], **seeded}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Benchmark suite for the todos, graphs and auth blueprints.
+
+Seeds a database (see ``benchmarks.seed``; ``--scale`` shrinks the default
+1M todos / 100k users / 10k-node 50k-edge graph), then drives each scenario
+through two drivers:
+
+* ``client``: the Flask test client, one request at a time. Measures the
+  handler itself without any network or server overhead.
+* ``http``: a threaded HTTP/1.1 server on a free port, hit by
+  ``--concurrency`` keep-alive connections.
+
+Each result reports p50/p99 latency, throughput and SQL statements per
+request as JSON (stdout, and ``--output`` if given). With ``--baseline``
+a previous output is compared against: more queries per request, or a p50
+more than ``--tolerance`` slower, is listed under ``regressions`` and the
+script exits non-zero.
+
+Usage: python -m benchmarks.suite [--scale 0.01] [--requests 200]
+       [--drivers client,http] [--scenarios todos,graphs.get]
+       [--output results.json] [--baseline results.json]
+"""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ._support import QueryCounters, auth_headers, make_app
+from .bench_todos_pagination import cursor_at_depth
+from .seed import SEED_PASSWORD, add_arguments, seed_all, seed_email
+
+# How many distinct users authenticated scenarios rotate through.
+TOKEN_USERS = 100
+
+
+def build_scenarios(app, seeded: dict) -> list[dict]:
+    """Each scenario: name, method, a path, and optional body/auth.
+
+    ``auth`` is True for a bearer token of a rotating seeded user. ``share``
+    scales the request count for scenarios that are expensive on purpose
+    (login hashes a password).
+    """
+    users = seeded["users"]
+    with app.app_context():
+        deep_cursor = cursor_at_depth(seeded["todos"] // 2) if seeded["todos"] > 100 else None
+    graph_id = seeded["graph_ids"][0] if seeded["graph_ids"] else None
+    if graph_id:
+        from app.models import Node
+
+        with app.app_context():
+            titles = dict(
+                Node.query.with_entities(Node.title, Node.id)
+                .filter(Node.graph_id == graph_id, Node.title.in_(["Node 0", f"Node {seeded['graph_nodes'] // 2}"]))
+                .all()
+            )
+        start, far = titles.get("Node 0"), titles.get(f"Node {seeded['graph_nodes'] // 2}")
+
+    scenarios = [
+        {"name": "todos.list", "method": "GET", "path": "/api/todos?limit=50"},
+        {"name": "todos.list_fields", "method": "GET", "path": "/api/todos?limit=50&fields=id,title,status,heat"},
+        {"name": "todos.hot", "method": "GET", "path": "/api/todos/hot?k=10"},
+        {"name": "todos.mine", "method": "GET", "path": "/api/todos/mine", "auth": True},
+        {
+            "name": "todos.create",
+            "method": "POST",
+            "path": "/api/todos",
+            "auth": True,
+            "body": {"title": "bench", "content": "created by the benchmark suite"},
+        },
+        {"name": "auth.me", "method": "GET", "path": "/api/auth/me", "auth": True},
+        # Seeded todos are titled "Todo <i>" and share one lorem ipsum body:
+        # one word matches a single todo, the other every todo.
+        {"name": "search.rare", "method": "GET", "path": f"/api/search?q={seeded['todos'] // 3}", "auth": True},
+        {"name": "search.common", "method": "GET", "path": "/api/search?q=lorem", "auth": True},
+        {
+            "name": "auth.login",
+            "method": "POST",
+            "path": "/api/auth/login",
+            "body": lambda i: {"email": seed_email(i % users + 1), "password": SEED_PASSWORD},
+            "share": 0.1,
+        },
+    ]
+    if deep_cursor:
+        scenarios.insert(1, {"name": "todos.list_deep", "method": "GET", "path": f"/api/todos?limit=50&cursor={deep_cursor}"})
+    if graph_id:
+        # Graphs are owned by user 1, so these always use its token.
+        scenarios += [
+            {"name": "graphs.mine", "method": "GET", "path": "/api/graphs/mine", "auth": 1},
+            {"name": "graphs.get", "method": "GET", "path": f"/api/graphs/{graph_id}", "auth": 1},
+            {"name": "graphs.get_stream", "method": "GET", "path": f"/api/graphs/{graph_id}?stream=1", "auth": 1},
+            {"name": "graphs.neighbors", "method": "GET", "path": f"/api/graphs/{graph_id}/neighbors?node={start}", "auth": 1},
+            {"name": "graphs.khop", "method": "GET", "path": f"/api/graphs/{graph_id}/khop?node={start}&k=3", "auth": 1},
+            {"name": "graphs.path", "method": "GET", "path": f"/api/graphs/{graph_id}/path?from={start}&to={far}", "auth": 1},
+            # Seeded nodes sit on a 40-unit grid, 100 per row.
+            {"name": "graphs.viewport", "method": "GET", "path": f"/api/graphs/{graph_id}/viewport?bbox=0,0,1600,900&zoom=1", "auth": 1},
+            {
+                "name": "graphs.viewport_far",
+                "method": "GET",
+                "path": f"/api/graphs/{graph_id}/viewport?bbox=-1e6,-1e6,1e6,1e6&zoom=0.05",
+                "auth": 1,
+            },
+        ]
+    return scenarios
+
+
+class _Requests:
+    """Materializes the i-th request of a scenario: (method, path, headers, body)."""
+
+    def __init__(self, scenario: dict, tokens: list[dict]) -> None:
+        self.scenario = scenario
+        self.tokens = tokens
+
+    def __call__(self, index: int) -> tuple[str, str, dict, bytes | None]:
+        scenario = self.scenario
+        headers = {}
+        auth = scenario.get("auth")
+        if auth is True:
+            headers.update(self.tokens[index % len(self.tokens)])
+        elif auth:
+            headers.update(self.tokens[auth - 1])
+        body = scenario.get("body")
+        if callable(body):
+            body = body(index)
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(body).encode()
+        return scenario["method"], scenario["path"], headers, body
+
+
+def _percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _summarize(name: str, driver: str, samples: list[float], errors: int, wall: float, queries: int) -> dict:
+    samples.sort()
+    total = len(samples) + errors
+    return {
+        "scenario": name,
+        "driver": driver,
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(_percentile(samples, 0.5) * 1000, 3) if samples else None,
+        "p99_ms": round(_percentile(samples, 0.99) * 1000, 3) if samples else None,
+        "throughput_rps": round(total / wall, 1) if wall else None,
+        "queries_per_request": round(queries / total, 2) if total else None,
+    }
+
+
+def run_client(app, engines, scenario: dict, make_request: _Requests, count: int) -> dict:
+    client = app.test_client()
+    samples, errors = [], 0
+    with QueryCounters(engines) as counter:
+        started = time.perf_counter()
+        for index in range(count):
+            method, path, headers, body = make_request(index)
+            request_started = time.perf_counter()
+            # buffered: consume and close streamed bodies like a real server would.
+            response = client.open(path, method=method, headers=headers, data=body, buffered=True)
+            elapsed = time.perf_counter() - request_started
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                samples.append(elapsed)
+        wall = time.perf_counter() - started
+    return _summarize(scenario["name"], "client", samples, errors, wall, counter.count)
+
+
+def _serve_http(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs) -> None:
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=KeepAliveHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_http(port: int, engines, scenario: dict, make_request: _Requests, count: int, concurrency: int) -> dict:
+    local = threading.local()
+    lock = threading.Lock()
+    samples, errors = [], 0
+
+    def one(index: int) -> None:
+        nonlocal errors
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        method, path, headers, body = make_request(index)
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            local.connection = None
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok:
+                samples.append(elapsed)
+            else:
+                errors += 1
+
+    with QueryCounters(engines) as counter, ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        list(pool.map(one, range(count)))
+        wall = time.perf_counter() - started
+    return _summarize(scenario["name"], "http", samples, errors, wall, counter.count)
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    previous = {(row["scenario"], row["driver"]): row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get((row["scenario"], row["driver"]))
+        if before is None:
+            continue
+        if (row["queries_per_request"] or 0) > (before["queries_per_request"] or 0):
+            regressions.append(
+                {**_key(row), "metric": "queries_per_request", "baseline": before["queries_per_request"], "current": row["queries_per_request"]}
+            )
+        if before["p50_ms"] and row["p50_ms"] and row["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append({**_key(row), "metric": "p50_ms", "baseline": before["p50_ms"], "current": row["p50_ms"]})
+    return regressions
+
+
+def _key(row: dict) -> dict:
+    return {"scenario": row["scenario"], "driver": row["driver"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every seed volume")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and driver")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections for the http driver")
+    parser.add_argument("--drivers", default="client,http")
+    parser.add_argument("--scenarios", default="", help="comma-separated name prefixes, e.g. todos,graphs.get")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown vs the baseline")
+    args = parser.parse_args()
+
+    volumes = {
+        "users": max(1, int(args.users * args.scale)),
+        "todos": int(args.todos * args.scale),
+        "graphs": args.graphs,
+        "graph_nodes": int(args.graph_nodes * args.scale),
+        "graph_edges": int(args.graph_edges * args.scale),
+    }
+    app = make_app()
+    # Every request comes from 127.0.0.1; measure login itself, not its per-IP limit.
+    app.config["LOGIN_THROTTLE_MAX_PER_IP"] = 10**9
+    with app.app_context():
+        from app.extensions import db
+
+        seeded = seed_all(**volumes)
+        engines = list(db.engines.values())
+
+    tokens = [auth_headers(app, user_id) for user_id in range(1, min(seeded["users"], TOKEN_USERS) + 1)]
+    scenarios = build_scenarios(app, seeded)
+    prefixes = [prefix for prefix in args.scenarios.split(",") if prefix]
+    if prefixes:
+        scenarios = [s for s in scenarios if any(s["name"].startswith(prefix) for prefix in prefixes)]
+
+    drivers = [driver for driver in args.drivers.split(",") if driver]
+    server = _serve_http(app) if "http" in drivers else None
+    results = []
+    for scenario in scenarios:
+        make_request = _Requests(scenario, tokens)
+        count = max(1, int(args.requests * scenario.get("share", 1)))
+        # One untimed request warms caches (graph snapshot, hot index, hasher pool).
+        method, path, headers, body = make_request(0)
+        app.test_client().open(path, method=method, headers=headers, data=body, buffered=True)
+        if "client" in drivers:
+            results.append(run_client(app, engines, scenario, make_request, count))
+        if server is not None:
+            results.append(run_http(server.server_port, engines, scenario, make_request, count, args.concurrency))
+    if server is not None:
+        server.shutdown()
+    results.sort(key=lambda row: (row["scenario"], row["driver"]))
+
+    report = {
+        "config": {
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split("://", 1)[0],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "seed": seeded,
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            report["regressions"] = compare(results, json.load(baseline)["results"], args.tolerance)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    if report.get("regressions"):
+        print(f"{len(report['regressions'])} regression(s) vs {args.baseline}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""graph revision counter
+
+Revision ID: 8a3d5e1f7b20
+Revises: 2c4b1e9a1d1a
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8a3d5e1f7b20"
+down_revision = "2c4b1e9a1d1a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "graphs",
+        sa.Column("revision", sa.Integer(), nullable=False, server_default=sa.text("1")),
+    )
+    op.alter_column("graphs", "revision", server_default=None)
+
+
+def downgrade():
+    op.drop_column("graphs", "revision")
@@ -0,0 +1,37 @@
+"""edges graph_id
+
+Revision ID: b7e2c94a0d31
+Revises: 8a3d5e1f7b20
+Create Date: 2026-10-18 00:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b7e2c94a0d31"
+down_revision = "8a3d5e1f7b20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("edges", sa.Column("graph_id", sa.String(length=36), nullable=True))
+    op.execute(
+        "UPDATE edges SET graph_id = "
+        "(SELECT nodes.graph_id FROM nodes WHERE nodes.id = edges.from_node_id)"
+    )
+    op.alter_column(
+        "edges", "graph_id", existing_type=sa.String(length=36), nullable=False
+    )
+    op.create_foreign_key("fk_edges_graph_id", "edges", "graphs", ["graph_id"], ["id"])
+    op.create_index(
+        "ix_edges_graph_id_from_node_id", "edges", ["graph_id", "from_node_id"], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index("ix_edges_graph_id_from_node_id", table_name="edges")
+    op.drop_constraint("fk_edges_graph_id", "edges", type_="foreignkey")
+    op.drop_column("edges", "graph_id")
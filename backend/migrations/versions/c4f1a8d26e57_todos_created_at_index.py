@@ -0,0 +1,23 @@
+"""todos (created_at, id) index
+
+Revision ID: c4f1a8d26e57
+Revises: b7e2c94a0d31
+Create Date: 2026-10-18 00:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c4f1a8d26e57"
+down_revision = "b7e2c94a0d31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_todos_created_at_id", "todos", ["created_at", "id"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_todos_created_at_id", table_name="todos")
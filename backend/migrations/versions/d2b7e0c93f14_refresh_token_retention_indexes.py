@@ -0,0 +1,36 @@
+"""refresh token retention indexes
+
+Revision ID: d2b7e0c93f14
+Revises: c4f1a8d26e57
+Create Date: 2026-10-18 01:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d2b7e0c93f14"
+down_revision = "c4f1a8d26e57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Created before dropping ix_refresh_tokens_user_id so the user_id foreign
+    # key always has an index (MySQL refuses to drop it otherwise).
+    op.create_index(
+        "ix_refresh_tokens_user_active",
+        "refresh_tokens",
+        ["user_id", "revoked_at", "expires_at"],
+        unique=False,
+    )
+    op.drop_index("ix_refresh_tokens_user_id", table_name="refresh_tokens")
+    op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"], unique=False)
+    op.create_index("ix_refresh_tokens_revoked_at", "refresh_tokens", ["revoked_at"], unique=False)
+
+
+def downgrade():
+    op.drop_index("ix_refresh_tokens_revoked_at", table_name="refresh_tokens")
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")
+    op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"], unique=False)
+    op.drop_index("ix_refresh_tokens_user_active", table_name="refresh_tokens")
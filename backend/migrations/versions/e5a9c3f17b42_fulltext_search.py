@@ -0,0 +1,45 @@
+"""full-text search indexes on todos and nodes
+
+Revision ID: e5a9c3f17b42
+Revises: d2b7e0c93f14
+Create Date: 2026-10-18 03:00:00.000000
+
+"""
+from alembic import op
+
+from app.models.fulltext import sqlite_fts5_ddl
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a9c3f17b42"
+down_revision = "d2b7e0c93f14"
+branch_labels = None
+depends_on = None
+
+FULLTEXT = (
+    ("ft_todos_title_content", "todos", ("title", "content"), "id"),
+    ("ft_nodes_title_summary", "nodes", ("title", "summary"), "rowid"),
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for name, table, columns, rowid in FULLTEXT:
+        if dialect == "mysql":
+            # InnoDB builds the index from the existing rows.
+            op.create_index(name, table, list(columns), mysql_prefix="FULLTEXT", mysql_with_parser="ngram")
+        elif dialect == "sqlite":
+            for statement in sqlite_fts5_ddl(table, columns, rowid):
+                op.execute(statement)
+            op.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for name, table, _, _ in FULLTEXT:
+        if dialect == "mysql":
+            op.drop_index(name, table_name=table)
+        elif dialect == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
@@ -0,0 +1,139 @@
+"""Every test gets the app over a freshly created, throwaway SQLite database.
+
+Run from ``backend/`` with ``poetry run pytest``.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+_fd, _DB_PATH = tempfile.mkstemp(prefix="test-", suffix=".db")
+os.close(_fd)
+# Before anything imports app.config, which reads the environment once; tests
+# never run against DATABASE_URL, since each one drops and recreates the tables.
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ.setdefault("JWT_SECRET", "test-secret-" + "x" * 32)
+# Hash inline: a process pool per test costs a worker spawn each time.
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+from sqlalchemy import event  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import User  # noqa: E402
+
+USER_EMAIL = "user@example.com"
+USER_PASSWORD = "correct horse battery staple"
+
+
+@pytest.fixture
+def app(request):
+    # Config overrides: @pytest.mark.parametrize("app", [{...}], indirect=True).
+    app = create_app(getattr(request, "param", None))
+    with app.app_context():
+        # Only the default bind: a replica bind is a copy of it, not a schema of its own.
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app) -> dict:
+    """A stored user who can log in with ``email`` and ``password``."""
+    with app.app_context():
+        password_hash = generate_password_hash(USER_PASSWORD, method=app.config["PASSWORD_HASH_METHOD"])
+        row = User(email=USER_EMAIL, nickname="user", password_hash=password_hash)
+        db.session.add(row)
+        db.session.commit()
+        return {"id": row.id, "email": USER_EMAIL, "password": USER_PASSWORD}
+
+
+@pytest.fixture
+def auth_headers(client, user) -> dict:
+    response = client.post("/api/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+@pytest.fixture
+def graph_payload():
+    """``graph_payload(n)``: a POST /api/graphs body with ``n`` nodes on a grid."""
+
+    def build(node_count: int, edges_per_node: int = 2) -> dict:
+        nodes = [
+            {
+                "id": f"n{i}",
+                "title": f"Node {i}",
+                "node_type": "person",
+                "position": {"x": float(i % 100) * 40, "y": float(i // 100) * 40},
+                "style": {"width": 120, "height": 40},
+            }
+            for i in range(node_count)
+        ]
+        edges = [
+            {"source": f"n{i}", "target": f"n{(i + step) % node_count}", "label": "knows"}
+            for i in range(node_count)
+            for step in range(1, edges_per_node + 1)
+        ]
+        return {"graph": {"name": f"test-{node_count}"}, "nodes": nodes, "edges": edges}
+
+    return build
+
+
+class _Counted:
+    count = 0
+
+
+@pytest.fixture
+def query_count(app):
+    """``with query_count() as counted:`` counts statements sent on every engine."""
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    @contextmanager
+    def count():
+        counted = _Counted()
+
+        def on_execute(*args, **kwargs) -> None:
+            counted.count += 1
+
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", on_execute)
+        try:
+            yield counted
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", on_execute)
+
+    return count
+
+
+@pytest.fixture
+def live_server(app):
+    """The app on a threaded HTTP server, for requests that must really overlap."""
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def pytest_sessionfinish(session, exitstatus) -> None:
+    if os.path.exists(_DB_PATH):
+        os.remove(_DB_PATH)
@@ -0,0 +1,125 @@
+"""The ASGI handlers compress, report metrics and read the replica like Flask does."""
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+pytest.importorskip("a2wsgi")
+httpx = pytest.importorskip("httpx")
+
+from sqlalchemy import update  # noqa: E402
+
+from app.asgi import create_asgi_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import Graph  # noqa: E402
+from app.service.async_db import dispose_async_engines  # noqa: E402
+
+_fd, _REPLICA_PATH = tempfile.mkstemp(prefix="test-replica-", suffix=".db")
+os.close(_fd)
+_REPLICA = {"SQLALCHEMY_BINDS": {"replica": {"url": f"sqlite:///{_REPLICA_PATH}"}}}
+
+
+def _serve(app, requests):
+    """Run ``requests(client)`` against the ASGI app; returns its result."""
+
+    async def run():
+        transport = httpx.ASGITransport(app=create_asgi_app(app))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await requests(client)
+        finally:
+            await dispose_async_engines(app)
+
+    return asyncio.run(run())
+
+
+def _create_graph(client, auth_headers, graph_payload, nodes: int = 200) -> str:
+    created = client.post("/api/graphs", json=graph_payload(nodes), headers=auth_headers)
+    assert created.status_code == 201, created.get_data(as_text=True)
+    return created.get_json()["graph"]["id"]
+
+
+def test_graph_stream_is_compressed_and_measured(app, client, auth_headers, graph_payload):
+    graph_id = _create_graph(client, auth_headers, graph_payload)
+    url = f"/api/graphs/{graph_id}?stream=1"
+
+    async def requests(asgi):
+        compressed = await asgi.get(url, headers={**auth_headers, "Accept-Encoding": "gzip"})
+        identity = await asgi.get(url, headers={**auth_headers, "Accept-Encoding": "identity"})
+        revalidated = await asgi.get(url, headers={**auth_headers, "If-None-Match": compressed.headers["ETag"]})
+        metrics = await asgi.get("/metrics")
+        return compressed, identity, revalidated, metrics
+
+    compressed, identity, revalidated, metrics = _serve(app, requests)
+    assert compressed.status_code == 200
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert compressed.headers["ETag"].startswith("W/")
+    assert compressed.num_bytes_downloaded < len(identity.content)
+    assert compressed.json() == identity.json()
+    assert len(identity.json()["nodes"]) == 200
+    assert "Content-Encoding" not in identity.headers
+    assert not identity.headers["ETag"].startswith("W/")
+    assert revalidated.status_code == 304
+
+    text = metrics.text
+    assert 'app_requests_total{endpoint="graphs.get_graph",method="GET",status="200"} 2' in text
+    sums = [line for line in text.splitlines() if line.startswith('app_db_queries_per_request_sum{endpoint="graphs.get_graph"')]
+    assert sums and int(sums[0].split()[-1]) > 0
+
+
+def test_chat_errors_are_measured(app):
+    async def requests(asgi):
+        # No GEMINI_API_KEY: the handler hands the request to Flask.
+        rejected = await asgi.post("/api/chat", json={"prompt": ""})
+        metrics = await asgi.get("/metrics")
+        return rejected, metrics
+
+    rejected, metrics = _serve(app, requests)
+    assert rejected.status_code == 400
+    # Counted once, by Flask.
+    assert 'app_requests_total{endpoint="chat.chat",method="POST",status="400"} 1' in metrics.text
+
+
+@pytest.mark.parametrize("app", [{**_REPLICA, "REPLICA_STALE_READ_SECONDS": 0}], indirect=True)
+def test_graph_stream_reads_the_replica(app, client, auth_headers, graph_payload):
+    graph_id = _create_graph(client, auth_headers, graph_payload, nodes=3)
+    with sqlite3.connect(_REPLICA_PATH) as replica, sqlite3.connect(app.config["SQLALCHEMY_DATABASE_URI"][10:]) as primary:
+        primary.backup(replica)
+    with app.app_context():
+        db.session.execute(update(Graph).where(Graph.id == graph_id).values(name="renamed on the primary"))
+        db.session.commit()
+
+    async def requests(asgi):
+        return await asgi.get(f"/api/graphs/{graph_id}?stream=1", headers=auth_headers)
+
+    response = _serve(app, requests)
+    assert response.status_code == 200
+    assert response.json()["graph"]["name"] == "test-3"
+
+
+@pytest.mark.parametrize("app", [{**_REPLICA, "REPLICA_STALE_READ_SECONDS": 60}], indirect=True)
+def test_graph_stream_after_a_write_reads_the_primary(app, auth_headers, graph_payload):
+    async def requests(asgi):
+        # Written through the ASGI app, so this client counts as a recent writer.
+        created = await asgi.post("/api/graphs", json=graph_payload(3), headers=auth_headers)
+        assert created.status_code == 201, created.text
+        graph_id = created.json()["graph"]["id"]
+        with sqlite3.connect(_REPLICA_PATH) as replica:
+            replica.execute("DELETE FROM graphs")
+        return await asgi.get(f"/api/graphs/{graph_id}?stream=1", headers=auth_headers)
+
+    with sqlite3.connect(_REPLICA_PATH) as replica, sqlite3.connect(app.config["SQLALCHEMY_DATABASE_URI"][10:]) as primary:
+        primary.backup(replica)
+    response = _serve(app, requests)
+    assert response.status_code == 200
+    assert response.json()["graph"]["name"] == "test-3"
+
+
+def teardown_module() -> None:
+    if os.path.exists(_REPLICA_PATH):
+        os.remove(_REPLICA_PATH)
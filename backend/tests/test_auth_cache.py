@@ -0,0 +1,53 @@
+"""The access-token cache forgets a user once a deactivation commits."""
+from __future__ import annotations
+
+import time
+
+from app.extensions import db
+from app.models import User
+from app.service.auth import AccessTokenCache, AuthUser, get_auth_cache
+
+
+def test_deactivation_invalidates_on_commit(app, client, user, auth_headers):
+    assert client.get("/api/auth/me", headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        cache = get_auth_cache()
+        row = db.session.get(User, user["id"])
+        row.is_active = False
+        db.session.flush()
+        # Flushed but not committed: other requests still see the active row.
+        assert cache.get_user(user["id"]) is not None
+        db.session.commit()
+        assert cache.get_user(user["id"]) is None
+    assert client.get("/api/auth/me", headers=auth_headers).status_code == 403
+
+
+def test_rolled_back_change_keeps_cache(app, client, user, auth_headers):
+    assert client.get("/api/auth/me", headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        cache = get_auth_cache()
+        row = db.session.get(User, user["id"])
+        row.is_active = False
+        db.session.flush()
+        db.session.rollback()
+        # The next commit must not act on the rolled-back change.
+        db.session.commit()
+        assert cache.get_user(user["id"]) is not None
+
+
+def test_row_read_before_invalidation_is_not_cached():
+    cache = AccessTokenCache(ttl=30, max_entries=10)
+    generation = cache.generation
+    cache.invalidate_user(1)
+    cache.put_user(AuthUser(id=1, email="a@example.com", nickname="a", is_active=True), generation)
+    assert cache.get_user(1) is None
+
+
+def test_evicted_tokens_drop_empty_user_sets():
+    cache = AccessTokenCache(ttl=30, max_entries=2)
+    exp = time.time() + 60
+    for user_id in (1, 2, 3):
+        cache.put_token(f"token-{user_id}", {"sub": str(user_id), "exp": exp})
+    assert cache.stats()["tracked_users"] == 2
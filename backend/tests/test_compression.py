@@ -0,0 +1,92 @@
+"""/api responses are compressed with the best encoding the client accepts."""
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from app.service.compression import ResponseCompressor
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("gzip;q=0, identity", None),
+        ("*", "br"),
+        ("*;q=0.1, gzip;q=0.5", "gzip"),
+        ("deflate", None),
+        ("", None),
+    ],
+)
+def test_negotiate_picks_the_highest_quality(header, expected):
+    pytest.importorskip("brotli")
+    compressor = ResponseCompressor(["br", "gzip"], min_bytes=0)
+    assert compressor.negotiate(parse_accept_header(header, Accept)) == expected
+
+
+def test_gzip_only_never_offers_br():
+    compressor = ResponseCompressor(["gzip"], min_bytes=0)
+    assert compressor.negotiate(parse_accept_header("br", Accept)) is None
+
+
+@pytest.fixture
+def graph_id(client, auth_headers, graph_payload) -> str:
+    created = client.post("/api/graphs", json=graph_payload(200), headers=auth_headers)
+    assert created.status_code == 201, created.get_data(as_text=True)
+    return created.get_json()["graph"]["id"]
+
+
+def _get(client, auth_headers, path: str, encoding: str):
+    return client.get(path, headers={**auth_headers, "Accept-Encoding": encoding})
+
+
+@pytest.mark.parametrize("query", ["", "?stream=1"])
+def test_graph_documents_are_gzipped(client, auth_headers, graph_id, query):
+    path = f"/api/graphs/{graph_id}{query}"
+    identity = _get(client, auth_headers, path, "identity")
+    compressed = _get(client, auth_headers, path, "gzip")
+    assert "Content-Encoding" not in identity.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.vary
+    assert len(compressed.get_data()) < len(identity.get_data())
+    assert json.loads(gzip.decompress(compressed.get_data())) == json.loads(identity.get_data())
+    assert compressed.headers["ETag"] != identity.headers["ETag"]
+
+
+def test_brotli_when_preferred(client, auth_headers, graph_id):
+    brotli = pytest.importorskip("brotli")
+    response = _get(client, auth_headers, f"/api/graphs/{graph_id}", "br, gzip")
+    assert response.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(response.get_data()))["graph"]["id"] == graph_id
+
+
+def test_small_bodies_are_sent_as_is(client, auth_headers):
+    response = _get(client, auth_headers, "/api/todos", "gzip")
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.vary
+
+
+def test_only_api_responses_are_compressed(client, auth_headers, graph_id):
+    # /health/stats is well over COMPRESS_MIN_BYTES once the caches have run.
+    _get(client, auth_headers, f"/api/graphs/{graph_id}", "gzip")
+    assert "Content-Encoding" not in client.get("/health/stats", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_stats_count_compressed_responses(client, auth_headers, graph_id):
+    _get(client, auth_headers, f"/api/graphs/{graph_id}?stream=1", "gzip")
+    stats = client.get("/health/stats").get_json()["compression"]["gzip"]
+    assert stats["responses"] == 1
+    assert stats["bytes_out"] < stats["bytes_in"]
+
+
+@pytest.mark.parametrize("app", [{"COMPRESS_ENABLED": False}], indirect=True)
+def test_compression_can_be_disabled(client, auth_headers, graph_id):
+    response = _get(client, auth_headers, f"/api/graphs/{graph_id}?stream=1", "gzip")
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,48 @@
+"""Pool metrics count checkout waits and timeouts, also after the pool is recreated."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import exc
+
+from app.extensions import db
+from app.service.db_pool import TimedQueuePool, pool_stats
+
+_ONE_CONNECTION = {
+    "SQLALCHEMY_ENGINE_OPTIONS": {
+        "poolclass": TimedQueuePool,
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": 1,
+    }
+}
+
+
+def _time_out_a_checkout(engine) -> None:
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+
+@pytest.mark.parametrize("app", [_ONE_CONNECTION], indirect=True)
+def test_checkout_timeouts_survive_dispose(app):
+    with app.app_context():
+        engine = db.engine
+        _time_out_a_checkout(engine)
+        stats = pool_stats(app)["primary"]
+        assert stats["pool"] == "TimedQueuePool"
+        assert stats["timeouts"] == 1
+        assert stats["max_wait_ms"] >= 1000
+
+        engine.dispose()
+        _time_out_a_checkout(engine)
+        stats = pool_stats(app)["primary"]
+        assert stats["timeouts"] == 2
+        assert stats["checked_out"] == 0
+
+
+def test_default_engine_times_checkouts(app, client, auth_headers):
+    assert client.get("/api/todos", headers=auth_headers).status_code == 200
+    stats = pool_stats(app)["primary"]
+    assert stats["pool"] == "TimedQueuePool"
+    assert stats["checkouts"] >= 1
+    assert stats["avg_wait_ms"] > 0
@@ -0,0 +1,49 @@
+"""The Gemini client pool never loses a slot and never waits forever."""
+from __future__ import annotations
+
+import pytest
+from google import genai
+
+from app.service.chat_admission import ChatOverloaded
+from app.service.llm import ALLOWED_MODELS, GeminiClientPool, get_gemini_pool
+
+
+def _pool(size: int) -> GeminiClientPool:
+    return GeminiClientPool(api_key="test", size=size, base_url=None, timeout_ms=1000, checkout_timeout=0.05)
+
+
+def test_failed_create_frees_its_slot(monkeypatch):
+    pool = _pool(1)
+    client_class = genai.Client
+
+    def unreachable(**kwargs):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(genai, "Client", unreachable)
+    with pytest.raises(RuntimeError):
+        pool.checkout()
+    assert pool.stats()["created"] == 0
+
+    monkeypatch.setattr(genai, "Client", client_class)
+    with pool.client():
+        assert pool.stats()["created"] == 1
+
+
+def test_exhausted_pool_sheds_like_admission():
+    pool = _pool(1)
+    lease = pool.checkout()
+    with pytest.raises(ChatOverloaded):
+        pool.checkout()
+    assert pool.stats()["timeouts"] == 1
+    lease.release()
+    lease.release()
+    with pool.client():
+        pass
+    assert pool.stats()["idle"] == 1
+
+
+def test_pool_defaults_to_admission_capacity(app, monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    app.config.update(GEMINI_CLIENT_POOL_SIZE=0, CHAT_MAX_CONCURRENCY=3)
+    with app.app_context():
+        assert get_gemini_pool().size == 3 * len(ALLOWED_MODELS)
@@ -0,0 +1,53 @@
+"""RevisionCache: entries are valid for one revision and capped by total bytes."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from app.service.graph_cache import RevisionCache
+
+
+@dataclass
+class _Entry:
+    revision: int
+    size: int
+
+
+def test_other_revisions_miss():
+    cache = RevisionCache(max_bytes=100)
+    entry = _Entry(revision=2, size=10)
+    cache.put("g", entry)
+    assert cache.get("g", 2) is entry
+    assert cache.get("g", 1) is None
+    assert cache.get("g", 3) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_is_evicted_past_the_byte_cap():
+    cache = RevisionCache(max_bytes=100)
+    cache.put("a", _Entry(1, 40))
+    cache.put("b", _Entry(1, 40))
+    assert cache.get("a", 1) is not None
+    cache.put("c", _Entry(1, 40))
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is not None
+    assert cache.stats()["bytes"] == 80
+    assert cache.stats()["evictions"] == 1
+
+
+def test_oversized_entries_are_not_kept():
+    cache = RevisionCache(max_bytes=100)
+    cache.put("a", _Entry(1, 40))
+    cache.put("big", _Entry(1, 101))
+    assert cache.get("big", 1) is None
+    assert cache.get("a", 1) is not None
+
+
+def test_an_older_revision_does_not_replace_a_newer_one():
+    cache = RevisionCache(max_bytes=100)
+    cache.put("g", _Entry(3, 10))
+    cache.put("g", _Entry(2, 10))
+    assert cache.get("g", 3) is not None
+    cache.put("g", _Entry(4, 30))
+    assert cache.get("g", 4) is not None
+    assert cache.stats()["bytes"] == 30
@@ -0,0 +1,71 @@
+"""GET /api/graphs/<id> is cached per revision and revalidated with If-None-Match."""
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def graph_id(client, auth_headers, graph_payload) -> str:
+    created = client.post("/api/graphs", json=graph_payload(20), headers=auth_headers)
+    assert created.status_code == 201, created.get_data(as_text=True)
+    return created.get_json()["graph"]["id"]
+
+
+def test_matching_etag_is_a_304_after_one_statement(client, auth_headers, graph_id, query_count):
+    first = client.get(f"/api/graphs/{graph_id}", headers=auth_headers)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    etag = first.headers["ETag"]
+
+    with query_count() as counted:
+        revalidated = client.get(f"/api/graphs/{graph_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert revalidated.get_data() == b""
+    # Only the revision check.
+    assert counted.count == 1
+
+
+def test_repeat_loads_come_from_the_snapshot_cache(client, auth_headers, graph_id, query_count):
+    first = client.get(f"/api/graphs/{graph_id}", headers=auth_headers)
+    with query_count() as counted:
+        second = client.get(f"/api/graphs/{graph_id}", headers=auth_headers)
+    assert second.get_data() == first.get_data()
+    assert counted.count == 1
+    stats = client.get("/health/stats").get_json()["graph_snapshot_cache"]
+    assert stats["hits"] == 1
+    assert stats["entries"] == 1
+
+
+def test_a_patch_changes_the_etag(client, auth_headers, graph_id):
+    first = client.get(f"/api/graphs/{graph_id}", headers=auth_headers)
+    node_id = first.get_json()["nodes"][0]["id"]
+    patched = client.patch(
+        f"/api/graphs/{graph_id}",
+        json={"operations": [{"op": "update_node", "id": node_id, "changes": {"title": "Renamed"}}]},
+        headers=auth_headers,
+    )
+    assert patched.status_code == 200
+
+    response = client.get(f"/api/graphs/{graph_id}", headers={**auth_headers, "If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+    assert response.get_json()["nodes"][0]["title"] == "Renamed"
+
+
+def test_each_representation_has_its_own_etag(client, auth_headers, graph_id):
+    plain = client.get(f"/api/graphs/{graph_id}", headers=auth_headers).headers["ETag"]
+    streamed = client.get(f"/api/graphs/{graph_id}?stream=1", headers=auth_headers).headers["ETag"]
+    ndjson = client.get(f"/api/graphs/{graph_id}?stream=ndjson", headers=auth_headers).headers["ETag"]
+    assert len({plain, streamed, ndjson}) == 3
+    response = client.get(f"/api/graphs/{graph_id}?stream=ndjson", headers={**auth_headers, "If-None-Match": plain})
+    assert response.status_code == 200
+
+
+def test_another_users_graph_is_a_404(client, graph_id):
+    registered = client.post(
+        "/api/auth/register", json={"email": "other@example.com", "password": "another long password", "nickname": "other"}
+    )
+    assert registered.status_code == 201, registered.get_data(as_text=True)
+    headers = {"Authorization": f"Bearer {registered.get_json()['access_token']}"}
+    assert client.get(f"/api/graphs/{graph_id}", headers=headers).status_code == 404
@@ -0,0 +1,50 @@
+"""GET /api/graphs/<id> loads a graph in a fixed number of statements."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import delete
+
+from app.extensions import db
+from app.models import Graph
+from app.routes import graphs as graph_routes
+
+# Revision check, graph row, nodes (joined with their layout) and edges.
+MAX_LOAD_QUERIES = 4
+
+
+def _cold_load_queries(client, auth_headers, graph_payload, query_count, nodes: int) -> int:
+    created = client.post("/api/graphs", json=graph_payload(nodes), headers=auth_headers)
+    assert created.status_code == 201, created.get_data(as_text=True)
+    graph_id = created.get_json()["graph"]["id"]
+
+    # A new graph is not in the snapshot cache yet, so this reads every row.
+    with query_count() as counted:
+        response = client.get(f"/api/graphs/{graph_id}", headers=auth_headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert len(response.get_json()["nodes"]) == nodes
+    return counted.count
+
+
+def test_graph_load_query_count_does_not_grow_with_size(client, auth_headers, graph_payload, query_count):
+    small = _cold_load_queries(client, auth_headers, graph_payload, query_count, 10)
+    large = _cold_load_queries(client, auth_headers, graph_payload, query_count, 10_000)
+
+    assert large == small, f"10k-node load ran {large} statements, 10-node load {small}"
+    assert large <= MAX_LOAD_QUERIES
+
+
+@pytest.mark.parametrize("query", ["", "?stream=1", "?format=msgpack"])
+def test_graph_deleted_after_the_revision_check_is_a_404(client, auth_headers, graph_payload, monkeypatch, query):
+    created = client.post("/api/graphs", json=graph_payload(3), headers=auth_headers)
+    graph_id = created.get_json()["graph"]["id"]
+    get_graph_revision = graph_routes.get_graph_revision
+
+    def revision_then_delete(user, graph_id):
+        revision = get_graph_revision(user, graph_id)
+        db.session.execute(delete(Graph).where(Graph.id == graph_id))
+        db.session.commit()
+        return revision
+
+    monkeypatch.setattr(graph_routes, "get_graph_revision", revision_then_delete)
+    response = client.get(f"/api/graphs/{graph_id}{query}", headers=auth_headers)
+    assert response.status_code == 404
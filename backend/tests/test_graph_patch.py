@@ -0,0 +1,135 @@
+"""PATCH /api/graphs/<id> applies a batch of operations atomically, in a fixed number of statements."""
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def graph(client, auth_headers, graph_payload):
+    """A 10-node graph: (graph id, its node ids in payload order, its edge ids)."""
+    created = client.post("/api/graphs", json=graph_payload(10), headers=auth_headers)
+    assert created.status_code == 201, created.get_data(as_text=True)
+    body = created.get_json()
+    return body["graph"]["id"], [node["id"] for node in body["nodes"]], [edge["id"] for edge in body["edges"]]
+
+
+def _patch(client, auth_headers, graph_id: str, operations: list, **extra):
+    return client.patch(f"/api/graphs/{graph_id}", json={"operations": operations, **extra}, headers=auth_headers)
+
+
+def _load(client, auth_headers, graph_id: str) -> dict:
+    response = client.get(f"/api/graphs/{graph_id}", headers=auth_headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_mixed_batch_returns_only_the_touched_entities(client, auth_headers, graph):
+    graph_id, node_ids, _ = graph
+    kept, deleted = node_ids[0], node_ids[1]
+    response = _patch(
+        client,
+        auth_headers,
+        graph_id,
+        [
+            {"op": "add_node", "node": {"id": "tmp", "title": "New", "node_type": "person", "position": {"x": 5, "y": 5}}},
+            {"op": "add_edge", "edge": {"id": "tmp-edge", "source": "tmp", "target": kept}},
+            {"op": "move_node", "id": kept, "position": {"x": 9, "y": 9}},
+            {"op": "update_node", "id": kept, "changes": {"title": "Renamed"}},
+            {"op": "delete_node", "id": deleted},
+        ],
+        base_revision=1,
+    )
+    assert response.status_code == 200, response.get_data(as_text=True)
+    changes = response.get_json()
+    assert changes["revision"] == 2
+    new_id = changes["id_map"]["nodes"]["tmp"]
+    assert changes["id_map"]["edges"]["tmp-edge"] == changes["edges"][0]["id"]
+    assert {node["id"]: node["title"] for node in changes["nodes"]} == {new_id: "New", kept: "Renamed"}
+    assert changes["deleted_node_ids"] == [deleted]
+    # The deleted node's edges (n1 -> n2, n1 -> n3, n0 -> n1, n9 -> n1) go with it.
+    assert len(changes["deleted_edge_ids"]) == 4
+
+    document = _load(client, auth_headers, graph_id)
+    assert document["graph"]["revision"] == 2
+    nodes = {node["id"]: node for node in document["nodes"]}
+    assert deleted not in nodes
+    assert nodes[kept]["position"] == {"x": 9.0, "y": 9.0}
+    assert nodes[new_id]["title"] == "New"
+    assert len(document["edges"]) == 20 - 4 + 1
+
+
+def test_stale_base_revision_is_a_409(client, auth_headers, graph):
+    graph_id, node_ids, _ = graph
+    move = [{"op": "move_node", "id": node_ids[0], "position": {"x": 1, "y": 1}}]
+    assert _patch(client, auth_headers, graph_id, move, base_revision=1).status_code == 200
+    assert _patch(client, auth_headers, graph_id, move, base_revision=1).status_code == 409
+    assert _load(client, auth_headers, graph_id)["graph"]["revision"] == 2
+
+
+def test_a_failing_operation_writes_nothing(client, auth_headers, graph):
+    graph_id, node_ids, edge_ids = graph
+    response = _patch(
+        client,
+        auth_headers,
+        graph_id,
+        [
+            {"op": "delete_node", "id": node_ids[0]},
+            {"op": "remove_edge", "id": edge_ids[5]},
+            {"op": "update_node", "id": "no-such-node", "changes": {"title": "x"}},
+        ],
+    )
+    assert response.status_code == 404
+    document = _load(client, auth_headers, graph_id)
+    assert document["graph"]["revision"] == 1
+    assert len(document["nodes"]) == 10
+    assert len(document["edges"]) == 20
+
+
+@pytest.mark.parametrize(
+    "operations",
+    [
+        [],
+        [{"op": "rename_graph"}],
+        [{"op": "move_node", "position": {"x": 1, "y": 1}}],
+        [{"op": "add_edge", "edge": {"source": "n0"}}],
+    ],
+)
+def test_malformed_operations_are_a_400(client, auth_headers, graph, operations):
+    graph_id, _, _ = graph
+    assert _patch(client, auth_headers, graph_id, operations).status_code == 400
+
+
+def test_a_node_cannot_be_used_after_its_deletion(client, auth_headers, graph):
+    graph_id, node_ids, _ = graph
+    response = _patch(
+        client,
+        auth_headers,
+        graph_id,
+        [{"op": "delete_node", "id": node_ids[0]}, {"op": "move_node", "id": node_ids[0], "position": {"x": 1, "y": 1}}],
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("app", [{"GRAPH_PATCH_MAX_OPERATIONS": 2}], indirect=True)
+def test_too_many_operations_are_a_400(client, auth_headers, graph):
+    graph_id, node_ids, _ = graph
+    moves = [{"op": "move_node", "id": node_id, "position": {"x": 0, "y": 0}} for node_id in node_ids[:3]]
+    assert _patch(client, auth_headers, graph_id, moves).status_code == 400
+
+
+def test_statement_count_does_not_grow_with_the_batch(client, auth_headers, graph, query_count):
+    graph_id, node_ids, _ = graph
+
+    def statements(count: int, revision: int) -> int:
+        operations = [
+            {"op": "move_node", "id": node_id, "position": {"x": revision, "y": revision}} for node_id in node_ids[:count]
+        ] + [
+            {"op": "add_node", "node": {"title": f"new {i}", "node_type": "person", "position": {"x": 0, "y": 0}}}
+            for i in range(count)
+        ]
+        with query_count() as counted:
+            response = _patch(client, auth_headers, graph_id, operations, base_revision=revision)
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return counted.count
+
+    assert statements(2, 1) == statements(10, 2)
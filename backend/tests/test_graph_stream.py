@@ -0,0 +1,37 @@
+"""?stream= takes only the documented values."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def graph(client, auth_headers, graph_payload):
+    created = client.post("/api/graphs", json=graph_payload(3), headers=auth_headers)
+    assert created.status_code == 201, created.get_data(as_text=True)
+    return created.get_json()["graph"]["id"], auth_headers
+
+
+@pytest.mark.parametrize("value", ["0", "false", "no", "yes", "json"])
+def test_unknown_stream_value_is_a_400(client, graph, value):
+    graph_id, headers = graph
+    response = client.get(f"/api/graphs/{graph_id}?stream={value}", headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("value", ["1", "true", "TRUE"])
+def test_stream_sends_the_whole_document(client, graph, value):
+    graph_id, headers = graph
+    response = client.get(f"/api/graphs/{graph_id}?stream={value}", headers=headers)
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert len(json.loads(response.get_data())["nodes"]) == 3
+
+
+def test_stream_ndjson(client, graph):
+    graph_id, headers = graph
+    response = client.get(f"/api/graphs/{graph_id}?stream=ndjson", headers=headers)
+    assert response.status_code == 200
+    types = [json.loads(line)["type"] for line in response.get_data(as_text=True).splitlines()]
+    assert types.count("node") == 3
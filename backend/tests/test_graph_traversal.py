@@ -0,0 +1,147 @@
+"""Neighbors, k-hop and shortest path honour direction, status filters and result limits."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import Edge, EdgeType
+from app.models.edge import EdgeStatus
+
+# a - b - c - d - e, plus a - f. b -> c is directed, d - e is blocked.
+NAMES = "abcdef"
+LINKS = [("a", "b"), ("b", "c"), ("c", "d"), ("d", "e"), ("a", "f")]
+
+
+@pytest.fixture
+def graph(app, client, auth_headers):
+    """(graph id, node id by name)."""
+    payload = {
+        "graph": {"name": "chain"},
+        "nodes": [
+            {"id": name, "title": name, "node_type": "person", "position": {"x": 0, "y": 0}} for name in NAMES
+        ],
+        "edges": [{"id": f"{source}{target}", "source": source, "target": target} for source, target in LINKS],
+    }
+    created = client.post("/api/graphs", json=payload, headers=auth_headers)
+    assert created.status_code == 201, created.get_data(as_text=True)
+    body = created.get_json()
+    ids = {node["title"]: node["id"] for node in body["nodes"]}
+    edge_ids = {(edge["source"], edge["target"]): edge["id"] for edge in body["edges"]}
+    with app.app_context():
+        directed = EdgeType(name="reports to", directed=True, color="#000", style={})
+        db.session.add(directed)
+        db.session.flush()
+        db.session.execute(
+            update(Edge).where(Edge.id == edge_ids[(ids["b"], ids["c"])]).values(edge_type_id=directed.id)
+        )
+        db.session.execute(
+            update(Edge).where(Edge.id == edge_ids[(ids["d"], ids["e"])]).values(status=EdgeStatus.BLOCKED)
+        )
+        db.session.commit()
+    return body["graph"]["id"], ids
+
+
+def _get(client, auth_headers, graph_id: str, endpoint: str, **params):
+    return client.get(f"/api/graphs/{graph_id}/{endpoint}", query_string=params, headers=auth_headers)
+
+
+def _titles(nodes: list) -> set[str]:
+    return {node["title"] for node in nodes}
+
+
+def test_neighbors_and_their_limit(client, auth_headers, graph):
+    graph_id, ids = graph
+    result = _get(client, auth_headers, graph_id, "neighbors", node=ids["a"]).get_json()
+    assert result["revision"] == 1
+    assert _titles(result["neighbors"]) == {"b", "f"}
+    assert result["truncated"] is False
+
+    limited = _get(client, auth_headers, graph_id, "neighbors", node=ids["a"], limit=1).get_json()
+    assert len(limited["neighbors"]) == 1
+    assert limited["truncated"] is True
+
+
+def test_directed_edges_follow_their_direction(client, auth_headers, graph):
+    graph_id, ids = graph
+    from_b = _get(client, auth_headers, graph_id, "neighbors", node=ids["b"], direction="out").get_json()
+    assert _titles(from_b["neighbors"]) == {"a", "c"}
+    from_c = _get(client, auth_headers, graph_id, "neighbors", node=ids["c"], direction="out").get_json()
+    assert _titles(from_c["neighbors"]) == {"d"}
+    into_c = _get(client, auth_headers, graph_id, "neighbors", node=ids["c"], direction="in").get_json()
+    assert _titles(into_c["neighbors"]) == {"b", "d"}
+
+
+def test_k_hop_reports_shortest_distances(client, auth_headers, graph):
+    graph_id, ids = graph
+    result = _get(client, auth_headers, graph_id, "khop", node=ids["a"], k=2).get_json()
+    assert {node["title"]: node["depth"] for node in result["nodes"]} == {"b": 1, "f": 1, "c": 2}
+    assert result["truncated"] is False
+
+    limited = _get(client, auth_headers, graph_id, "khop", node=ids["a"], k=3, limit=2).get_json()
+    assert len(limited["nodes"]) == 2
+    assert limited["truncated"] is True
+
+
+def test_blocked_edges_are_skipped_unless_asked_for(client, auth_headers, graph):
+    graph_id, ids = graph
+    default = _get(client, auth_headers, graph_id, "path", **{"from": ids["a"], "to": ids["e"]}).get_json()
+    assert default["path"] is None
+    blocked = _get(
+        client, auth_headers, graph_id, "path", status="none,blocked", **{"from": ids["a"], "to": ids["e"]}
+    ).get_json()
+    assert [node["title"] for node in blocked["path"]] == ["a", "b", "c", "d", "e"]
+    assert blocked["hops"] == 4
+    assert len(blocked["edges"]) == 4
+
+
+def test_path_max_depth_and_direction(client, auth_headers, graph):
+    graph_id, ids = graph
+    ends = {"from": ids["a"], "to": ids["d"]}
+    assert _get(client, auth_headers, graph_id, "path", **ends).get_json()["hops"] == 3
+    assert _get(client, auth_headers, graph_id, "path", max_depth=2, **ends).get_json()["path"] is None
+    backwards = {"from": ids["d"], "to": ids["a"]}
+    assert _get(client, auth_headers, graph_id, "path", direction="out", **backwards).get_json()["path"] is None
+    assert _get(client, auth_headers, graph_id, "path", direction="in", **backwards).get_json()["hops"] == 3
+
+
+@pytest.mark.parametrize(
+    "endpoint, params, status",
+    [
+        ("neighbors", {}, 400),
+        ("neighbors", {"node": "missing"}, 404),
+        ("neighbors", {"node": "a", "limit": 0}, 400),
+        ("neighbors", {"node": "a", "direction": "up"}, 400),
+        ("neighbors", {"node": "a", "status": "gone"}, 400),
+        ("khop", {"node": "a", "k": 0}, 400),
+        ("khop", {"node": "a", "k": 7}, 400),
+        ("path", {"from": "a"}, 400),
+        ("path", {"from": "a", "to": "e", "max_depth": 0}, 400),
+    ],
+)
+def test_bad_arguments(client, auth_headers, graph, endpoint, params, status):
+    graph_id, ids = graph
+    params = {key: ids.get(value, value) if isinstance(value, str) else value for key, value in params.items()}
+    assert _get(client, auth_headers, graph_id, endpoint, **params).status_code == status
+
+
+@pytest.mark.parametrize("app", [{"GRAPH_TRAVERSAL_MAX_RESULTS": 2}], indirect=True)
+def test_limit_is_capped_by_config(client, auth_headers, graph):
+    graph_id, ids = graph
+    result = _get(client, auth_headers, graph_id, "khop", node=ids["a"], k=6, limit=100).get_json()
+    assert len(result["nodes"]) == 2
+    assert result["truncated"] is True
+
+
+def test_a_patch_rebuilds_the_adjacency(client, auth_headers, graph):
+    graph_id, ids = graph
+    assert _titles(_get(client, auth_headers, graph_id, "neighbors", node=ids["e"]).get_json()["neighbors"]) == set()
+    patched = client.patch(
+        f"/api/graphs/{graph_id}",
+        json={"operations": [{"op": "add_edge", "edge": {"source": ids["e"], "target": ids["f"]}}]},
+        headers=auth_headers,
+    )
+    assert patched.status_code == 200
+    result = _get(client, auth_headers, graph_id, "neighbors", node=ids["e"]).get_json()
+    assert result["revision"] == 2
+    assert _titles(result["neighbors"]) == {"f"}
@@ -0,0 +1,141 @@
+"""Viewport queries return the nodes in a box, their edges and a level of detail by zoom."""
+from __future__ import annotations
+
+import pytest
+
+from app.service.graph_viewport import LOD_FIELDS
+
+
+@pytest.fixture
+def graph(client, auth_headers):
+    """A 10 x 10 grid of 10 x 10 nodes, 100 apart, each linked to its right-hand neighbour.
+
+    Returns (graph id, node id by grid index).
+    """
+    payload = {
+        "graph": {"name": "grid"},
+        "nodes": [
+            {
+                "id": f"n{i}",
+                "title": f"n{i}",
+                "node_type": "person",
+                "position": {"x": (i % 10) * 100, "y": (i // 10) * 100},
+                "style": {"width": 10, "height": 10},
+            }
+            for i in range(100)
+        ],
+        "edges": [{"source": f"n{i}", "target": f"n{i + 1}"} for i in range(100) if i % 10 != 9],
+    }
+    created = client.post("/api/graphs", json=payload, headers=auth_headers)
+    assert created.status_code == 201, created.get_data(as_text=True)
+    body = created.get_json()
+    return body["graph"]["id"], [node["id"] for node in body["nodes"]]
+
+
+def _viewport(client, auth_headers, graph_id: str, bbox: str, **params):
+    return client.get(f"/api/graphs/{graph_id}/viewport", query_string={"bbox": bbox, **params}, headers=auth_headers)
+
+
+def test_nodes_in_the_box_and_the_edges_leaving_it(client, auth_headers, graph):
+    graph_id, ids = graph
+    result = _viewport(client, auth_headers, graph_id, "0,0,250,150").get_json()
+    assert result["revision"] == 1
+    assert {node["id"] for node in result["nodes"]} == {ids[i] for i in (0, 1, 2, 10, 11, 12)}
+    assert (result["total_nodes"], result["truncated"]) == (6, False)
+    # 0-1, 1-2, 10-11 and 11-12 inside; 2-3 and 12-13 cross the edge of the box.
+    assert len(result["edges"]) == 6
+    assert {node["id"] for node in result["boundary_nodes"]} == {ids[3], ids[13]}
+    assert result["boundary_nodes"][0]["position"] is not None
+
+
+@pytest.mark.parametrize(
+    "bbox, expected",
+    [
+        ("105,5,105,5", {1}),
+        ("110,10,200,100", {1, 2, 11, 12}),
+        ("111,11,199,99", set()),
+        ("-500,-500,-1,-1", set()),
+    ],
+)
+def test_boxes_overlap_inclusively(client, auth_headers, graph, bbox, expected):
+    graph_id, ids = graph
+    result = _viewport(client, auth_headers, graph_id, bbox).get_json()
+    assert {node["id"] for node in result["nodes"]} == {ids[i] for i in expected}
+
+
+@pytest.mark.parametrize("zoom, lod", [(1.0, "full"), (0.6, "full"), (0.3, "label"), (0.1, "shape")])
+def test_zoom_picks_the_level_of_detail(client, auth_headers, graph, zoom, lod):
+    graph_id, _ = graph
+    result = _viewport(client, auth_headers, graph_id, "0,0,150,50", zoom=zoom).get_json()
+    assert result["lod"] == lod
+    node_fields, edge_fields = LOD_FIELDS[lod]
+    if node_fields is None:
+        assert {"summary", "data", "graph_id"} <= result["nodes"][0].keys()
+    else:
+        assert all(node.keys() == set(node_fields) for node in result["nodes"])
+        assert all(edge.keys() == set(edge_fields) for edge in result["edges"])
+
+
+def test_lod_overrides_zoom(client, auth_headers, graph):
+    graph_id, _ = graph
+    result = _viewport(client, auth_headers, graph_id, "0,0,150,50", zoom=1, lod="shape").get_json()
+    assert result["lod"] == "shape"
+    assert result["nodes"][0].keys() == set(LOD_FIELDS["shape"][0])
+
+
+def test_past_the_limit_an_even_sample_comes_back(client, auth_headers, graph):
+    graph_id, _ = graph
+    result = _viewport(client, auth_headers, graph_id, "0,0,1000,1000", limit=10).get_json()
+    assert result["total_nodes"] == 100
+    assert result["truncated"] is True
+    assert 1 < len(result["nodes"]) <= 10
+    # Spread over the grid rather than its first row.
+    assert max(node["position"]["y"] for node in result["nodes"]) >= 500
+    sampled = {node["id"] for node in result["nodes"]}
+    assert result["boundary_nodes"] == []
+    assert all(edge["source"] in sampled and edge["target"] in sampled for edge in result["edges"])
+
+
+@pytest.mark.parametrize("app", [{"GRAPH_VIEWPORT_MAX_NODES": 5}], indirect=True)
+def test_limit_is_capped_by_config(client, auth_headers, graph):
+    graph_id, _ = graph
+    result = _viewport(client, auth_headers, graph_id, "0,0,1000,1000", limit=50).get_json()
+    assert len(result["nodes"]) <= 5
+    assert result["truncated"] is True
+
+
+def test_a_node_spanning_many_cells_is_found(client, auth_headers, graph):
+    graph_id, _ = graph
+    backdrop = {
+        "title": "backdrop",
+        "node_type": "person",
+        "position": {"x": -100, "y": -100},
+        "style": {"width": 2000, "height": 2000},
+    }
+    patched = client.patch(
+        f"/api/graphs/{graph_id}", json={"operations": [{"op": "add_node", "node": backdrop}]}, headers=auth_headers
+    )
+    assert patched.status_code == 200
+    result = _viewport(client, auth_headers, graph_id, "550,550,560,560").get_json()
+    assert result["revision"] == 2
+    assert [node["title"] for node in result["nodes"]] == ["backdrop"]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"bbox": "1,2,3"},
+        {"bbox": "5,0,1,1"},
+        {"bbox": "0,0,nan,1"},
+        {"bbox": "0,0,inf,1"},
+        {"bbox": "0,0,1,1", "zoom": 0},
+        {"bbox": "0,0,1,1", "zoom": "inf"},
+        {"bbox": "0,0,1,1", "lod": "tiny"},
+        {"bbox": "0,0,1,1", "limit": 0},
+    ],
+)
+def test_bad_arguments_are_a_400(client, auth_headers, graph, params):
+    graph_id, _ = graph
+    response = client.get(f"/api/graphs/{graph_id}/viewport", query_string=params, headers=auth_headers)
+    assert response.status_code == 400
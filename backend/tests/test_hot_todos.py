@@ -0,0 +1,69 @@
+"""The hot-todo index keeps changes made while it rebuilds."""
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import update
+
+from app.extensions import db
+from app.models import Todo
+from app.service.todo_ranking import HotTodoIndex
+
+
+def _seed_todos(count: int) -> list[int]:
+    todos = [Todo(title=f"Todo {i}", content="c", author="test") for i in range(count)]
+    db.session.add_all(todos)
+    db.session.commit()
+    return [todo.id for todo in todos]
+
+
+def test_votes_during_a_rebuild_are_kept(app):
+    with app.app_context():
+        ids = _seed_todos(3)
+        oldest = ids[0]
+        index = HotTodoIndex(decay_seconds=45000, rebuild_seconds=300)
+        index.rebuild()
+        assert index.top(1) == [ids[-1]]
+
+        voted = threading.Event()
+
+        def pending(todo_id: int) -> int:
+            # A vote lands after the rebuild has read the rows, before the swap.
+            if not voted.is_set():
+                voted.set()
+                with db.engine.begin() as connection:
+                    connection.execute(update(Todo).where(Todo.id == oldest).values(heat=Todo.heat + 10**6))
+                index.adjust(oldest, 10**6)
+            return 0
+
+        index.rebuild(pending)
+        assert voted.is_set()
+        assert index.top(1) == [oldest]
+
+
+def test_stale_index_keeps_serving_while_rebuilding(app):
+    with app.app_context():
+        ids = _seed_todos(3)
+        index = HotTodoIndex(decay_seconds=45000, rebuild_seconds=0)
+        index.ensure_current()
+        assert index.top(3) == ids[::-1]
+
+        started, release = threading.Event(), threading.Event()
+
+        def pending(todo_id: int) -> int:
+            started.set()
+            release.wait(5)
+            return 0
+
+        # Stale (rebuild_seconds=0): the rebuild starts in the background and
+        # the call returns at once; a second call does not start another.
+        index.ensure_current(pending)
+        assert started.wait(5)
+        index.ensure_current(pending)
+        assert index.top(3) == ids[::-1]
+        release.set()
+        deadline = time.monotonic() + 5
+        while index.stats()["rebuilding"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert index.stats()["rebuilds"] == 2
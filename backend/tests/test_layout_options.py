@@ -0,0 +1,30 @@
+"""Layout options are rejected up front, not when the job runs."""
+from __future__ import annotations
+
+import pytest
+
+from app.service.graph_layout import parse_layout_options
+from app.service.graphs import GraphServiceError
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"edge_length": float("nan")},
+        {"edge_length": float("inf")},
+        {"edge_length": 0},
+        {"iterations": float("inf")},
+        {"seed": -1},
+        {"seed": "x"},
+    ],
+)
+def test_invalid_options_are_a_400(app, data):
+    with app.app_context(), pytest.raises(GraphServiceError) as error:
+        parse_layout_options(data)
+    assert error.value.status_code == 400
+
+
+def test_valid_options_pass(app):
+    with app.app_context():
+        options = parse_layout_options({"edge_length": 12.5, "seed": 0, "mode": "refine"})
+    assert options["edge_length"] == 12.5 and options["seed"] == 0
@@ -0,0 +1,80 @@
+"""Login attempts are limited per email and per IP before any DB read or hash."""
+from __future__ import annotations
+
+import pytest
+
+from app.service.login_throttle import SQLiteLoginThrottleBackend
+
+
+def _login(client, email: str, password: str, ip: str = "10.0.0.1"):
+    return client.post(
+        "/api/auth/login", json={"email": email, "password": password}, environ_base={"REMOTE_ADDR": ip}
+    )
+
+
+@pytest.mark.parametrize("app", [{"LOGIN_THROTTLE_MAX_PER_EMAIL": 3, "AUTH_MAX_FAILED_ATTEMPTS": 100}], indirect=True)
+def test_email_limit_answers_429_without_touching_the_database(client, user, query_count):
+    for _ in range(3):
+        assert _login(client, user["email"], "wrong").status_code == 401
+    with query_count() as counted:
+        throttled = _login(client, user["email"], user["password"])
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) > 0
+    assert counted.count == 0
+    # Other accounts from another address are unaffected.
+    assert _login(client, "someone@example.com", "wrong", ip="10.0.0.2").status_code == 401
+
+
+@pytest.mark.parametrize("app", [{"LOGIN_THROTTLE_MAX_PER_IP": 3}], indirect=True)
+def test_ip_limit_spans_emails(client, user):
+    for i in range(3):
+        assert _login(client, f"guess{i}@example.com", "wrong").status_code == 401
+    assert _login(client, user["email"], user["password"]).status_code == 429
+    assert _login(client, user["email"], user["password"], ip="10.0.0.2").status_code == 200
+
+
+@pytest.mark.parametrize("app", [{"LOGIN_THROTTLE_MAX_PER_EMAIL": 3, "AUTH_MAX_FAILED_ATTEMPTS": 100}], indirect=True)
+def test_success_clears_the_email_counter(client, user):
+    for _ in range(2):
+        assert _login(client, user["email"], "wrong").status_code == 401
+    assert _login(client, user["email"], user["password"]).status_code == 200
+    for _ in range(2):
+        assert _login(client, user["email"], "wrong").status_code == 401
+
+
+@pytest.mark.parametrize(
+    "app",
+    [
+        {"AUTH_MAX_FAILED_ATTEMPTS": 2},
+        {"AUTH_MAX_FAILED_ATTEMPTS": 2, "LOGIN_THROTTLE_BACKEND": "none"},
+    ],
+    indirect=True,
+)
+def test_repeated_failures_lock_the_account(client, user):
+    for _ in range(2):
+        assert _login(client, user["email"], "wrong").status_code == 401
+    locked = _login(client, user["email"], user["password"], ip="10.0.0.2")
+    assert locked.status_code == 429
+    assert locked.get_json()["error"] == "too many failed attempts, try later"
+
+
+@pytest.mark.parametrize("app", [{"LOGIN_THROTTLE_MAX_PER_EMAIL": 2, "AUTH_MAX_FAILED_ATTEMPTS": 100}], indirect=True)
+def test_stats_count_admitted_and_rejected(client, user):
+    for _ in range(3):
+        _login(client, user["email"], "wrong")
+    stats = client.get("/health/stats").get_json()["login_throttle"]
+    assert (stats["admitted"], stats["rejected"]) == (2, 1)
+    assert stats["backend"] == "MemoryLoginThrottleBackend"
+
+
+def test_sqlite_backend_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "throttle.sqlite3")
+    # Two backends on one file stand in for two worker processes.
+    first, second = SQLiteLoginThrottleBackend(path, 1000), SQLiteLoginThrottleBackend(path, 1000)
+    limits = [("email:a", 2)]
+    assert first.hit(limits, 900) is None
+    assert second.hit(limits, 900) is None
+    assert first.hit(limits, 900) > 0
+    assert second.count("email:a", 900) == 2
+    second.reset("email:a")
+    assert first.hit(limits, 900) is None
@@ -0,0 +1,50 @@
+"""A password hash worker that dies or hangs does not break every later login."""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import signal
+
+import pytest
+
+from app.service.passwords import PasswordHasher, PasswordHasherBusy
+
+
+def _start_workers(hasher: PasswordHasher) -> tuple[str, set]:
+    before = set(multiprocessing.active_children())
+    pwhash = hasher.hash("secret")
+    return pwhash, set(multiprocessing.active_children()) - before
+
+
+def test_broken_pool_is_replaced():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1, max_pending=4, queue_timeout=1)
+    try:
+        pwhash, workers = _start_workers(hasher)
+        for worker in workers:
+            os.kill(worker.pid, signal.SIGKILL)
+            worker.join(5)
+
+        assert hasher.verify(pwhash, "secret")
+        assert hasher.stats()["pool_restarts"] == 1
+    finally:
+        hasher.stop()
+
+
+def test_hung_worker_times_out_and_is_replaced():
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1, max_pending=4, queue_timeout=1, hash_timeout=3)
+    workers = set()
+    try:
+        pwhash, workers = _start_workers(hasher)
+        for worker in workers:
+            os.kill(worker.pid, signal.SIGSTOP)
+
+        with pytest.raises(PasswordHasherBusy):
+            hasher.verify(pwhash, "secret")
+        stats = hasher.stats()
+        assert (stats["timeouts"], stats["pool_restarts"], stats["in_flight"]) == (1, 1, 0)
+        # Later hashes run on a fresh pool instead of queueing behind the stuck worker.
+        assert hasher.verify(pwhash, "secret")
+    finally:
+        for worker in workers:
+            os.kill(worker.pid, signal.SIGCONT)
+        hasher.stop()
@@ -0,0 +1,56 @@
+"""A refresh token is spent once, however many requests race to use it."""
+from __future__ import annotations
+
+import http.client
+import json
+import threading
+
+CONCURRENCY = 8
+ROUNDS = 3
+
+
+def _login(client, user) -> str:
+    response = client.post("/api/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()["refresh_token"]
+
+
+def _race(port: int, refresh_token: str, concurrency: int) -> list[int]:
+    """Statuses of ``concurrency`` refreshes released at the same instant."""
+    barrier = threading.Barrier(concurrency)
+    statuses = []
+    body = json.dumps({"refresh_token": refresh_token})
+
+    def one() -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        connection.connect()
+        barrier.wait()
+        connection.request("POST", "/api/auth/refresh", body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        statuses.append(response.status)
+        connection.close()
+
+    threads = [threading.Thread(target=one) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+def test_concurrent_refreshes_of_one_token_succeed_once(client, user, live_server):
+    for _ in range(ROUNDS):
+        statuses = _race(live_server.server_port, _login(client, user), CONCURRENCY)
+        assert sorted(statuses) == [200] + [401] * (CONCURRENCY - 1)
+
+
+def test_rotated_token_cannot_be_reused(client, user):
+    refresh_token = _login(client, user)
+
+    first = client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+    assert first.status_code == 200, first.get_data(as_text=True)
+    again = client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+    assert again.status_code == 401
+    rotated = client.post("/api/auth/refresh", json={"refresh_token": first.get_json()["refresh_token"]})
+    assert rotated.status_code == 200, rotated.get_data(as_text=True)
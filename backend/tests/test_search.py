@@ -0,0 +1,102 @@
+"""GET /api/search: whole-word matching, index sync and cursor handling."""
+from __future__ import annotations
+
+import base64
+
+import pytest
+
+from app.extensions import db
+from app.models import Todo
+from app.service.search import SearchError, decode_cursor, encode_cursor
+
+
+def _add_todo(app, title: str, content: str = "body") -> int:
+    with app.app_context():
+        todo = Todo(title=title, content=content, author="test")
+        db.session.add(todo)
+        db.session.commit()
+        return todo.id
+
+
+def _todo_ids(client, auth_headers, q: str) -> list[int]:
+    response = client.get("/api/search", query_string={"q": q, "types": "todo"}, headers=auth_headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return [result["id"] for result in response.get_json()]
+
+
+def _raw_cursor(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def test_every_word_must_match_as_a_whole_word(app, client, auth_headers):
+    both = _add_todo(app, "quarterly report", "draft the numbers")
+    _add_todo(app, "quarterly planning")
+
+    assert _todo_ids(client, auth_headers, "report quarterly") == [both]
+    assert _todo_ids(client, auth_headers, "numbers") == [both]
+    # No prefix matching.
+    assert _todo_ids(client, auth_headers, "quarter") == []
+
+
+def test_title_matches_rank_first(app, client, auth_headers):
+    in_body = _add_todo(app, "misc", "remember the invoice")
+    in_title = _add_todo(app, "invoice", "misc")
+    assert _todo_ids(client, auth_headers, "invoice") == [in_title, in_body]
+
+
+def test_index_follows_updates_and_deletes(app, client, auth_headers):
+    todo_id = _add_todo(app, "walk the dog")
+    with app.app_context():
+        db.session.get(Todo, todo_id).title = "feed the cat"
+        db.session.commit()
+    assert _todo_ids(client, auth_headers, "dog") == []
+    assert _todo_ids(client, auth_headers, "cat") == [todo_id]
+
+    with app.app_context():
+        db.session.delete(db.session.get(Todo, todo_id))
+        db.session.commit()
+    assert _todo_ids(client, auth_headers, "cat") == []
+
+
+def test_pages_follow_the_cursor(app, client, auth_headers):
+    ids = {_add_todo(app, f"errand {i}") for i in range(5)}
+    seen, cursor = [], None
+    while True:
+        query = {"q": "errand", "types": "todo", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/search", query_string=query, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [result["id"] for result in response.get_json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(ids)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(40)) == 40
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["not base64!", _raw_cursor("[1e400]"), _raw_cursor("[1.5]"), _raw_cursor("[-1]"), _raw_cursor('["3"]'), _raw_cursor("[]")],
+)
+def test_forged_cursor_is_rejected(cursor):
+    with pytest.raises(SearchError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"q": "foo", "cursor": "WzFlNDAw"},
+        {"q": "!!!"},
+        {"q": "foo", "types": "files"},
+        {"q": "foo", "limit": "0"},
+    ],
+)
+def test_bad_requests_are_a_400(client, auth_headers, query):
+    assert client.get("/api/search", query_string=query, headers=auth_headers).status_code == 400
+
+
+def test_search_needs_a_login(client):
+    assert client.get("/api/search?q=foo").status_code == 401
@@ -0,0 +1,58 @@
+"""GET /api/todos pages by keyset and rejects malformed input with a 400."""
+from __future__ import annotations
+
+import base64
+
+import pytest
+
+from app.extensions import db
+from app.models import Todo
+
+
+def _cursor(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _seed_todos(app, count: int) -> list[int]:
+    with app.app_context():
+        todos = [Todo(title=f"Todo {i}", content="c", author="test") for i in range(count)]
+        db.session.add_all(todos)
+        db.session.commit()
+        return [todo.id for todo in todos]
+
+
+def test_pages_cover_every_todo_once(app, client):
+    ids = _seed_todos(app, 7)
+    seen, cursor = [], None
+    while True:
+        response = client.get("/api/todos", query_string={"limit": 3, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen += [todo["id"] for todo in response.get_json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(ids) and len(seen) == len(ids)
+
+
+@pytest.mark.parametrize("limit", ["0", "-1"])
+def test_non_positive_limit_is_a_400(client, limit):
+    assert client.get(f"/api/todos?limit={limit}").status_code == 400
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        _cursor('["2020-01-01T00:00:00"]'),
+        _cursor('["2020-01-01T00:00:00", 1e400]'),
+        _cursor('["2020-01-01T00:00:00", 99999999999999999999999]'),
+        _cursor('["2020-01-01T00:00:00", 1.5]'),
+        _cursor('["2020-01-01T00:00:00", 0]'),
+        _cursor('["0001-01-01T00:00:00", 1]'),
+        _cursor('["2020-01-01T00:00:00+02:00", 1]'),
+        _cursor('[1577836800, 1]'),
+    ],
+)
+def test_malformed_cursor_is_a_400(app, client, cursor):
+    _seed_todos(app, 1)
+    assert client.get("/api/todos", query_string={"cursor": cursor}).status_code == 400
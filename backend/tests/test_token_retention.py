@@ -0,0 +1,88 @@
+"""Expired and long-revoked refresh tokens are deleted in bounded batches."""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.extensions import db
+from app.models import RefreshToken
+from app.service.token_retention import TokenPruner, prune_refresh_tokens
+
+# A month ago, so every token is expired by the time the CLI prunes "now".
+NOW = datetime.utcnow() - timedelta(days=30)
+RETENTION = timedelta(hours=24)
+
+
+@pytest.fixture
+def tokens(app, user):
+    """25 expired, 7 revoked past retention, 3 recently revoked and 5 live tokens."""
+    kinds = (
+        [("expired", NOW - timedelta(days=1), None)] * 25
+        + [("revoked", NOW + timedelta(days=7), NOW - RETENTION - timedelta(hours=1))] * 7
+        + [("recent", NOW + timedelta(days=7), NOW - timedelta(hours=1))] * 3
+        + [("live", NOW + timedelta(days=7), None)] * 5
+    )
+    rows = [
+        {"user_id": user["id"], "token_hash": f"{kind}-{i}", "expires_at": expires_at, "revoked_at": revoked_at}
+        for i, (kind, expires_at, revoked_at) in enumerate(kinds)
+    ]
+    with app.app_context():
+        db.session.execute(insert(RefreshToken), rows)
+        db.session.commit()
+
+
+def _remaining(app) -> list[str]:
+    with app.app_context():
+        hashes = db.session.scalars(select(RefreshToken.token_hash)).all()
+    return sorted({token_hash.split("-")[0] for token_hash in hashes})
+
+
+def _count(app) -> int:
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(RefreshToken))
+
+
+def test_prune_deletes_in_batches(app, tokens):
+    with app.app_context():
+        result = prune_refresh_tokens(batch_size=10, revoked_retention=RETENTION, now=NOW)
+    assert result["expired"] == 25
+    assert result["revoked"] == 7
+    assert result["rows_reclaimed"] == 32
+    # 10 + 10 + 5 expired, then the 7 revoked.
+    assert result["batches"] == 4
+    assert _remaining(app) == ["live", "recent"]
+    assert _count(app) == 8
+
+
+def test_max_batches_bounds_one_pass(app, tokens):
+    with app.app_context():
+        result = prune_refresh_tokens(batch_size=10, revoked_retention=RETENTION, now=NOW, max_batches=1)
+    assert (result["expired"], result["revoked"], result["batches"]) == (10, 7, 2)
+    assert _count(app) == 40 - 17
+
+
+def test_each_batch_is_one_select_and_one_delete(app, tokens, query_count):
+    with app.app_context(), query_count() as counted:
+        prune_refresh_tokens(batch_size=10, revoked_retention=RETENTION, now=NOW)
+    assert counted.count == 2 * 4
+
+
+def test_cli_command_prints_the_result(app, tokens):
+    result = app.test_cli_runner().invoke(args=["prune_tokens", "--batch-size", "15"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["rows_reclaimed"] == 40
+    assert _count(app) == 0
+
+
+def test_pruner_counts_runs_and_failures(app, tokens):
+    pruner = TokenPruner(app, interval=3600)
+    assert pruner.run_once()["rows_reclaimed"] == 40
+    with app.app_context():
+        RefreshToken.__table__.drop(db.engine)
+    assert pruner.run_once() is None
+    stats = pruner.stats()
+    assert (stats["runs"], stats["failures"], stats["rows_reclaimed"]) == (1, 1, 40)
+    assert stats["running"] is False
@@ -0,0 +1,22 @@
+"""A synchronous vote answers with the heat it just committed."""
+from __future__ import annotations
+
+from app.extensions import db
+from app.models import Todo
+
+
+def test_sync_vote_returns_committed_heat(app, client):
+    # Read when the aggregator is first built, on the first vote.
+    app.config["VOTE_WRITE_BEHIND"] = False
+    with app.app_context():
+        todo = Todo(title="Todo", content="c", author="test")
+        db.session.add(todo)
+        db.session.commit()
+        todo_id, heat = todo.id, todo.heat
+
+    for expected in (heat + 1, heat + 2):
+        response = client.post(f"/api/todos/{todo_id}/vote", json={"delta": 1})
+        assert response.status_code == 200, response.get_data(as_text=True)
+        assert response.get_json()["heat"] == expected
+    with app.app_context():
+        assert db.session.get(Todo, todo_id).heat == heat + 2